@@ -2,7 +2,7 @@ from setuptools import setup
 
 setup(
     name             = 'tgbox',
-    packages         = ['tgbox', 'tgbox.api'],
+    packages         = ['tgbox', 'tgbox.api', 'tgbox.bench'],
     version          = '1.0',
     license          = 'LGPL-2.1',
     description      = 'Encrypted cloud storage API based on a Telegram API',
@@ -34,7 +34,8 @@ setup(
         'fast': [
             'cryptography',
             'cryptg==0.3.1',
-            'regex==2022.8.17'
+            'regex==2022.8.17',
+            'numpy'
         ],
         'doc': ['sphinx-rtd-theme==1.0.0']
     },
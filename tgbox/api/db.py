@@ -2,21 +2,28 @@
 
 from typing import (
     Optional, Union,
-    AsyncGenerator
+    AsyncGenerator,
+    Iterable, List
 )
 from os import PathLike
 from pathlib import Path
+from asyncio import Lock, current_task
 
 import aiosqlite
 
 from ..defaults import (
     Limits, DOWNLOAD_PATH,
     DEF_NO_FOLDER, DEF_UNK_FOLDER,
+    DB_PROFILE
 )
 from ..errors import PathIsDirectory
 from ..tools import anext
 
-__all__ = ['SqlTableWrapper', 'TgboxDB', 'TABLES']
+__all__ = [
+    'SqlTableWrapper', 'TgboxDB', 'TABLES',
+    'INDEXES', 'DB_PROFILES', 'SQLITE_MAX_VARIABLES',
+    'MIGRATIONS', 'SCHEMA_VERSION'
+]
 
 TABLES = {
     'BOX_DATA': (
@@ -42,20 +49,262 @@ TABLES = {
         ('PART_ID', 'BLOB NOT NULL'),
         ('PARENT_PART_ID', 'BLOB'),
     ),
+    # Closure of the PATH_PARTS tree: row for every
+    # directory and each of its ancestors (and itself
+    # with DEPTH 0), so the full path of directory or
+    # all its subdirectories are fetched in one query.
+    'PATH_CLOSURE': (
+        ('ANCESTOR', 'BLOB NOT NULL'),
+        ('DESCENDANT', 'BLOB NOT NULL'),
+        ('DEPTH', 'INTEGER NOT NULL'),
+    ),
+    # Blind index of files: keyed tokens of their attributes,
+    # see tools.BlindIndex. It's empty until DEFAULTS has
+    # SEARCH_INDEX enabled.
+    'SEARCH_INDEX': (
+        ('TOKEN', 'BLOB NOT NULL'),
+        ('ID', 'INTEGER NOT NULL'),
+    ),
     'DEFAULTS': (                            # Default value
         ('METADATA_MAX', 'INTEGER NOT NULL', int(Limits.METADATA_MAX)),
         ('FILE_PATH_MAX', 'INTEGER NOT NULL', int(Limits.FILE_PATH_MAX)),
 
         ('DOWNLOAD_PATH', 'TEXT NOT NULL', str(DOWNLOAD_PATH)),
         ('DEF_NO_FOLDER', 'TEXT NOT NULL', str(DEF_NO_FOLDER)),
-        ('DEF_UNK_FOLDER', 'TEXT NOT NULL', str(DEF_UNK_FOLDER))
+        ('DEF_UNK_FOLDER', 'TEXT NOT NULL', str(DEF_UNK_FOLDER)),
+
+        ('DB_PROFILE', 'TEXT NOT NULL', DB_PROFILE),
+        ('SEARCH_INDEX', 'INTEGER NOT NULL', 0)
+    )
+}
+# Secondary indexes of the TABLES. New DBs are created
+# with them, existing DBs should get a new index with
+# the CREATE INDEX statement in the MIGRATIONS.
+INDEXES = {                # (Table, Columns)
+    'FILES_FINGERPRINT': ('FILES', ('FINGERPRINT',)),
+    'FILES_PPATH_HEAD': ('FILES', ('PPATH_HEAD',)),
+    'PATH_PARTS_PART_ID': ('PATH_PARTS', ('PART_ID',)),
+    'PATH_PARTS_PARENT_PART_ID': ('PATH_PARTS', ('PARENT_PART_ID',)),
+    'PATH_CLOSURE_DESCENDANT': ('PATH_CLOSURE', ('DESCENDANT', 'DEPTH')),
+    'PATH_CLOSURE_ANCESTOR': ('PATH_CLOSURE', ('ANCESTOR', 'DEPTH')),
+    'SEARCH_INDEX_TOKEN': ('SEARCH_INDEX', ('TOKEN', 'ID')),
+    'SEARCH_INDEX_ID': ('SEARCH_INDEX', ('ID',)),
+}
+# SQLite PRAGMAs applied by the TgboxDB.init. Profile
+# is taken from the DEFAULTS table if not specified.
+DB_PROFILES = {
+    # SQLite defaults: rollback journal and fsync on every
+    # commit. The safest, but also the slowest on writes.
+    'durable': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'mmap_size': 0,
+        'cache_size': -2000, # KiB, SQLite default
+        'temp_store': 'DEFAULT'
+    },
+    # WAL with NORMAL synchronous can't corrupt DB, but
+    # last commits may be lost on power failure (not on
+    # app crash). Readers don't block writer in WAL. Note
+    # that WAL keeps "-wal" and "-shm" files near the DB
+    # while it's open, copy DB only after it's closed.
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,
+        'cache_size': -65536,
+        'temp_store': 'MEMORY'
+    },
+    # For clone_remotebox and other bulk imports. OS crash
+    # or power failure may corrupt DB, so switch back
+    # when you're done (clone_remotebox does this itself).
+    'bulk-load': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'mmap_size': 268435456,
+        'cache_size': -262144,
+        'temp_store': 'MEMORY'
+    }
+}
+# Default SQLITE_MAX_VARIABLE_NUMBER of the SQLite
+# before 3.32.0. Bulk selects are chunked by it.
+SQLITE_MAX_VARIABLES = 999
+
+def _sql_literal(value: Union[int, str, None]) -> str:
+    if value is None:
+        return 'NULL'
+    if isinstance(value, int):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+async def _create_schema(aiosql_conn) -> None:
+    # Must be set before the first table, see TgboxDB.vacuum
+    await aiosql_conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+
+    for table, data in TABLES.items():
+        columns = ', '.join((f'{i[0]} {i[1]}' for i in data))
+        await aiosql_conn.execute(f'CREATE TABLE {table} ({columns})')
+
+    for index, (table, columns) in INDEXES.items():
+        await aiosql_conn.execute(
+            f'CREATE INDEX {index} ON {table} ({", ".join(columns)})'
+        )
+    defaults = TABLES['DEFAULTS']
+    await aiosql_conn.execute(
+        'INSERT INTO DEFAULTS VALUES (' + ('?,' * len(defaults))[:-1] + ')',
+        [i[2] for i in defaults]
+    )
+
+async def _upgrade_legacy(aiosql_conn) -> None:
+    """
+    Migration of the DBs made before the schema versioning.
+    Such DB may miss any of the ``TABLES`` columns, so we
+    compare every table with the ``TABLES``. New columns
+    are added with the ``ALTER TABLE ADD COLUMN``, table
+    is rebuilt only if column should be removed or
+    can't be appended to the end of the table.
+    """
+    for table, data in TABLES.items():
+        columns = ', '.join((f'{i[0]} {i[1]}' for i in data))
+        await aiosql_conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({columns})')
+
+        table_columns = await aiosql_conn.execute(f'PRAGMA table_info({table})')
+        table_columns = [i[1] for i in await table_columns.fetchall()]
+        required_columns = [i[0] for i in data]
+
+        if table_columns == required_columns:
+            continue
+
+        new_columns = data[len(table_columns):]
+        appendable = (
+            table_columns == required_columns[:len(table_columns)]
+            and all(
+                len(i) > 2 or ('NOT NULL' not in i[1] and 'PRIMARY KEY' not in i[1])
+                for i in new_columns
+            )
+        )
+        if appendable:
+            for column in new_columns:
+                default = f' DEFAULT {_sql_literal(column[2])}' if len(column) > 2 else ''
+                await aiosql_conn.execute(
+                    f'ALTER TABLE {table} ADD COLUMN {column[0]} {column[1]}{default}'
+                )
+            continue
+
+        kept_columns = [i for i in table_columns if i in required_columns]
+        await aiosql_conn.execute(f'CREATE TABLE "updated!{table}" ({columns})')
+
+        # New columns with default value are filled with it
+        new_columns = [
+            i for i in data
+            if i[0] not in kept_columns and len(i) > 2
+        ]
+        insert_columns_str = ', '.join(
+            [*kept_columns, *(i[0] for i in new_columns)])
+        select_columns_str = ', '.join(
+            [*kept_columns, *('?' for _ in new_columns)])
+
+        await aiosql_conn.execute(
+            f"""INSERT INTO "updated!{table}" ({insert_columns_str}) """
+            f"""SELECT {select_columns_str} FROM {table}""",
+            [i[2] for i in new_columns]
+        )
+        await aiosql_conn.execute(f'DROP TABLE {table}')
+        await aiosql_conn.execute(
+            f'ALTER TABLE "updated!{table}" RENAME TO {table}'
+        )
+    # DEFAULTS may be just created by the loop above
+    defaults = TABLES['DEFAULTS']
+    await aiosql_conn.execute(
+        'INSERT INTO DEFAULTS SELECT ' + ('?,' * len(defaults))[:-1]
+        + ' WHERE NOT EXISTS (SELECT 1 FROM DEFAULTS)',
+        [i[2] for i in defaults]
+    )
+    # Indexes are created after tables, because the
+    # DROP TABLE of updated table drops its indexes.
+    for index, (table, columns) in INDEXES.items():
+        await aiosql_conn.execute(
+            f'CREATE INDEX IF NOT EXISTS {index} '
+            f'ON {table} ({", ".join(columns)})'
+        )
+    # PATH_CLOSURE may be new or be changed by versions
+    # that don't know about it, so we rebuild it
+    await aiosql_conn.execute('DELETE FROM PATH_CLOSURE')
+    await aiosql_conn.execute(
+        'INSERT INTO PATH_CLOSURE '
+        'WITH RECURSIVE closure(ANCESTOR, DESCENDANT, DEPTH) AS ('
+        '  SELECT PART_ID, PART_ID, 0 FROM PATH_PARTS'
+        '  UNION'
+        '  SELECT PATH_PARTS.PARENT_PART_ID, closure.DESCENDANT, closure.DEPTH + 1'
+        '  FROM closure JOIN PATH_PARTS ON PATH_PARTS.PART_ID = closure.ANCESTOR'
+        '  WHERE PATH_PARTS.PARENT_PART_ID IS NOT NULL'
+        ') SELECT * FROM closure'
     )
+
+# Ordered migrations of the DB schema. Key is the version
+# that DB will have after migration, value is a tuple of
+# SQL statements or async function that receives an
+# aiosqlite connection. Each migration is executed once
+# (in transaction) by the TgboxDB.init, version is stored
+# in the "PRAGMA user_version". New DBs are created from
+# the TABLES and INDEXES with the last version, so when
+# you change them, add here a migration for existing DBs,
+# preferably with "ALTER TABLE ... ADD COLUMN" statements.
+# Version 1 is the first versioned schema, DBs made before
+# it are upgraded by the _upgrade_legacy to the last one.
+MIGRATIONS = {
+    2: ( # Blind index, see DecryptedLocalBox.enable_search_index
+        'CREATE TABLE SEARCH_INDEX (TOKEN BLOB NOT NULL, ID INTEGER NOT NULL)',
+        'CREATE INDEX SEARCH_INDEX_TOKEN ON SEARCH_INDEX (TOKEN, ID)',
+        'CREATE INDEX SEARCH_INDEX_ID ON SEARCH_INDEX (ID)',
+        'ALTER TABLE DEFAULTS ADD COLUMN SEARCH_INDEX INTEGER NOT NULL DEFAULT 0'
+    ),
 }
+SCHEMA_VERSION = max(MIGRATIONS)
+
 class SqlTableWrapper:
-    """A low-level wrapper to SQLite Tables."""
-    def __init__(self, aiosql_conn, table_name: str):
+    """
+    A low-level wrapper to SQLite Tables.
+
+    If ``tgbox_db`` is specified and there is an active
+    ``TgboxDB.transaction``, then ``commit`` will be
+    ignored, changes are commited by the transaction.
+    Also, reads (``select``, ``count_rows`` and ``SELECT``
+    statements in ``execute``) will be routed to the read
+    connections of the ``tgbox_db``, see ``TgboxDB``. Reads
+    of the ``temp`` table are always made on ``aiosql_conn``.
+    """
+    def __init__(
+            self, aiosql_conn, table_name: str,
+            tgbox_db: Optional['TgboxDB'] = None,
+            temp: bool=False):
         self._table_name = table_name
         self._aiosql_conn = aiosql_conn
+        self._tgbox_db = tgbox_db
+        self._temp = temp
+
+    @property
+    def _in_transaction(self) -> bool:
+        """``True`` if current task is inside of the ``transaction``"""
+        return bool(self._tgbox_db and self._tgbox_db.in_transaction
+            and self._tgbox_db._transaction_owner is current_task())
+
+    async def _write(self, function, *args, commit: bool=True):
+        if commit and self._tgbox_db and not self._in_transaction:
+            # Statement is made in its own transaction, so it will wait
+            # for the transaction of other task instead of joining it
+            # (and being rolled back with it on error)
+            async with self._tgbox_db.transaction():
+                return await function(*args)
+
+        result = await function(*args)
+        if commit: await self.commit()
+        return result
+
+    @property
+    def _read_conn(self):
+        if self._tgbox_db and not self._temp:
+            return self._tgbox_db._get_read_connection()
+        return self._aiosql_conn
 
     async def __aiter__(self) -> tuple:
         """Will yield rows as self.select without ``sql_statement``"""
@@ -69,7 +318,7 @@ class SqlTableWrapper:
 
     async def count_rows(self) -> int:
         """Execute ``SELECT count(*) from TABLE_NAME``"""
-        cursor = await self._aiosql_conn.execute(
+        cursor = await self._read_conn.execute(
             f'SELECT count(*) FROM {self._table_name}'
         )
         return (await cursor.fetchone())[0]
@@ -84,15 +333,24 @@ class SqlTableWrapper:
         if not sql_tuple:
             sql_tuple = (f'SELECT * FROM {self._table_name}',())
 
-        cursor = await self._aiosql_conn.execute(*sql_tuple)
-        async for row in cursor: yield row
+        cursor = await self._read_conn.execute(*sql_tuple)
+        try:
+            async for row in cursor: yield row
+        finally:
+            # Unfinished statement holds the read snapshot
+            # of pooled connection, so we close it early.
+            await cursor.close()
 
     async def select_once(self, sql_tuple: Optional[tuple] = None) -> tuple:
         """
         Will return first row which match the ``sql_tuple``,
         see ``select()`` method for ``sql_tuple`` details.
         """
-        return await anext(self.select(sql_tuple=sql_tuple))
+        select = self.select(sql_tuple=sql_tuple)
+        try:
+            return await anext(select)
+        finally:
+            await select.aclose()
 
     async def insert(
             self, *args, sql_statement: Optional[str] = None,
@@ -109,24 +367,231 @@ class SqlTableWrapper:
                 f'INSERT INTO {self._table_name} values ('
                 + ('?,' * len(args))[:-1] + ')'
             )
-        await self._aiosql_conn.execute(sql_statement, args)
-        if commit: await self._aiosql_conn.commit()
+        await self._write(
+            self._aiosql_conn.execute,
+            sql_statement, args, commit=commit
+        )
 
     async def execute(self, sql_tuple: tuple, commit: bool=True):
-        result = await self._aiosql_conn.execute(*sql_tuple)
-        if commit: await self._aiosql_conn.commit()
-        return result # Returns Cursor object
+        if sql_tuple[0].lstrip()[:6].upper() == 'SELECT':
+            return await self.read(sql_tuple)
+
+        return await self._write( # Returns Cursor object
+            self._aiosql_conn.execute, *sql_tuple, commit=commit)
+
+    async def read(self, sql_tuple: tuple):
+        """
+        Will execute read-only ``sql_tuple`` on the read
+        connection and return Cursor. ``execute`` routes
+        only ``SELECT`` statements there, so use this
+        for other reads, like ``WITH RECURSIVE`` queries.
+        """
+        return await self._read_conn.execute(*sql_tuple)
 
     async def commit(self) -> None:
-        await self._aiosql_conn.commit()
+        if not self._in_transaction:
+            await self._aiosql_conn.commit()
+
+    async def insert_many(
+            self, rows: Iterable[tuple],
+            sql_statement: Optional[str] = None,
+            commit: bool=True) -> None:
+        """
+        Will insert all ``rows`` with one ``executemany``.
+        See ``insert()`` for ``sql_statement`` details,
+        here it's made from the first row.
+        """
+        rows = list(rows)
+        if not rows:
+            return
+
+        if not sql_statement:
+            sql_statement = (
+                f'INSERT INTO {self._table_name} values ('
+                + ('?,' * len(rows[0]))[:-1] + ')'
+            )
+        await self._write(
+            self._aiosql_conn.executemany,
+            sql_statement, rows, commit=commit
+        )
+
+    async def delete_many(
+            self, ids: Iterable, column: str='ID',
+            commit: bool=True) -> None:
+        """
+        Will delete all rows where ``column`` is in
+        the ``ids`` with one ``executemany``.
+        """
+        await self._write(
+            self._aiosql_conn.executemany,
+            f'DELETE FROM {self._table_name} WHERE {column}=?',
+            [(id_,) for id_ in ids], commit=commit
+        )
+
+    async def _select_in(self, what: str, column: str, values: Iterable) -> List[tuple]:
+        values, rows = list(values), []
+
+        for i in range(0, len(values), SQLITE_MAX_VARIABLES):
+            chunk = values[i:i+SQLITE_MAX_VARIABLES]
+            rows.extend(await self._read_conn.execute_fetchall(
+                f'SELECT {what} FROM {self._table_name} '
+                f'WHERE {column} IN ({("?," * len(chunk))[:-1]})', chunk
+            ))
+        return rows
+
+    async def select_by_ids(self, ids: Iterable, column: str='ID') -> List[tuple]:
+        """
+        Will return all rows where ``column`` is in the ``ids``.
+        Rows are fetched by ``SQLITE_MAX_VARIABLES`` per query,
+        order of rows is not guaranteed.
+        """
+        return await self._select_in('*', column, ids)
+
+    async def exists_many(self, column: str, values: Iterable) -> set:
+        """
+        Will return ``set`` of ``values`` that
+        exist in the ``column`` of this table.
+        """
+        rows = await self._select_in(f'DISTINCT {column}', column, values)
+        return {row[0] for row in rows}
+
+class _Transaction:
+    """
+    Async context manager returned by the ``TgboxDB.transaction``.
+    Every transaction is a SQLite SAVEPOINT, so nested ones
+    can be rolled back without touching the outer.
+    """
+    def __init__(self, tgbox_db: 'TgboxDB'):
+        self._tgbox_db = tgbox_db
+        self._savepoint = None
+        self._outermost = None
+
+    async def __aenter__(self) -> '_Transaction':
+        tgbox_db = self._tgbox_db
+
+        if tgbox_db._transaction_owner is not current_task():
+            # Transaction of other task is active. We can't
+            # nest into it, as its savepoints may be released
+            # before ours, so wait until it will be finished.
+            await tgbox_db._transaction_lock.acquire()
+            tgbox_db._transaction_owner = current_task()
+
+        self._outermost = not tgbox_db._transaction_depth
+        self._savepoint = f'tgbox_{tgbox_db._transaction_depth}'
+
+        try:
+            await tgbox_db._aiosql_db.execute(f'SAVEPOINT {self._savepoint}')
+        except:
+            if self._outermost:
+                self.__release_lock()
+            raise
+
+        tgbox_db._transaction_depth += 1
+        return self
+
+    async def __aexit__(self, exc_type, *_) -> None:
+        tgbox_db = self._tgbox_db
+        try:
+            if exc_type is not None:
+                await tgbox_db._aiosql_db.execute(
+                    f'ROLLBACK TO {self._savepoint}')
+                # Changes of it can't be rolled back
+                tgbox_db.file_columns = None
+
+            await tgbox_db._aiosql_db.execute(f'RELEASE {self._savepoint}')
+
+            if self._outermost:
+                await tgbox_db._aiosql_db.commit()
+        finally:
+            tgbox_db._transaction_depth -= 1
+            if self._outermost:
+                self.__release_lock()
+
+    def __release_lock(self) -> None:
+        self._tgbox_db._transaction_owner = None
+        self._tgbox_db._transaction_lock.release()
+
+    async def commit(self) -> None:
+        """
+        Will release current savepoint and start the new
+        one. In the outermost transaction this is a real
+        commit, so bulk writers can save changes every
+        N statements without leaving the transaction.
+        """
+        await self._tgbox_db._aiosql_db.execute(f'RELEASE {self._savepoint}')
+        if self._outermost:
+            await self._tgbox_db._aiosql_db.commit()
+
+        await self._tgbox_db._aiosql_db.execute(f'SAVEPOINT {self._savepoint}')
+
+class _Batches:
+    """
+    Async context manager returned by the ``TgboxDB.batches``.
+    Writes made between ``begin`` and ``step`` calls are made in
+    the ``transaction`` that is commited every ``size`` steps, so
+    it isn't held while we wait for something between batches.
+    """
+    def __init__(self, tgbox_db: 'TgboxDB', size: int):
+        self._tgbox_db = tgbox_db
+        self._size = size
+        self._steps = 0
+        self._transaction = None
+
+    async def __aenter__(self) -> '_Batches':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.__end(*exc_info)
+
+    async def begin(self) -> None:
+        """Will start transaction of the batch if it's not started yet"""
+        if self._transaction is None:
+            transaction = self._tgbox_db.transaction()
+            await transaction.__aenter__()
+            self._transaction = transaction
+
+    async def step(self) -> None:
+        """Will commit the batch if it has ``size`` steps"""
+        self._steps += 1
+        if not self._steps % self._size:
+            await self.__end(None, None, None)
+
+    async def __end(self, *exc_info) -> None:
+        transaction, self._transaction = self._transaction, None
+        if transaction is not None:
+            await transaction.__aexit__(*exc_info)
 
 class TgboxDB:
-    def __init__(self, db_path: Union[PathLike, str]):
+    """
+    Wrapper around the Tgbox SQLite DB. All writes are made
+    through the one writer connection. If DB is in the WAL
+    journal mode (see ``DB_PROFILES``), then reads are spread
+    over pool of read-only connections, so concurrent reads
+    don't wait for each other or for the writer in the one
+    thread. Reads inside ``transaction`` or while writer has
+    uncommited changes go to the writer, so they see them.
+    """
+    def __init__(
+            self, db_path: Union[PathLike, str],
+            profile: Optional[str] = None,
+            read_connections: int=4):
         """
         Arguments:
             db_path (``PathLike``, ``str``):
                 Path to the Tgbox DB.
+
+            profile (``str``, optional):
+                Name of the ``DB_PROFILES`` to apply
+                on ``init``. If not specified, will be
+                used ``DB_PROFILE`` from the DEFAULTS.
+
+            read_connections (``int``, optional):
+                Size of the read connections pool. It's
+                used only in WAL mode. 0 to disable.
         """
+        if profile is not None and profile not in DB_PROFILES:
+            raise ValueError(f'Unknown profile {profile}, see DB_PROFILES')
+
         if isinstance(db_path, PathLike):
             self._db_path = db_path
         else:
@@ -135,6 +600,22 @@ class TgboxDB:
         self._aiosql_db = None
         self._aiosql_db_is_closed = None
         self._name = self._db_path.name
+        self._profile = profile
+
+        self._read_connections = read_connections
+        self._read_pool = []
+        self._read_pool_index = 0
+
+        self._transaction_lock = Lock()
+        self._transaction_owner = None
+        self._transaction_depth = 0
+
+        self._temp_tables = set()
+
+        # The tgbox.tools.FileColumns of the decrypted LocalBox,
+        # see the DecryptedLocalBox.get_file_columns. It's only
+        # in memory, so it's dropped on rollback and close.
+        self.file_columns = None
 
         if self._db_path.is_dir():
             raise PathIsDirectory('Path is directory.')
@@ -155,60 +636,296 @@ class TgboxDB:
         """
         return self._aiosql_db_is_closed
 
+    @property
+    def profile(self) -> Optional[str]:
+        """
+        Returns name of the applied ``DB_PROFILES``
+        or ``None`` if DB wasn't initialized.
+        """
+        return self._profile if self._aiosql_db else None
+
+    @property
+    def in_transaction(self) -> bool:
+        """
+        Returns ``True`` if there is an active
+        ``transaction``, ``False`` otherwise.
+        """
+        return bool(self._transaction_depth)
+
+    def transaction(self) -> _Transaction:
+        """
+        Returns async context manager that will execute
+        all statements inside it in one transaction. It
+        will be commited on exit or rolled back on error.
+        ``commit`` of the ``SqlTableWrapper`` methods is
+        ignored while transaction is active.
+
+        Transactions can be nested, inner transactions
+        are SAVEPOINTs, so error inside them will roll
+        back only their changes. Transaction of other
+        ``asyncio.Task`` will wait until the current
+        is finished. Writes of ``SqlTableWrapper`` made
+        by other tasks outside of transaction will wait
+        for it too, they never join the active one.
+
+        .. code-block:: python
+
+            async with tgbox_db.transaction() as transaction:
+                for i, row in enumerate(rows, start=1):
+                    await tgbox_db.FILES.insert(*row)
+                    if not i % 1000:
+                        await transaction.commit()
+        """
+        return _Transaction(self)
+
+    def batches(self, size: int=1000) -> _Batches:
+        """
+        Returns async context manager that will execute
+        writes in the transactions of ``size`` steps.
+        Unlike one ``transaction`` around the whole
+        work, other tasks can write between batches.
+        On error only the current batch is rolled back.
+
+        Arguments:
+            size (``int``, optional):
+                Amount of steps in one transaction.
+
+        .. code-block:: python
+
+            async with tgbox_db.batches(1000) as batches:
+                async for row in fetch_rows(): # Network
+                    await batches.begin()
+                    await tgbox_db.FILES.insert(*row)
+                    await batches.step()
+        """
+        return _Batches(self, size)
+
     @staticmethod
-    async def create(db_path: Union[str, PathLike]) -> 'TgboxDB':
-        return await TgboxDB(db_path).init()
+    async def create(
+            db_path: Union[str, PathLike],
+            profile: Optional[str] = None,
+            read_connections: int=4) -> 'TgboxDB':
+        return await TgboxDB(db_path, profile=profile,
+            read_connections=read_connections).init()
+
+    def _get_read_connection(self) -> aiosqlite.Connection:
+        """
+        Returns next connection from the read pool or
+        the writer connection if pool is disabled or
+        there are uncommited changes.
+        """
+        if not self._read_pool or self._transaction_owner is current_task():
+            return self._aiosql_db
+
+        # Uncommited changes of other task's transaction may
+        # be rolled back, so its readers use the read pool.
+        if self._aiosql_db.in_transaction and not self.in_transaction:
+            return self._aiosql_db
+
+        self._read_pool_index = (self._read_pool_index + 1) % len(self._read_pool)
+        return self._read_pool[self._read_pool_index]
+
+    async def _open_read_pool(self) -> None:
+        await self._close_read_pool()
+
+        cursor = await self._aiosql_db.execute('PRAGMA journal_mode')
+        if (await cursor.fetchone())[0].lower() != 'wal':
+            return # Readers would block the writer
+
+        # Relative db_path may be resolved to other file
+        # if working directory was changed after init
+        cursor = await self._aiosql_db.execute('PRAGMA database_list')
+        db_file = [row[2] for row in await cursor.fetchall() if row[1] == 'main'][0]
+
+        pragmas = [
+            (pragma, value) for pragma, value
+            in DB_PROFILES[self._profile].items()
+            if pragma not in ('journal_mode', 'synchronous')
+        ]
+        for _ in range(self._read_connections):
+            connection = await aiosqlite.connect(db_file)
+            for pragma, value in (*pragmas, ('query_only', 'ON')):
+                await connection.execute(f'PRAGMA {pragma}={value}')
+
+            self._read_pool.append(connection)
+
+    async def _close_read_pool(self) -> None:
+        read_pool, self._read_pool = self._read_pool, []
+        for connection in read_pool:
+            await connection.close()
+
+    async def set_profile(self, profile: str) -> None:
+        """
+        Will apply PRAGMAs of the ``profile`` from
+        the ``DB_PROFILES``. This doesn't change the
+        ``DB_PROFILE`` in DEFAULTS, so after reopening
+        DB will be used the default one.
+
+        Arguments:
+            profile (``str``):
+                Name of the ``DB_PROFILES``.
+        """
+        if profile not in DB_PROFILES:
+            raise ValueError(f'Unknown profile {profile}, see DB_PROFILES')
+
+        # Readers would lock DB on the journal_mode change,
+        # pool is reopened only if new profile is in WAL
+        await self._close_read_pool()
+
+        for pragma, value in DB_PROFILES[profile].items():
+            await self._aiosql_db.execute(f'PRAGMA {pragma}={value}')
+
+        self._profile = profile
+        await self._open_read_pool()
+
+    async def vacuum(self, pages: Optional[int] = None, full: bool=False) -> int:
+        """
+        Will return free pages of the DB to the OS and
+        return amount of them. New DBs are created with
+        ``auto_vacuum=INCREMENTAL``, so free pages are
+        released by the ``pages`` budget per call. Older
+        DBs are not compacted unless ``full`` is ``True``.
+
+        Arguments:
+            pages (``int``, optional):
+                Maximum amount of pages to release.
+                All free pages if not specified.
+
+            full (``bool``, optional):
+                Will rewrite the whole DB with ``VACUUM``
+                and switch it to ``auto_vacuum=INCREMENTAL``.
+                This may take a while on big DBs.
+
+        .. note::
+            Can't be used inside ``transaction``.
+        """
+        if self.in_transaction:
+            raise ValueError("Vacuum can't be made inside transaction")
+
+        if pages is not None and pages <= 0 and not full:
+            return 0
+
+        cursor = await self._aiosql_db.execute('PRAGMA freelist_count')
+        free_pages = (await cursor.fetchone())[0]
+
+        await self._aiosql_db.commit()
+        if full:
+            await self._aiosql_db.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            await self._aiosql_db.execute('VACUUM')
+        else:
+            cursor = await self._aiosql_db.execute('PRAGMA auto_vacuum')
+            if (await cursor.fetchone())[0] != 2: # Not INCREMENTAL
+                return 0
+
+            # The execute() frees only one page per call, as
+            # it makes only one step of the PRAGMA, so we use
+            # executescript() that runs it to completion.
+            await self._aiosql_db.executescript(
+                f'PRAGMA incremental_vacuum({int(pages or 0)});')
+
+        cursor = await self._aiosql_db.execute('PRAGMA freelist_count')
+        return free_pages - (await cursor.fetchone())[0]
+
+    async def create_temp_table(self, name: str, definition: str) -> SqlTableWrapper:
+        """
+        Will create TEMP table that lives until DB is closed
+        and set its ``SqlTableWrapper`` as attribute ``name``.
+        TEMP tables exist only in the writer connection, so
+        reads from them are not routed to the read pool.
+
+        Arguments:
+            name (``str``):
+                Name of the table.
+
+            definition (``str``):
+                Columns, e.g ``'(ID INTEGER)'``, or virtual
+                table module, e.g ``'USING fts5(NAME)'``.
+        """
+        virtual = 'VIRTUAL ' if definition.lstrip()[:5].upper() == 'USING' else ''
+        await self._aiosql_db.execute(f'CREATE {virtual}TABLE temp.{name} {definition}')
+
+        table = SqlTableWrapper(self._aiosql_db, name, self, temp=True)
+        setattr(self, name, table)
+        self._temp_tables.add(name)
+
+        return table
+
+    async def drop_temp_table(self, name: str) -> None:
+        """
+        Will drop TEMP table made by ``create_temp_table``.
+
+        Arguments:
+            name (``str``):
+                Name of the table.
+        """
+        await self._aiosql_db.execute(f'DROP TABLE temp.{name}')
+        self._temp_tables.discard(name)
+        delattr(self, name)
 
     async def close(self) -> None:
+        await self._close_read_pool()
         await self._aiosql_db.close()
         self._aiosql_db_is_closed = True
 
-    async def init(self) -> 'TgboxDB':
-        self._aiosql_db = await aiosqlite.connect(self._db_path)
+        for name in self._temp_tables:
+            delattr(self, name)
+        self._temp_tables.clear()
+        self.file_columns = None
+
+    async def _migrate(self) -> None:
+        cursor = await self._aiosql_db.execute('PRAGMA user_version')
+        version = (await cursor.fetchone())[0]
 
-        for table, data in TABLES.items():
+        # The DB is up to date or is made by the newer
+        # version. Either way, there is nothing to do.
+        if version >= SCHEMA_VERSION:
+            return
+
+        migrations = MIGRATIONS
+        if not version:
+            cursor = await self._aiosql_db.execute(
+                'SELECT count(*) FROM sqlite_master')
+
+            if not (await cursor.fetchone())[0]: # New DB
+                migrations = {SCHEMA_VERSION: _create_schema}
+            else:
+                migrations = {SCHEMA_VERSION: _upgrade_legacy}
+
+        for migration_version, migration in sorted(migrations.items()):
+            if migration_version <= version:
+                continue
+
+            await self._aiosql_db.execute('BEGIN')
             try:
-                columns = ', '.join((f'{i[0]} {i[1]}' for i in data))
+                if callable(migration):
+                    await migration(self._aiosql_db)
+                else:
+                    for sql_statement in migration:
+                        await self._aiosql_db.execute(sql_statement)
+
+                # PRAGMA doesn't support parameters
                 await self._aiosql_db.execute(
-                    f'CREATE TABLE {table} ({columns})'
-                )
-                if table == 'DEFAULTS':
-                    sql_statement = (
-                        f'INSERT INTO {table} VALUES ('
-                        + ('?,' * len(data))[:-1] + ')'
-                    )
-                    await self._aiosql_db.execute(
-                        sql_statement, [i[2] for i in data]
-                    )
-            except aiosqlite.OperationalError: # Table exists
-                table_columns = await self._aiosql_db.execute(
-                    f'PRAGMA table_info({table})'
-                )
-                table_columns = set((i[1] for i in await table_columns.fetchall()))
-                required_columns = set((i[0] for i in data))
-
-                if table_columns != required_columns:
-                    table_columns &= required_columns
-
-                    await self._aiosql_db.execute(
-                        f'CREATE TABLE "updated!{table}" ({columns})'
-                    )
-                    table_columns_str = ', '.join(table_columns)
-                    await self._aiosql_db.execute(
-                        f"""INSERT INTO "updated!{table}" ({table_columns_str}) """
-                        f"""SELECT {table_columns_str} FROM {table}"""
-                    )
-                    await self._aiosql_db.execute(f'DROP TABLE {table}')
-                    await self._aiosql_db.execute(
-                        f'ALTER TABLE "updated!{table}" RENAME TO {table}'
-                    )
-        await self._aiosql_db.commit()
+                    f'PRAGMA user_version = {int(migration_version)}')
+            except:
+                await self._aiosql_db.rollback()
+                raise
+
+            await self._aiosql_db.commit()
+
+    async def init(self) -> 'TgboxDB':
+        self._aiosql_db = await aiosqlite.connect(self._db_path)
+        await self._migrate()
+
         self._aiosql_db_is_closed = False
 
-        tables = await self._aiosql_db.execute(
-            "SELECT name FROM sqlite_master WHERE type='table'"
-        )
-        for table in (await tables.fetchall()):
-            setattr(self, table[0], SqlTableWrapper(self._aiosql_db, table[0]))
+        if self._profile is None:
+            cursor = await self._aiosql_db.execute(
+                'SELECT DB_PROFILE FROM DEFAULTS')
+            self._profile = (await cursor.fetchone())[0]
+
+        await self.set_profile(self._profile)
+
+        for table in TABLES:
+            setattr(self, table, SqlTableWrapper(self._aiosql_db, table, self))
 
         return self
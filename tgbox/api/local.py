@@ -2,17 +2,19 @@
 
 from typing import (
     BinaryIO, Union, NoReturn, Callable,
-    AsyncGenerator, Dict, Optional
+    AsyncGenerator, Dict, Optional,
+    Iterable, List, Tuple
 )
 from os.path import getsize
 from pathlib import Path
+from copy import deepcopy
 
 from os import PathLike
 from io import BytesIO
 from time import time
 
 from hashlib import sha256
-from asyncio import iscoroutinefunction, gather
+from asyncio import iscoroutinefunction
 
 from filetype import guess as filetype_guess
 from telethon.tl.types import Photo, Document
@@ -24,7 +26,8 @@ from ..keys import (
     make_filekey, make_requestkey,
     EncryptedMainkey, make_mainkey,
     make_sharekey, MainKey, RequestKey,
-    ShareKey, ImportKey, FileKey, BaseKey
+    ShareKey, ImportKey, FileKey, BaseKey,
+    CryptoContext, Phrase, make_basekey_async
 )
 from ..defaults import PREFIX, VERBYTE, DEF_TGBOX_NAME
 
@@ -35,7 +38,7 @@ from ..errors import (
     NotEnoughRights, IncorrectKey, FingerprintExists
 )
 from ..tools import (
-    PackedAttributes, ppart_id_generator,
+    PackedAttributes, ppart_id_generator, BlindIndex, FileColumns,
     int_to_bytes, bytes_to_int, SearchFilter,
     get_media_duration, prbg, make_media_preview
 )
@@ -44,7 +47,8 @@ from .utils import (
     _TelegramVirtualFile, TelegramClient,
     DefaultsTableWrapper, RemoteBoxDefaults
 )
-from .db import TgboxDB
+from .db import TgboxDB, TABLES, SQLITE_MAX_VARIABLES
+from aiosqlite import OperationalError
 
 __all__ = [
     'make_localbox',
@@ -98,6 +102,8 @@ async def make_localbox(
 async def get_localbox(
         basekey: Optional[BaseKey] = None,
         tgbox_db_path: Optional[Union[PathLike, str]] = DEF_TGBOX_NAME,
+        phrase: Optional[Union[bytes, Phrase]] = None,
+        db_profile: Optional[str] = None
         ) -> Union['EncryptedLocalBox', 'DecryptedLocalBox']:
     """
     Returns LocalBox.
@@ -110,6 +116,16 @@ async def get_localbox(
         tgbox_db_path (``PathLike``, ``str``, optional):
             ``PathLike`` to your TgboxDB (LocalBox). Default
             is ``defaults.DEF_TGBOX_NAME``.
+
+        phrase (``bytes``, ``Phrase``, optional):
+            Can be specified instead of ``basekey``. The
+            ``BaseKey`` will be made from it in the process
+            pool, without blocking event loop.
+
+        db_profile (``str``, optional):
+            SQLite profile from the ``tgbox.api.db.DB_PROFILES``.
+            If not specified, then ``DB_PROFILE`` from the
+            DEFAULTS table of your LocalBox will be used.
     """
     if not isinstance(tgbox_db_path, PathLike):
         tgbox_db_path = Path(tgbox_db_path)
@@ -117,10 +133,12 @@ async def get_localbox(
     if not tgbox_db_path.exists():
         raise FileNotFoundError(f'Can\'t open {tgbox_db_path.absolute()}')
     else:
-        tgbox_db = await TgboxDB(tgbox_db_path).init()
+        tgbox_db = await TgboxDB(tgbox_db_path, profile=db_profile).init()
 
     if basekey:
         return await EncryptedLocalBox(tgbox_db).decrypt(basekey)
+    elif phrase:
+        return await EncryptedLocalBox(tgbox_db).unlock(phrase)
     else:
         return await EncryptedLocalBox(tgbox_db).init()
 
@@ -128,7 +146,8 @@ async def clone_remotebox(
         drb: 'tgbox.api.remote.DecryptedRemoteBox',
         basekey: BaseKey,
         progress_callback: Optional[Callable[[int, int], None]] = None,
-        box_path: Optional[Union[PathLike, str]] = None) -> 'DecryptedLocalBox':
+        box_path: Optional[Union[PathLike, str]] = None,
+        batch_size: int=1000) -> 'DecryptedLocalBox':
     """
     This method makes ``LocalBox`` from ``RemoteBox`` and
     imports all RemoteBoxFiles to it.
@@ -149,6 +168,15 @@ async def clone_remotebox(
         box_path (``PathLike``, ``str``, optional):
             Direct path with filename included. If
             not specified, then ``RemoteBox`` name used.
+
+        batch_size (``int``, optional):
+            Amount of imported or removed files per one
+            DB transaction, it is commited between them.
+
+    .. note::
+        While importing, LocalBox is opened with the
+        ``'bulk-load'`` SQLite profile (no fsync). After
+        clone it will be switched back to the default.
     """
     box_path = await drb.get_box_name()\
         if not box_path else box_path
@@ -178,17 +206,161 @@ async def clone_remotebox(
         decrypt=True, reverse=True,
         erase_encrypted_metadata=False
     )
-    async for drbf in files_generator:
-        if progress_callback:
-            if iscoroutinefunction(progress_callback):
-                await progress_callback(drbf.id, last_file_id)
-            else:
-                progress_callback(drbf.id, last_file_id)
+    default_profile = tgbox_db.profile
+    await tgbox_db.set_profile('bulk-load')
+
+    try:
+        async with tgbox_db.transaction() as transaction:
+            batch = []
+            async for drbf in files_generator:
+                if progress_callback:
+                    if iscoroutinefunction(progress_callback):
+                        await progress_callback(drbf.id, last_file_id)
+                    else:
+                        progress_callback(drbf.id, last_file_id)
 
-        await dlb.import_file(drbf)
+                batch.append(drbf)
+                if len(batch) == batch_size:
+                    await dlb.import_files(batch)
+                    await transaction.commit()
+                    batch.clear()
 
+            await dlb.import_files(batch)
+    finally:
+        await tgbox_db.set_profile(default_profile)
     return dlb
 
+async def _search_index_enabled(
+        defaults: Union[DefaultsTableWrapper, RemoteBoxDefaults]) -> bool:
+    """Returns ``True`` if LocalBox has blind index enabled"""
+    if isinstance(defaults, DefaultsTableWrapper) and not defaults.initialized:
+        await defaults.init()
+
+    return bool(getattr(defaults, 'SEARCH_INDEX', 0))
+
+def _decrypted_attributes(
+        dlbf: 'DecryptedLocalBoxFile', *names: str) -> Optional[tuple]:
+    """
+    Returns attributes ``names`` of the (lazy) ``dlbf``
+    or ``None`` if its metadata can't be decrypted.
+    """
+    try:
+        return tuple(getattr(dlbf, name) for name in names)
+    except (AESError, ValueError, KeyError):
+        return None
+
+def _file_tokens(
+        blind_index: Optional[BlindIndex],
+        dlbf: 'DecryptedLocalBoxFile') -> set:
+    """Returns blind index tokens of the ``dlbf``"""
+    attributes = _decrypted_attributes(
+        dlbf, 'file_name', 'mime', 'size', 'upload_time')
+
+    if blind_index is None or attributes is None:
+        return {BlindIndex.NOT_INDEXED}
+
+    return blind_index.file_tokens(*attributes)
+
+def _update_file_columns(
+        file_columns: FileColumns,
+        dlbf: 'DecryptedLocalBoxFile') -> None:
+    """Will add (or replace) the ``dlbf`` to the ``file_columns``"""
+    attributes = _decrypted_attributes(dlbf, 'id', 'size',
+        'upload_time', 'mime', 'imported', '_ppath_head')
+
+    if attributes is None:
+        file_columns.remove([dlbf.id])
+    else:
+        file_columns.update(*attributes)
+
+async def _retain_file_columns(tgbox_db: TgboxDB) -> None:
+    """Will remove files that are not in ``FILES`` from the ``FileColumns``"""
+    if tgbox_db.file_columns is not None:
+        cursor = await tgbox_db.FILES.execute(('SELECT ID FROM FILES', ()))
+        tgbox_db.file_columns.retain(row[0] for row in await cursor.fetchall())
+
+async def _directory_paths(
+        tgbox_db: TgboxDB, crypto: CryptoContext,
+        part_ids: Iterable[bytes]) -> Dict[bytes, str]:
+    """
+    Returns full paths of directories with ``part_ids``
+    as ``{part_id: path}``, like ``str(directory)``
+    after the ``directory.lload(full=True)``.
+    """
+    part_ids, enc_parts, paths = list(set(part_ids)), {}, {}
+
+    for i in range(0, len(part_ids), SQLITE_MAX_VARIABLES):
+        chunk = part_ids[i:i+SQLITE_MAX_VARIABLES]
+        cursor = await tgbox_db.PATH_CLOSURE.execute((
+            'SELECT PATH_CLOSURE.DESCENDANT, PATH_PARTS.ENC_PART '
+            'FROM PATH_CLOSURE JOIN PATH_PARTS ON PATH_PARTS.rowid = ('
+            '  SELECT rowid FROM PATH_PARTS '
+            '  WHERE PART_ID = PATH_CLOSURE.ANCESTOR LIMIT 1'
+            f') WHERE PATH_CLOSURE.DESCENDANT IN ({("?," * len(chunk))[:-1]}) '
+            'ORDER BY PATH_CLOSURE.DESCENDANT, PATH_CLOSURE.DEPTH DESC', chunk
+        ))
+        for part_id, enc_part in await cursor.fetchall():
+            if enc_part not in enc_parts:
+                enc_parts[enc_part] = crypto.aes().decrypt(enc_part).decode()
+            paths.setdefault(part_id, []).append(enc_parts[enc_part])
+
+    return {part_id: str(Path(*parts)) for part_id, parts in paths.items()}
+
+async def _update_search_fts(
+        tgbox_db: TgboxDB, crypto: CryptoContext,
+        ids: List[int], files: List['DecryptedLocalBoxFile']) -> None:
+    """
+    Will replace rows of files with ``ids`` in the TEMP
+    ``SEARCH_FTS`` table by the ``files`` (decrypted
+    with ``MainKey``). See ``DecryptedLocalBox.search_file``.
+    """
+    await tgbox_db.SEARCH_FTS.delete_many(ids, column='rowid', commit=False)
+
+    paths = await _directory_paths(
+        tgbox_db, crypto, (dlbf._ppath_head for dlbf in files))
+
+    rows = []
+    for dlbf in files:
+        attributes = _decrypted_attributes(dlbf, 'file_name', 'cattrs')
+        if attributes is None:
+            continue
+
+        file_name, cattrs = attributes
+        rows.append((
+            dlbf.id, file_name,
+            paths.get(dlbf._ppath_head, ''),
+            '\n' + '\n'.join(cattrs) + '\n'
+        ))
+
+    await tgbox_db.SEARCH_FTS.insert_many(rows, sql_statement=(
+        'INSERT INTO SEARCH_FTS (rowid, FILE_NAME, FILE_PATH, CATTRS) '
+        'VALUES (?,?,?,?)'
+    ))
+
+async def _update_indexes(
+        tgbox_db: TgboxDB, crypto: CryptoContext,
+        blind_index: Optional[BlindIndex],
+        ids: List[int], files: List['DecryptedLocalBoxFile'],
+        search_index: bool, search_fts: bool) -> None:
+    """
+    Will replace blind index tokens, TEMP ``SEARCH_FTS`` rows
+    and ``FileColumns`` of files with ``ids`` by the ``files``
+    (decrypted with ``MainKey``). Any index of files should
+    be updated here. Should be called in transaction.
+    """
+    if search_index:
+        await tgbox_db.SEARCH_INDEX.delete_many(ids)
+        await tgbox_db.SEARCH_INDEX.insert_many(
+            (token, dlbf.id) for dlbf in files
+            for token in _file_tokens(blind_index, dlbf)
+        )
+    if search_fts:
+        await _update_search_fts(tgbox_db, crypto, ids, files)
+
+    if tgbox_db.file_columns is not None:
+        for dlbf in files:
+            _update_file_columns(tgbox_db.file_columns, dlbf)
+
 class EncryptedLocalBox:
     """
     This class represents an encrypted local box. On more
@@ -373,7 +545,8 @@ class EncryptedLocalBox:
         return self
 
     async def get_file(
-            self, id: int, decrypt: bool=True, cache_preview: bool=True)\
+            self, id: int, decrypt: bool=True,
+            cache_preview: bool=True, lazy: bool=False)\
             -> Union['DecryptedLocalBoxFile', 'EncryptedLocalBoxFile', None]:
         """
         Returns ``EncryptedLocalBoxFile`` from ``EncryptedLocalBox``
@@ -389,6 +562,10 @@ class EncryptedLocalBox:
 
             cache_preview (``bool``, optional):
                 Cache preview in class or not.
+
+            lazy (``bool``, optional):
+                Decrypt metadata only on first access
+                to it. See ``DecryptedLocalBoxFile``.
         """
         try:
             self.__raise_initialized()
@@ -399,7 +576,8 @@ class EncryptedLocalBox:
             )
             if decrypt and self._mainkey and not\
                 isinstance(self._mainkey, EncryptedMainkey):
-                    return await elbf.decrypt(self._mainkey)
+                    return await elbf.decrypt(
+                        self._mainkey, crypto=self._crypto, lazy=lazy)
             else:
                 return await elbf.init()
         except StopAsyncIteration: # No file by ``id``.
@@ -407,13 +585,20 @@ class EncryptedLocalBox:
 
     async def contents(
             self, sfpid: Optional[bytes] = None,
-            ignore_files: Optional[bool] = False
+            ignore_files: Optional[bool] = False,
+            max_depth: Optional[int] = None,
+            batch_size: int=100
                 ) -> AsyncGenerator[Union[
                 'EncryptedLocalBoxDirectory',
-                'DecryptedLocalBoxDirectory'], None
+                'DecryptedLocalBoxDirectory',
+                'EncryptedLocalBoxFile',
+                'DecryptedLocalBoxFile'], None
             ]:
         """
         Recursive iterate over all files/folders in LocalBox.
+        Folders are yielded in depth-first order, each folder
+        is followed by its files. The whole tree is fetched
+        with one recursive query.
 
         Arguments:
             sfpid (``bytes``, optional):
@@ -423,44 +608,165 @@ class EncryptedLocalBox:
             ignore_files (``bool``, optional):
                 Will **not** return LocalBoxFile associated
                 with the *LocalBoxDirectory* if ``False``.
+
+            max_depth (``int``, optional):
+                Will not go deeper than ``max_depth`` folders
+                from the start folder (0 is the start only).
+
+            batch_size (``int``, optional):
+                Amount of folders fetched (and decrypted) at once.
         """
-        sfpid = (sfpid,) if sfpid else []
+        cursor = await self._tgbox_db.PATH_PARTS.read(
+            self.__tree_query(sfpid, max_depth)
+        )
+        while True:
+            rows = await cursor.fetchmany(batch_size)
+            if not rows: return
 
-        if not sfpid:
-            root_pids = await self._tgbox_db.PATH_PARTS.execute((
-                'SELECT PART_ID FROM PATH_PARTS WHERE PARENT_PART_ID IS NULL', ()
-            ))
-            sfpid = [i[0] for i in await root_pids.fetchall()]
+            for directory in [self._directory_from_row(row) for row in rows]:
+                yield directory
 
-        for pid in sfpid:
-            lbfid = EncryptedLocalBoxDirectory(self._tgbox_db, pid)
+                if not ignore_files:
+                    files = self._load_files(
+                        'FILES.PPATH_HEAD IS ?', (directory.part_id,))
+                    async for file in files:
+                        yield file
 
-            if isinstance(self, DecryptedLocalBox):
-                lbfid = await lbfid.decrypt(self._mainkey)
-            else:
-                lbfid = await lbfid.init()
+    async def walk(
+            self, sfpid: Optional[bytes] = None,
+            ignore_files: Optional[bool] = False,
+            max_depth: Optional[int] = None,
+            cache_preview: bool=True,
+            batch_size: int=100
+                ) -> AsyncGenerator[Tuple[
+                Union['EncryptedLocalBoxDirectory', 'DecryptedLocalBoxDirectory'],
+                List[Union['EncryptedLocalBoxDirectory', 'DecryptedLocalBoxDirectory']],
+                List[Union['EncryptedLocalBoxFile', 'DecryptedLocalBoxFile']]], None
+            ]:
+        """
+        Like ``os.walk``, will yield ``(directory, subdirectories,
+        files)`` for every folder in LocalBox, in depth-first order
+        (parent before children). The whole tree with children of
+        every folder is fetched with one recursive query.
 
-            yield lbfid
+        Arguments:
+            sfpid (``bytes``, optional):
+                Will start from this PartID if specified,
+                else will start from "root" PIDs.
+
+            ignore_files (``bool``, optional):
+                Files will be always empty list if ``True``.
+
+            max_depth (``int``, optional):
+                Will not go deeper than ``max_depth`` folders
+                from the start folder (0 is the start only).
+                Subdirectories of the deepest folders are
+                still listed.
+
+            cache_preview (``bool``, optional):
+                Cache preview in files or not.
 
+            batch_size (``int``, optional):
+                Amount of rows fetched (and decrypted) at once.
+        """
+        cursor = await self._tgbox_db.PATH_PARTS.read(
+            self.__tree_query(sfpid, max_depth, children=True)
+        )
+        async def make_step(directory, subdirectories):
+            files = []
             if not ignore_files:
-                async for lbfi in lbfid.iterdir(ignore_dirs=True):
-                    yield lbfi
+                load_files = self._load_files(
+                    'FILES.PPATH_HEAD IS ?', (directory.part_id,),
+                    cache_preview=cache_preview
+                )
+                files = [file async for file in load_files]
 
-            child_pids = await self._tgbox_db.PATH_PARTS.execute((
-                'SELECT PART_ID FROM PATH_PARTS WHERE PARENT_PART_ID IS ?',
-                (pid,)
-            ))
-            child_sfpid = [i[0] for i in await child_pids.fetchall()]
+            return directory, subdirectories, files
+
+        directory, subdirectories = None, []
+        while True:
+            rows = await cursor.fetchmany(batch_size)
+            if not rows: break
 
-            for csfpid in child_sfpid:
-                contents = self.contents(csfpid, ignore_files=ignore_files)
-                async for content in contents:
-                    yield content
+            for row in rows:
+                folder_row, child_row = row[:3], row[5:]
+
+                if not directory or directory.part_id != folder_row[1]:
+                    if directory:
+                        yield await make_step(directory, subdirectories)
+
+                    directory = self._directory_from_row(folder_row)
+                    subdirectories = []
+
+                if child_row[1] is not None:
+                    subdirectories.append(self._directory_from_row(child_row))
+
+        if directory:
+            yield await make_step(directory, subdirectories)
+
+    def __tree_query(
+            self, sfpid: Optional[bytes] = None,
+            max_depth: Optional[int] = None,
+            children: bool=False) -> tuple:
+        """
+        Returns ``sql_tuple`` that selects ``PATH_PARTS`` rows
+        of the tree (plus DEPTH and sort KEY), in depth-first
+        order. If ``children``, every row will be joined with
+        rows of its children (or ``NULL`` if there is none).
+        """
+        if sfpid:
+            start, params = 'PART_ID = ?', [sfpid]
+        else:
+            start, params = 'PARENT_PART_ID IS NULL', []
+
+        max_depth = -1 if max_depth is None else max_depth
+        params.extend((max_depth, max_depth))
+
+        # Sort KEY is the path of rowids, so the
+        # ORDER BY KEY gives us depth-first order
+        sql_query = (
+            'WITH RECURSIVE tree(ENC_PART, PART_ID, PARENT_PART_ID, DEPTH, KEY) AS ('
+            "  SELECT ENC_PART, PART_ID, PARENT_PART_ID, 0, printf('%016x', rowid)"
+            f' FROM PATH_PARTS WHERE {start}'
+            '  UNION ALL'
+            '  SELECT PATH_PARTS.ENC_PART, PATH_PARTS.PART_ID, PATH_PARTS.PARENT_PART_ID,'
+            "  tree.DEPTH + 1, tree.KEY || printf('%016x', PATH_PARTS.rowid)"
+            '  FROM tree JOIN PATH_PARTS ON PATH_PARTS.PARENT_PART_ID = tree.PART_ID'
+            '  WHERE ? < 0 OR tree.DEPTH < ?'
+            ') '
+        )
+        if children:
+            sql_query += (
+                'SELECT tree.*, child.* FROM tree LEFT JOIN PATH_PARTS AS child '
+                'ON child.PARENT_PART_ID = tree.PART_ID ORDER BY tree.KEY, child.rowid'
+            )
+        else:
+            sql_query += 'SELECT * FROM tree ORDER BY KEY'
+
+        return sql_query, tuple(params)
+
+    def _directory_from_row(self, folder_row: tuple) -> Union[
+            'EncryptedLocalBoxDirectory',
+            'DecryptedLocalBoxDirectory']:
+        """
+        Returns directory of this Box, made from
+        its ``PATH_PARTS`` row without queries.
+        """
+        if isinstance(self, DecryptedLocalBox):
+            elbd = EncryptedLocalBoxDirectory(self._tgbox_db,
+                folder_row[1])._init_from_row(folder_row[:3], self._elb)
+
+            return DecryptedLocalBoxDirectory(
+                elbd, self._mainkey, dlb=self)
+        else:
+            return EncryptedLocalBoxDirectory(self._tgbox_db,
+                folder_row[1])._init_from_row(folder_row[:3], self)
 
     async def files(
             self, cache_preview: bool=True,
             min_id: Optional[int] = None,
-            max_id: Optional[int] = None)\
+            max_id: Optional[int] = None,
+            lazy: bool=False)\
             -> Union[
                 'DecryptedLocalBoxFile',
                 'EncryptedLocalBoxFile', None
@@ -481,28 +787,113 @@ class EncryptedLocalBox:
 
             max_id (``bool``, optional):
                 Will iterate up to this ID.
+
+            lazy (``bool``, optional):
+                Decrypt metadata of ``DecryptedLocalBoxFile``
+                only on first access to it. This is much
+                faster if you need only some attributes.
+        """
+        where, params = [], []
+        if min_id:
+            where.append('FILES.ID > ?'); params.append(min_id)
+        if max_id:
+            where.append('FILES.ID < ?'); params.append(max_id)
+
+        load_files = self._load_files(
+            ' AND '.join(where), tuple(params),
+            cache_preview=cache_preview, lazy=lazy
+        )
+        async for file in load_files:
+            yield file
+
+    async def _load_files(
+            self, where: str = '', params: tuple = (),
+            cache_preview: bool=True, lazy: bool=False,
+            page_size: int=100) -> AsyncGenerator[Union[
+                'EncryptedLocalBoxFile',
+                'DecryptedLocalBoxFile', None], None
+            ]:
+        """
+        Will yield files that match the ``where`` SQL condition
+        on the ``FILES`` table, ordered by ID. Files are fetched
+        joined with their ``PATH_PARTS`` row by ``page_size``
+        per query, so there is no query per file. File without
+        directory is yielded as ``None``, like in ``get_file``.
+
+        Arguments:
+            where (``str``, optional):
+                SQL condition, e.g ``'FILES.PPATH_HEAD IS ?'``.
+
+            params (``tuple``, optional):
+                Parameters of the ``where``.
+
+            cache_preview (``bool``, optional):
+                Cache preview in class or not.
+
+            lazy (``bool``, optional):
+                See ``DecryptedLocalBoxFile``.
+
+            page_size (``int``, optional):
+                Amount of rows fetched per query.
         """
-        min_id = f'ID > {min_id}' if min_id else ''
-        max_id = f'ID < {max_id}' if max_id else ''
+        self.__raise_initialized()
 
-        min_id = min_id + ' AND' if all((min_id,max_id)) else min_id
-        where = 'WHERE' if any((min_id, max_id)) else ''
+        elb = self._elb if isinstance(self, DecryptedLocalBox) else self
 
-        sql_query = f'SELECT ID FROM FILES {where} {min_id} {max_id}'
-        cursor = await self._tgbox_db.FILES.execute((sql_query ,()))
+        decrypt = self._mainkey and not \
+            isinstance(self._mainkey, EncryptedMainkey)
+
+        if isinstance(self._defaults, DefaultsTableWrapper):
+            if not self._defaults.initialized:
+                await self._defaults.init()
+
+        where = f'({where}) AND' if where else ''
+        # PART_ID isn't UNIQUE, so we join only the first row
+        sql_query = (
+            'SELECT FILES.*, PATH_PARTS.* FROM FILES '
+            'LEFT JOIN PATH_PARTS ON PATH_PARTS.rowid = ('
+            '  SELECT rowid FROM PATH_PARTS '
+            '  WHERE PART_ID = FILES.PPATH_HEAD LIMIT 1'
+            f') WHERE {where} FILES.ID > ? ORDER BY FILES.ID LIMIT ?'
+        )
+        files_columns = len(TABLES['FILES'])
+        last_id = -1
 
         while True:
-            pending = await cursor.fetchmany(100)
-            if not pending: return # No more files
+            cursor = await self._tgbox_db.FILES.execute(
+                (sql_query, (*params, last_id, page_size))
+            )
+            rows = await cursor.fetchall()
 
-            pending = [
-                self.get_file(file_id[0], cache_preview=cache_preview)
-                for file_id in pending
-            ]
-            pending = await gather(*pending)
+            for row in rows:
+                file_row, folder_row = row[:files_columns], row[files_columns:]
+                last_id = file_row[0]
+
+                if folder_row[1] is None:
+                    yield None; continue
 
-            while pending:
-                yield pending.pop(0)
+                directory = EncryptedLocalBoxDirectory(
+                    self._tgbox_db, folder_row[1])\
+                        ._init_from_row(folder_row, elb)
+
+                elbf = EncryptedLocalBoxFile(
+                    file_row[0], self._tgbox_db,
+                    cache_preview=cache_preview,
+                    defaults=self._defaults
+                )
+                elbf._init_from_row(file_row, directory)
+
+                if decrypt:
+                    yield DecryptedLocalBoxFile(
+                        elbf, self._mainkey,
+                        cache_preview=cache_preview,
+                        crypto=self._crypto, lazy=lazy
+                    )
+                else:
+                    yield elbf
+
+            if len(rows) < page_size:
+                return
 
     def get_requestkey(self, basekey: BaseKey) -> RequestKey:
         """
@@ -532,7 +923,12 @@ class EncryptedLocalBox:
         if not self._tgbox_db.closed:
             await self.done()
 
-        self._tgbox_db.db_path.unlink()
+        db_path = self._tgbox_db.db_path
+        db_path.unlink()
+
+        # Files of the WAL journal mode, see DB_PROFILES
+        for suffix in ('-wal', '-shm'):
+            db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
 
     async def decrypt(self, key: Union[BaseKey, MainKey]) -> 'DecryptedLocalBox':
         """Will return ``DecryptedLocalBox``.
@@ -546,6 +942,19 @@ class EncryptedLocalBox:
         if not self.initialized: await self.init()
         return DecryptedLocalBox(self, key)
 
+    async def unlock(self, phrase: Union[bytes, Phrase]) -> 'DecryptedLocalBox':
+        """
+        Will make ``BaseKey`` from ``phrase`` and return
+        ``DecryptedLocalBox``. Scrypt runs in the process
+        pool (see ``keys.make_basekey_async``), so this
+        method doesn't block event loop.
+
+        Arguments:
+            phrase (``bytes``, ``Phrase``):
+                Passphrase of this Box.
+        """
+        return await self.decrypt(await make_basekey_async(phrase))
+
     async def done(self):
         """
         Await this method when you end all
@@ -586,7 +995,10 @@ class DecryptedLocalBox(EncryptedLocalBox):
 
         asyncio_run(main())
     """
-    def __init__(self, elb: EncryptedLocalBox, key: Union[BaseKey, MainKey]):
+    def __init__(
+            self, elb: EncryptedLocalBox,
+            key: Union[BaseKey, MainKey],
+            crypto: Optional[CryptoContext] = None):
         """
         Arguments:
             elb (``EncryptedLocalBox``):
@@ -598,6 +1010,10 @@ class DecryptedLocalBox(EncryptedLocalBox):
                 with *RemoteBox*, however, you can specify
                 ``MainKey`` if you only want to iterate
                 over local files / fetch basic local info.
+
+            crypto (``CryptoContext``, optional):
+                ``CryptoContext`` of this Box. Will be
+                created new if not specified.
         """
         if not elb.initialized:
             raise NotInitializedError('Parent class isn\'t initialized.')
@@ -629,16 +1045,23 @@ class DecryptedLocalBox(EncryptedLocalBox):
         else:
             raise IncorrectKey('key is not Union[BaseKey, MainKey]')
 
+        if crypto and crypto.suits(self._mainkey):
+            self._crypto = crypto
+        else:
+            self._crypto = CryptoContext(self._mainkey)
+
+        self._blind_index = BlindIndex(self._mainkey)
+
         self._box_channel_id = bytes_to_int(
-            AES(self._mainkey).decrypt(elb._box_channel_id)
+            self._crypto.aes().decrypt(elb._box_channel_id)
         )
         self._box_cr_time = bytes_to_int(
-            AES(self._mainkey).decrypt(elb._box_cr_time)
+            self._crypto.aes().decrypt(elb._box_cr_time)
         )
         self._api_id = bytes_to_int(
-            AES(self._mainkey).decrypt(elb._api_id)
+            self._crypto.aes().decrypt(elb._api_id)
         )
-        self._api_hash = AES(self._mainkey).decrypt(elb._api_hash).hex()
+        self._api_hash = self._crypto.aes().decrypt(elb._api_hash).hex()
         self._box_salt = elb._box_salt
 
     @staticmethod
@@ -653,6 +1076,12 @@ class DecryptedLocalBox(EncryptedLocalBox):
             """This function was inherited from ``EncryptedLocalBox`` """
             """and cannot be used on ``DecryptedLocalBox``."""
         )
+    @staticmethod
+    async def unlock() -> NoReturn:
+        raise AttributeError(
+            """This function was inherited from ``EncryptedLocalBox`` """
+            """and cannot be used on ``DecryptedLocalBox``."""
+        )
     async def _make_local_path(self, file_path: Path) -> 'DecryptedLocalBoxDirectory':
         """
         Creates abstract LocalBoxDirectory, and returns
@@ -664,20 +1093,22 @@ class DecryptedLocalBox(EncryptedLocalBox):
         """
         ppidg = ppart_id_generator(file_path, self._mainkey)
 
-        for part, parent_part_id, part_id in ppidg:
-            if not parent_part_id:
-                parent_part_id = None
+        async with self._tgbox_db.transaction():
+            for part, parent_part_id, part_id in ppidg:
+                if not parent_part_id:
+                    parent_part_id = None
 
-            cursor = await self._tgbox_db.PATH_PARTS.execute((
-                'SELECT PART_ID FROM PATH_PARTS WHERE PART_ID=?', (part_id,))
-            )
-            if not await cursor.fetchone():
-                await self._tgbox_db.PATH_PARTS.insert(
-                    AES(self._mainkey).encrypt(part.encode()),
-                    part_id, parent_part_id
+                cursor = await self._tgbox_db.PATH_PARTS.execute((
+                    'SELECT PART_ID FROM PATH_PARTS WHERE PART_ID=?', (part_id,))
                 )
+                if not await cursor.fetchone():
+                    await self._tgbox_db.PATH_PARTS.insert(
+                        self._crypto.aes().encrypt(part.encode()),
+                        part_id, parent_part_id
+                    )
+                    await self._add_to_closure([(part_id, parent_part_id)])
         elbd = EncryptedLocalBoxDirectory(self._tgbox_db, part_id)
-        return await elbd.decrypt(self._mainkey)
+        return await elbd.decrypt(self._mainkey, dlb=self)
 
     async def _make_local_file(self, pf: 'PreparedFile') -> 'DecryptedLocalBoxFile':
         """
@@ -699,26 +1130,182 @@ class DecryptedLocalBox(EncryptedLocalBox):
         else:
             raise AlreadyImported('There is already file with same ID') from None
 
+        async with self._tgbox_db.transaction():
+            part_id = (await self._make_local_path(pf.filepath)).part_id
+            await self._tgbox_db.FILES.insert(*self.__make_file_row(pf, part_id))
+            await self._index_files([pf.file_id])
+
+        return await EncryptedLocalBoxFile(
+            pf.file_id, self._tgbox_db,
+            defaults=self._defaults).decrypt(pf.filekey)
+
+    async def _make_local_files(self, pfs: List['PreparedFile']) -> None:
+        """
+        Creates many LocalBoxFiles at once. Unlike the
+        ``_make_local_file``, makes a constant amount of
+        queries, but doesn't return created files.
+
+        Arguments:
+            pfs (``List[PreparedFile]``):
+                Pushed to RemoteBox ``PreparedFile``s.
+        """
+        for pf in pfs:
+            assert hasattr(pf,'file_id'), 'Push to RemoteBox firstly'
+            assert hasattr(pf,'upload_time'), 'Push to RemoteBox firstly'
+
+        path_parts, files = {}, []
+        for pf in pfs:
+            ppidg = ppart_id_generator(pf.filepath, self._mainkey)
+            for part, parent_part_id, part_id in ppidg:
+                path_parts.setdefault(part_id, (part, parent_part_id or None))
+
+            files.append(self.__make_file_row(pf, part_id))
+
+        # Checks are made inside of transaction, so other
+        # task can't insert the same PATH_PARTS after them
+        async with self._tgbox_db.transaction():
+            if await self._tgbox_db.FILES.exists_many('ID', (pf.file_id for pf in pfs)):
+                raise AlreadyImported('There is already file with same ID')
+
+            existing = await self._tgbox_db.PATH_PARTS.exists_many('PART_ID', path_parts)
+            path_parts = [
+                (self._crypto.aes().encrypt(part.encode()), part_id, parent_part_id)
+                for part_id, (part, parent_part_id) in path_parts.items()
+                if part_id not in existing
+            ]
+            await self._tgbox_db.PATH_PARTS.insert_many(path_parts)
+            await self._add_to_closure([i[1:] for i in path_parts])
+            await self._tgbox_db.FILES.insert_many(files)
+            await self._index_files([pf.file_id for pf in pfs])
+
+    async def _index_files(
+            self, ids: List[int],
+            search_index: Optional[bool] = None,
+            search_fts: Optional[bool] = None) -> None:
+        """
+        Will replace blind index tokens, TEMP FTS rows and
+        ``FileColumns`` of files with ``ids``. By default,
+        only enabled (or built) indexes are updated.
+
+        Arguments:
+            ids (``List[int]``):
+                IDs of files to index.
+
+            search_index (``bool``, optional):
+                Update the blind index.
+
+            search_fts (``bool``, optional):
+                Update the TEMP ``SEARCH_FTS`` table.
+        """
+        if search_index is None:
+            search_index = await _search_index_enabled(self._defaults)
+
+        if search_fts is None:
+            search_fts = hasattr(self._tgbox_db, 'SEARCH_FTS')
+
+        if not (search_index or search_fts
+                or self._tgbox_db.file_columns is not None):
+            return
+
+        async with self._tgbox_db.transaction():
+            for i in range(0, len(ids), SQLITE_MAX_VARIABLES):
+                chunk = ids[i:i+SQLITE_MAX_VARIABLES]
+
+                load_files = self._load_files(
+                    f'FILES.ID IN ({("?," * len(chunk))[:-1]})',
+                    tuple(chunk), cache_preview=False, lazy=True
+                )
+                files = [dlbf async for dlbf in load_files if dlbf is not None]
+
+                await _update_indexes(
+                    self._tgbox_db, self._crypto, self._blind_index,
+                    chunk, files, search_index, search_fts
+                )
+
+    async def enable_search_index(self, batch_size: int=1000) -> None:
+        """
+        Will build the blind index of all files and enable
+        it, so ``search_file`` will decrypt only files that
+        may match the ``SearchFilter``, not every file. New,
+        imported and updated files will be indexed too.
+
+        Index stores only keyed tokens of file name, mime,
+        size and upload time, see ``tgbox.tools.BlindIndex``.
+
+        Arguments:
+            batch_size (``int``, optional):
+                Amount of files indexed per one DB commit.
+        """
+        if isinstance(self._defaults, DefaultsTableWrapper)\
+            and not self._defaults.initialized:
+                await self._defaults.init()
+
+        async with self._tgbox_db.transaction() as transaction:
+            await self._tgbox_db.SEARCH_INDEX.execute(
+                ('DELETE FROM SEARCH_INDEX', ()))
+
+            cursor = await self._tgbox_db.FILES.execute(('SELECT ID FROM FILES', ()))
+            ids = [row[0] for row in await cursor.fetchall()]
+
+            for i in range(0, len(ids), batch_size):
+                await self._index_files(ids[i:i+batch_size],
+                    search_index=True, search_fts=False)
+                await transaction.commit()
+
+            await self._defaults.change('SEARCH_INDEX', 1)
+
+    async def disable_search_index(self) -> None:
+        """
+        Will disable and remove the blind index.
+        See ``enable_search_index`` for details.
+        """
+        if not await _search_index_enabled(self._defaults):
+            return
+
+        async with self._tgbox_db.transaction():
+            await self._defaults.change('SEARCH_INDEX', 0)
+            await self._tgbox_db.SEARCH_INDEX.execute(
+                ('DELETE FROM SEARCH_INDEX', ()))
+
+    async def _add_to_closure(self, path_parts: List[tuple]) -> None:
+        """
+        Will add new path parts to the ``PATH_CLOSURE``.
+
+        Arguments:
+            path_parts (``List[tuple]``):
+                List of ``(part_id, parent_part_id)``. Parent
+                must be in ``PATH_CLOSURE`` or be before child.
+        """
+        await self._tgbox_db.PATH_CLOSURE.insert_many(
+            ((part_id, part_id, 0) for part_id, _ in path_parts),
+            commit=False
+        )
+        await self._tgbox_db.PATH_CLOSURE.insert_many(
+            ((part_id, parent_part_id) for part_id, parent_part_id
+                in path_parts if parent_part_id),
+            sql_statement = (
+                'INSERT INTO PATH_CLOSURE SELECT ANCESTOR, ?, DEPTH + 1 '
+                'FROM PATH_CLOSURE WHERE DESCENDANT = ?'
+            )
+        )
+
+    def __make_file_row(self, pf: 'PreparedFile', part_id: bytes) -> tuple:
+        """Returns ``FILES`` row of the ``pf``"""
         eupload_time = AES(pf.filekey).encrypt(int_to_bytes(pf.upload_time))
 
         if pf.imported:
-            if make_filekey(self._mainkey, pf.filesalt) == pf.filekey:
+            if self._crypto.filekey(pf.filesalt) == pf.filekey:
                 efilekey = None # We can make it with our MainKey
             else:
-                efilekey = AES(self._mainkey).encrypt(pf.filekey.key)
+                efilekey = self._crypto.aes().encrypt(pf.filekey.key)
         else:
             efilekey = None
 
-        part_id = (await self._make_local_path(pf.filepath)).part_id
-
-        await self._tgbox_db.FILES.insert(
+        return (
             pf.file_id, eupload_time,
             part_id, efilekey, pf.fingerprint,
             pf.metadata, None
         )
-        return await EncryptedLocalBoxFile(
-            pf.file_id, self._tgbox_db,
-            defaults=self._defaults).decrypt(pf.filekey)
 
     async def _check_fingerprint(self, fingerprint: bytes):
         """
@@ -742,12 +1329,64 @@ class DecryptedLocalBox(EncryptedLocalBox):
         else:
             raise FingerprintExists(FingerprintExists.__doc__) from None
 
-    # TODO: Delete PartID from PATH_PARTS if it links
-    # to only one file that was removed.
+    async def _remove_orphan_parts(self) -> int:
+        """
+        Will delete PATH_PARTS (and their PATH_CLOSURE rows)
+        that are not in the path of any file. Returns amount
+        of deleted PATH_PARTS. Should be called in transaction.
+        """
+        cursor = await self._tgbox_db.PATH_PARTS.execute((
+            'DELETE FROM PATH_PARTS WHERE PART_ID NOT IN ('
+            '  SELECT ANCESTOR FROM PATH_CLOSURE WHERE DESCENDANT IN'
+            '  (SELECT PPATH_HEAD FROM FILES))', ()
+        ))
+        # Rows of the removed ancestor are kept: PART_ID is made
+        # from the path, so they will be valid again when the
+        # directory is recreated, and subtree will be whole.
+        await self._tgbox_db.PATH_CLOSURE.execute((
+            'DELETE FROM PATH_CLOSURE WHERE DESCENDANT NOT IN '
+            '(SELECT PART_ID FROM PATH_PARTS)', ()
+        ))
+        return cursor.rowcount
+
+    async def gc(self, pages: Optional[int] = 1024) -> int:
+        """
+        Will remove directories that are not in the path of
+        any file (and blind index of removed files). They
+        are left after ``delete`` of files and folders, also
+        by the ``sync``. Then, will release up to ``pages``
+        free pages of the DB, see ``TgboxDB.vacuum``. Returns
+        amount of removed directories. Pages are not
+        released if called inside transaction.
+
+        Arguments:
+            pages (``int``, optional):
+                Maximum amount of DB pages to release,
+                ``None`` for all, ``0`` to not release.
+        """
+        async with self._tgbox_db.transaction():
+            removed = await self._remove_orphan_parts()
+            await self._tgbox_db.SEARCH_INDEX.execute((
+                'DELETE FROM SEARCH_INDEX WHERE ID NOT IN '
+                '(SELECT ID FROM FILES)', ()
+            ))
+            if hasattr(self._tgbox_db, 'SEARCH_FTS'):
+                await self._tgbox_db.SEARCH_FTS.execute((
+                    'DELETE FROM SEARCH_FTS WHERE rowid NOT IN '
+                    '(SELECT ID FROM FILES)', ()
+                ))
+            await _retain_file_columns(self._tgbox_db)
+
+        if not self._tgbox_db.in_transaction:
+            await self._tgbox_db.vacuum(pages)
+
+        return removed
+
     async def sync(
             self, drb: 'tgbox.api.remote.DecryptedRemoteBox',
             start_from: int=0,
-            progress_callback: Optional[Callable[[int, int], None]] = None):
+            progress_callback: Optional[Callable[[int, int], None]] = None,
+            batch_size: int=1000):
         """
         This method will synchronize your LocalBox
         with RemoteBox. All files that not in RemoteBox
@@ -763,7 +1402,40 @@ class DecryptedLocalBox(EncryptedLocalBox):
         progress_callback (``Callable[[int, int], None]``, optional):
             A callback function accepting
             two parameters: (last_id, current_id).
+
+        batch_size (``int``, optional):
+            Amount of imported or removed files per one
+            DB transaction, it is commited between them.
         """
+        async with self._tgbox_db.batches(batch_size) as batches:
+            await self.__sync(drb, start_from, progress_callback, batches)
+
+        async with self._tgbox_db.transaction():
+            # Removed files may leave PATH_PARTS unused
+            await self._remove_orphan_parts()
+
+            if hasattr(self._tgbox_db, 'SEARCH_FTS'):
+                await self._tgbox_db.SEARCH_FTS.execute((
+                    'DELETE FROM SEARCH_FTS WHERE rowid NOT IN '
+                    '(SELECT ID FROM FILES)', ()
+                ))
+            await _retain_file_columns(self._tgbox_db)
+
+    async def __sync(
+            self, drb: 'tgbox.api.remote.DecryptedRemoteBox',
+            start_from: int,
+            progress_callback: Optional[Callable[[int, int], None]],
+            batches: 'tgbox.api.db._Batches'):
+        """The ``sync`` with writes made in the ``batches``."""
+
+        async def write(function, *args, **kwargs):
+            await batches.begin()
+            await function(*args, **kwargs)
+            await batches.step()
+
+        async def import_file(drbf):
+            await write(self.import_file, drbf)
+
         async def _get_file(n=start_from):
             iter_over = drb.files(
                 min_id=n, reverse=True,
@@ -800,7 +1472,7 @@ class DecryptedLocalBox(EncryptedLocalBox):
 
                 if rbfiles[0] is None:
                     # RemoteBox doesn't have any files
-                    await self._tgbox_db.FILES.execute(
+                    await write(self._tgbox_db.FILES.execute,
                         sql_tuple=('DELETE FROM FILES', ()))
                     break
 
@@ -811,9 +1483,8 @@ class DecryptedLocalBox(EncryptedLocalBox):
                     'DELETE FROM FILES WHERE ID < ?',
                     (last_id,)
                 )
-                await self._tgbox_db.FILES.execute(
-                    sql_tuple=sql_tuple
-                )
+                await write(self._tgbox_db.FILES.execute,
+                    sql_tuple=sql_tuple)
             else:
                 rbfiles.append(await _get_file(rbfiles[1].id))
                 if None in rbfiles: break
@@ -844,7 +1515,7 @@ class DecryptedLocalBox(EncryptedLocalBox):
                 if lbfi_id or 'Encrypted' in repr(rbfiles[current]):
                     current += 1
                 else:
-                    await self.import_file(rbfiles[current])
+                    await import_file(rbfiles[current])
 
                     if current == 0:
                         rbfiles[0] = rbfiles[1]
@@ -857,7 +1528,7 @@ class DecryptedLocalBox(EncryptedLocalBox):
                     if rbfiles[0] and not rbfiles[1]:
                         if current == 0:
                             try:
-                                await self.import_file(rbfiles[current])
+                                await import_file(rbfiles[current])
                             except AlreadyImported:
                                 pass # Last file may be already in Box, so skip
 
@@ -871,7 +1542,7 @@ class DecryptedLocalBox(EncryptedLocalBox):
                 (last_id, rbfiles[0].id)
             )
             if difference(sql_tuple[1]):
-                await self._tgbox_db.FILES.execute(sql_tuple=sql_tuple)
+                await write(self._tgbox_db.FILES.execute, sql_tuple=sql_tuple)
 
             last_id = rbfiles[1].id if rbfiles[1] else None
 
@@ -881,13 +1552,13 @@ class DecryptedLocalBox(EncryptedLocalBox):
                     (rbfiles[0].id, rbfiles[1].id)
                 )
                 if difference(sql_tuple[1]):
-                    await self._tgbox_db.FILES.execute(sql_tuple=sql_tuple)
+                    await write(self._tgbox_db.FILES.execute, sql_tuple=sql_tuple)
             else:
                 sql_tuple = (
                     'DELETE FROM FILES WHERE ID = ?',
                     (rbfiles[0].id,)
                 )
-                await self._tgbox_db.FILES.execute(sql_tuple=sql_tuple)
+                await write(self._tgbox_db.FILES.execute, sql_tuple=sql_tuple)
                 break
 
     async def replace_session(
@@ -920,7 +1591,9 @@ class DecryptedLocalBox(EncryptedLocalBox):
 
     async def search_file(
             self, sf: SearchFilter,
-            cache_preview: bool=True) -> AsyncGenerator[
+            cache_preview: bool=True,
+            fts: bool=False,
+            columns: bool=False) -> AsyncGenerator[
                 'DecryptedLocalBoxFile', None
             ]:
         """
@@ -932,11 +1605,330 @@ class DecryptedLocalBox(EncryptedLocalBox):
 
             cache_preview (``bool``, optional):
                 Will cache preview in file object if ``True``.
-        """
+
+            fts (``bool``, optional):
+                If ``True``, ``file_name``, ``file_path`` and
+                ``cattrs`` (keys) filters will be checked in the
+                in-memory FTS5 table of decrypted names, paths
+                and cattrs keys. It's built on the first search
+                with ``fts`` (all files are decrypted once) and
+                lives (and updated) until DB is closed. Ignored
+                if SQLite is built without FTS5 (or < 3.34).
+
+            columns (``bool``, optional):
+                If ``True``, ``FileColumns.FILTERS`` (IDs, sizes,
+                upload times, mime and imported) will be checked
+                over the ``FileColumns`` (see ``get_file_columns``),
+                so only matching files are loaded and decrypted.
+
+        .. tip::
+            Enable blind index with ``enable_search_index``,
+            so only files that may match will be decrypted.
+        """
+        ids, it_messages = None, None
+
+        where, params, residual = self.__plan_search(
+            sf, await _search_index_enabled(self._defaults))
+
+        if fts and (hasattr(self._tgbox_db, 'SEARCH_FTS') or await self.__build_search_fts()):
+            search_fts_query = self.__search_fts_query(sf)
+            if search_fts_query:
+                cursor = await self._tgbox_db.SEARCH_FTS.execute(search_fts_query)
+                ids = [row[0] for row in await cursor.fetchall()]
+
+        if columns:
+            columns_ids = (await self.get_file_columns()).select(sf)
+            ids = columns_ids if ids is None else \
+                sorted(set(ids).intersection(columns_ids))
+
+        if ids is not None:
+            it_messages = self.__load_ids(
+                ids, where, params, cache_preview=cache_preview)
+
+        elif where:
+            it_messages = self._load_files(
+                where, params, cache_preview=cache_preview)
+
         async for file in search_generator(
-                sf, lb=self, cache_preview=cache_preview):
+                residual, it_messages=it_messages,
+                lb=self, cache_preview=cache_preview):
                     yield file
 
+    def __plan_search(
+            self, sf: SearchFilter,
+            search_index: bool) -> Tuple[str, tuple, SearchFilter]:
+        """
+        Returns ``FILES`` SQL condition with its params for
+        the ``sf`` and the residual ``SearchFilter``, that
+        should be checked on the loaded files. Filters are
+        removed from the residual only if SQL is exact.
+
+        * ``min_id``, ``max_id`` and ``id`` are matched by ``FILES.ID``;
+        * ``imported`` is matched by the ``FILES.FILEKEY``;
+        * ``directory`` is matched by the ``FILES.PPATH_HEAD``, \
+          descendants of its PartID in the ``PATH_CLOSURE``;
+        * ``UPLOAD_TIME`` is encrypted, so times (with sizes, names \
+          and mimes) are only narrowed by the blind index, if enabled.
+        """
+        residual, where, params = deepcopy(sf), [], []
+
+        # Half is left for candidates, see __load_ids
+        max_params = SQLITE_MAX_VARIABLES // 2
+
+        def push(condition, condition_params=(), filter=None, name=None):
+            if len(params) + len(condition_params) > max_params:
+                return # Will be checked by the residual
+
+            where.append(condition)
+            params.extend(condition_params)
+
+            if filter is not None:
+                filter[name].clear()
+
+        filters = (
+            (False, sf.in_filters, residual.in_filters),
+            (True, sf.ex_filters, residual.ex_filters)
+        )
+        for exclude, filter, residual_filter in filters:
+            # Included min_id & max_id are exclusive, as in
+            # files(), but excluded are inclusive (see SearchFilter)
+            if filter['min_id']:
+                push('FILES.ID < ?' if exclude else 'FILES.ID > ?',
+                    (filter['min_id'][-1],), residual_filter, 'min_id')
+
+            if filter['max_id']:
+                push('FILES.ID > ?' if exclude else 'FILES.ID < ?',
+                    (filter['max_id'][-1],), residual_filter, 'max_id')
+
+            if filter['imported']:
+                push('ifnull(length(FILES.FILEKEY), 0) = 0' if exclude
+                    else 'length(FILES.FILEKEY) > 0', (), residual_filter, 'imported')
+
+            if filter['directory']:
+                directories = [Path(directory) for directory in filter['directory']]
+                part_ids = [
+                    list(ppart_id_generator(directory, self._mainkey))[-1][2]
+                    for directory in directories if directory.parts
+                ]
+                if len(part_ids) == len(directories):
+                    push(
+                        f'FILES.PPATH_HEAD {"NOT IN" if exclude else "IN"} ('
+                        '  SELECT DESCENDANT FROM PATH_CLOSURE WHERE ANCESTOR'
+                        f' IN ({("?," * len(part_ids))[:-1]}))',
+                        part_ids, residual_filter, 'directory'
+                    )
+
+        for exclude, filter, residual_filter in filters:
+            if filter['id']:
+                ids = list(set(filter['id']))
+                push(
+                    f'FILES.ID {"NOT IN" if exclude else "IN"} '
+                    f'({("?," * len(ids))[:-1]})', ids, residual_filter, 'id'
+                )
+
+        if search_index:
+            search_index_query = self.__search_index_query(sf)
+            if search_index_query:
+                push(*search_index_query)
+
+        return ' AND '.join(where), tuple(params), residual
+
+    async def __load_ids(
+            self, ids: List[int], where: str = '', params: tuple = (),
+            cache_preview: bool=True, ordered: bool=False) -> AsyncGenerator[
+                'DecryptedLocalBoxFile', None
+            ]:
+        """
+        Will yield files with ``ids`` that match the ``where``
+        (see ``_load_files``). Files are ordered by ID in the
+        chunks of ``ids``, or as ``ids`` if ``ordered``.
+        """
+        # Ordered chunk is kept in memory, so it's smaller
+        chunk_size = 100 if ordered else SQLITE_MAX_VARIABLES - len(params)
+
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i:i+chunk_size]
+            ids_where = f'FILES.ID IN ({("?," * len(chunk))[:-1]})'
+
+            load_files = self._load_files(
+                f'({where}) AND {ids_where}' if where else ids_where,
+                (*params, *chunk), cache_preview=cache_preview
+            )
+            if not ordered:
+                async for file in load_files:
+                    yield file
+                continue
+
+            files = {
+                file.id: file async for file in load_files
+                if file is not None
+            }
+            for id in chunk:
+                if id in files:
+                    yield files[id]
+
+    async def get_file_columns(self) -> FileColumns:
+        """
+        Returns ``FileColumns`` of this LocalBox. It's built
+        on the first call (all files are decrypted once) and
+        lives (and updated) until DB is closed. Use it for
+        aggregates, e.g ``total_size(by='mime')``.
+        """
+        if self._tgbox_db.file_columns is None:
+            file_columns = FileColumns()
+
+            # Writers will wait, so no changes will be missed
+            async with self._tgbox_db.transaction():
+                load_files = self._load_files(
+                    cache_preview=False, lazy=True, page_size=1000)
+
+                async for dlbf in load_files:
+                    if dlbf is not None:
+                        _update_file_columns(file_columns, dlbf)
+
+                self._tgbox_db.file_columns = file_columns
+
+        return self._tgbox_db.file_columns
+
+    async def sorted_files(
+            self, by: str='id', reverse: bool=False,
+            sf: Optional[SearchFilter] = None,
+            cache_preview: bool=True) -> AsyncGenerator[
+                'DecryptedLocalBoxFile', None
+            ]:
+        """
+        Yields files sorted by ``by`` with the ``FileColumns``
+        (see ``get_file_columns``). Only yielded files
+        are loaded and decrypted.
+
+        Arguments:
+            by (``str``, optional):
+                ``'id'``, ``'size'`` or ``'upload_time'``.
+
+            reverse (``bool``, optional):
+                Sort in descending order.
+
+            sf (``SearchFilter``, optional):
+                Will yield only files that match it.
+
+            cache_preview (``bool``, optional):
+                Will cache preview in file object if ``True``.
+        """
+        file_columns = await self.get_file_columns()
+
+        it_messages = self.__load_ids(
+            file_columns.sorted_ids(by, reverse, sf),
+            cache_preview=cache_preview, ordered=True
+        )
+        if sf is None:
+            async for file in it_messages:
+                yield file
+        else:
+            async for file in search_generator(
+                    sf, it_messages=it_messages,
+                    lb=self, cache_preview=cache_preview):
+                        yield file
+
+    def __search_index_query(self, sf: SearchFilter) -> Union[Tuple[str, tuple], None]:
+        """
+        Returns ``FILES`` SQL condition and its params that
+        selects candidates of ``sf`` from the blind index or
+        ``None`` if ``sf`` can't be narrowed with it.
+        """
+        selects, params = [], []
+
+        for condition in self._blind_index.filter_tokens(sf):
+            alternatives = []
+            for tokens, required in condition:
+                alternatives.append(
+                    'SELECT ID FROM SEARCH_INDEX WHERE TOKEN IN '
+                    f'({("?," * len(tokens))[:-1]}) GROUP BY ID '
+                    'HAVING count(DISTINCT TOKEN) >= ?'
+                )
+                params.extend((*tokens, required))
+
+            if not alternatives: # Nothing can match
+                alternatives.append('SELECT ID FROM SEARCH_INDEX WHERE 0')
+
+            selects.append(f'SELECT ID FROM ({" UNION ".join(alternatives)})')
+
+        if not selects:
+            return None
+
+        params.append(BlindIndex.NOT_INDEXED)
+        where = (
+            f'FILES.ID IN ({" INTERSECT ".join(selects)}) OR FILES.ID IN '
+            '(SELECT ID FROM SEARCH_INDEX WHERE TOKEN = ?)'
+        )
+        return f'({where})', tuple(params)
+
+    async def __build_search_fts(self) -> bool:
+        """
+        Will create and fill the TEMP ``SEARCH_FTS`` table.
+        Returns ``False`` if SQLite doesn't support it.
+        """
+        try:
+            await self._tgbox_db.create_temp_table('SEARCH_FTS',
+                'USING fts5(FILE_NAME, FILE_PATH, CATTRS, '
+                'tokenize="trigram case_sensitive 1")'
+            )
+        except OperationalError: # No FTS5 or trigram tokenizer
+            return False
+
+        try:
+            async with self._tgbox_db.transaction():
+                cursor = await self._tgbox_db.FILES.execute(('SELECT ID FROM FILES', ()))
+                ids = [row[0] for row in await cursor.fetchall()]
+
+                for i in range(0, len(ids), 1000):
+                    await self._index_files(ids[i:i+1000],
+                        search_index=False, search_fts=True)
+        except:
+            await self._tgbox_db.drop_temp_table('SEARCH_FTS')
+            raise
+
+        return True
+
+    def __search_fts_query(self, sf: SearchFilter) -> Union[Tuple[str, tuple], None]:
+        """
+        Returns SQL query that selects IDs of files that match
+        **include** string filters of the ``sf`` from the TEMP
+        ``SEARCH_FTS`` or ``None`` if there are no such filters.
+        """
+        filters, where, params = sf.in_filters, [], []
+
+        if filters['re']:
+            return None
+
+        def glob(value: str) -> str:
+            """Substring GLOB pattern of the ``value``"""
+            return '*' + ''.join(f'[{c}]' if c in '*?[' else c for c in value) + '*'
+
+        for column, filter in (('FILE_NAME', 'file_name'), ('FILE_PATH', 'file_path')):
+            if filters[filter]:
+                where.append(' OR '.join(f'{column} GLOB ?' for _ in filters[filter]))
+                params.extend(glob(str(value)) for value in filters[filter])
+
+        # File should have any key of every cattrs dict
+        for cattrs in filters['cattrs']:
+            if cattrs:
+                where.append(' OR '.join('CATTRS GLOB ?' for _ in cattrs))
+                params.extend(
+                    glob('\n' + (k.decode() if isinstance(k, bytes) else k) + '\n')
+                    for k in cattrs
+                )
+        if not where or len(params) > SQLITE_MAX_VARIABLES - 2:
+            return None
+
+        if filters['min_id']:
+            where.append('rowid > ?'); params.append(filters['min_id'][-1])
+
+        if filters['max_id']:
+            where.append('rowid < ?'); params.append(filters['max_id'][-1])
+
+        where = ' AND '.join(f'({i})' for i in where)
+        return f'SELECT rowid FROM SEARCH_FTS WHERE {where} ORDER BY rowid', tuple(params)
+
     async def prepare_file(
             self, file: Union[BinaryIO, bytes, Document, Photo],
             file_size: Optional[int] = None,
@@ -1094,7 +2086,7 @@ class DecryptedLocalBox(EncryptedLocalBox):
 
         # We should always encrypt FILE_PATH with MainKey.
         file_path_no_name = str(file_path.parent).encode()
-        efile_path = AES(self._mainkey).encrypt(file_path_no_name)
+        efile_path = self._crypto.aes().encrypt(file_path_no_name)
 
         cattrs = PackedAttributes.pack(**cattrs) if cattrs else b''
 
@@ -1165,6 +2157,34 @@ class DecryptedLocalBox(EncryptedLocalBox):
                 ``set_file_path`` method before importing
                 file, so you don't need to specify it here.
         """
+        pf = await self._prepare_import(drbf, file_path)
+        return await self._make_local_file(pf)
+
+    async def import_files(
+            self, drbfs: Iterable['tgbox.api.remote.DecryptedRemoteBoxFile']) -> None:
+        """
+        Imports many files to your ``DecryptedLocalBox`` at
+        once. This is much faster than ``import_file`` per
+        file, but imported files are not returned. File
+        paths are taken as in ``import_file`` without
+        ``file_path``. If any of files is already
+        imported, nothing will be imported.
+
+        Arguments:
+            drbfs (``Iterable[DecryptedRemoteBoxFile]``):
+                Remote files you want to import.
+        """
+        pfs = [await self._prepare_import(drbf) for drbf in drbfs]
+        if pfs:
+            await self._make_local_files(pfs)
+
+    async def _prepare_import(
+            self, drbf: 'tgbox.api.remote.DecryptedRemoteBoxFile',
+            file_path: Optional[Union[str, Path]] = None) -> 'PreparedFile':
+        """
+        Returns ``PreparedFile`` for import of the ``drbf``.
+        See ``import_file`` for arguments details.
+        """
         # We need to fetch encrypted metadata
         if not drbf._erbf._initialized:
             await drbf._erbf.init()
@@ -1194,7 +2214,7 @@ class DecryptedLocalBox(EncryptedLocalBox):
         pf.set_file_id(drbf._id)
         pf.set_upload_time(drbf._upload_time)
 
-        return await self._make_local_file(pf)
+        return pf
 
     def get_sharekey(self, reqkey: Optional[RequestKey] = None) -> ShareKey:
         """
@@ -1346,13 +2366,30 @@ class EncryptedLocalBoxDirectory:
             'SELECT * FROM PATH_PARTS WHERE PART_ID=?',
             (self._part_id,)
         ))
+        if not self._lb.initialized:
+            await self._lb.init()
+
+        return self._init_from_row(folder_row, self._lb)
+
+    def _init_from_row(
+            self, folder_row: tuple,
+            elb: 'EncryptedLocalBox') -> 'EncryptedLocalBoxDirectory':
+        """
+        Will initialize directory from the already
+        fetched ``PATH_PARTS`` row, without queries.
+
+        Arguments:
+            folder_row (``tuple``):
+                ``PATH_PARTS`` row of this directory.
+
+            elb (``EncryptedLocalBox``):
+                Initialized ``EncryptedLocalBox`` of it.
+        """
         self._part = folder_row[0]
         self._part_id = folder_row[1]
         self._parent_part_id = folder_row[2]
 
-        if not self._lb.initialized:
-            await self._lb.init()
-
+        self._lb = elb
         self._initialized = True
         return self
 
@@ -1369,24 +2406,42 @@ class EncryptedLocalBoxDirectory:
         """
         self.__raise_initialized()
 
-        for _ in range(256**8 if full else 1):
-            previous_part = await self._tgbox_db.PATH_PARTS.select_once((
-                'SELECT PARENT_PART_ID FROM PATH_PARTS WHERE PART_ID=?',
+        if full:
+            # All ancestors from the PATH_CLOSURE, root first
+            ancestors = await self._tgbox_db.PATH_PARTS.execute((
+                'SELECT PATH_PARTS.* FROM PATH_CLOSURE '
+                'JOIN PATH_PARTS ON PATH_PARTS.rowid = ('
+                '  SELECT rowid FROM PATH_PARTS '
+                '  WHERE PART_ID = PATH_CLOSURE.ANCESTOR LIMIT 1'
+                ') WHERE PATH_CLOSURE.DESCENDANT = ? '
+                'AND PATH_CLOSURE.DEPTH > 0 ORDER BY PATH_CLOSURE.DEPTH DESC',
                 (self.parts[0].part_id,)
             ))
-            if not previous_part[0]:
-                self._floaded = True
-                return
+            ancestors = [
+                self._directory_from_row(folder_row)
+                for folder_row in await ancestors.fetchall()
+            ]
+            self.parts[0:0] = ancestors
+            self._floaded = True
+            return
 
-            if isinstance(self._lb, DecryptedLocalBox):
-                previous_part = await EncryptedLocalBoxDirectory(
-                    self._tgbox_db, previous_part[0]).decrypt(self._lb._mainkey)
-            else:
-                previous_part = await EncryptedLocalBoxDirectory(
-                    self._tgbox_db, previous_part[0]).init()
+        previous_part = await self._tgbox_db.PATH_PARTS.select_once((
+            'SELECT PARENT_PART_ID FROM PATH_PARTS WHERE PART_ID=?',
+            (self.parts[0].part_id,)
+        ))
+        if not previous_part[0]:
+            self._floaded = True
+            return
 
-            self.parts.insert(0, previous_part)
+        if isinstance(self._lb, DecryptedLocalBox):
+            previous_part = await EncryptedLocalBoxDirectory(
+                self._tgbox_db, previous_part[0]).decrypt(
+                    self._lb._mainkey, dlb=self._lb)
+        else:
+            previous_part = await EncryptedLocalBoxDirectory(
+                self._tgbox_db, previous_part[0]).init()
 
+        self.parts.insert(0, previous_part)
         return previous_part
 
     async def iterdir(
@@ -1438,22 +2493,53 @@ class EncryptedLocalBoxDirectory:
                 'SELECT * FROM PATH_PARTS WHERE PARENT_PART_ID IS ?',
                 (part_id,)
             ))
-            async for folder_row in folders:
-                if isinstance(self._lb, DecryptedLocalBox):
-                    yield await EncryptedLocalBoxDirectory(self._tgbox_db,
-                        folder_row[1]).decrypt(self._lb._mainkey)
-                else:
-                    yield await EncryptedLocalBoxDirectory(self._tgbox_db,
-                        folder_row[1]).init()
+            for folder_row in await folders.fetchall():
+                yield self._directory_from_row(folder_row)
 
         if not ignore_files:
-            files = await self._tgbox_db.FILES.execute((
-                'SELECT * FROM FILES WHERE PPATH_HEAD IS ?',
-                (part_id,)
-            ))
-            async for file_row in files:
-                yield await self._lb.get_file(
-                    file_row[0], cache_preview=cache_preview)
+            files = self._lb._load_files(
+                'FILES.PPATH_HEAD IS ?', (part_id,),
+                cache_preview=cache_preview
+            )
+            async for file in files:
+                yield file
+
+    async def descendants(
+            self, max_depth: Optional[int] = None) -> AsyncGenerator[Union[
+                'EncryptedLocalBoxDirectory',
+                'DecryptedLocalBoxDirectory'], None
+            ]:
+        """
+        Will yield all subdirectories of this directory
+        (recursively) in one query, nearest first.
+
+        Arguments:
+            max_depth (``int``, optional):
+                Max depth of subdirectory, 1 for only
+                direct children. All if not specified.
+        """
+        max_depth = -1 if max_depth is None else max_depth
+
+        descendants = await self._tgbox_db.PATH_PARTS.execute((
+            'SELECT PATH_PARTS.* FROM PATH_CLOSURE '
+            'JOIN PATH_PARTS ON PATH_PARTS.rowid = ('
+            '  SELECT rowid FROM PATH_PARTS '
+            '  WHERE PART_ID = PATH_CLOSURE.DESCENDANT LIMIT 1'
+            ') WHERE PATH_CLOSURE.ANCESTOR = ? AND PATH_CLOSURE.DEPTH > 0 '
+            'AND (? < 0 OR PATH_CLOSURE.DEPTH <= ?) ORDER BY PATH_CLOSURE.DEPTH',
+            (self._part_id, max_depth, max_depth)
+        ))
+        for folder_row in await descendants.fetchall():
+            yield self._directory_from_row(folder_row)
+
+    def _directory_from_row(self, folder_row: tuple) -> Union[
+            'EncryptedLocalBoxDirectory',
+            'DecryptedLocalBoxDirectory']:
+        """
+        Returns other directory of this Box, made
+        from its ``PATH_PARTS`` row without queries.
+        """
+        return self._lb._directory_from_row(folder_row)
 
     async def get_files_total(self) -> int:
         """Will return a total number of files in this directory"""
@@ -1484,21 +2570,61 @@ class EncryptedLocalBoxDirectory:
         All files will stay in ``RemoteBox``, so you can restore
         all your folders by importing files.
         """
-        await self._tgbox_db.FILES.execute(
-            ('DELETE FROM FILES WHERE PPATH_HEAD=?',(self._part_id,))
-        )
-        await self._tgbox_db.PATH_PARTS.execute(
-            ('DELETE FROM PATH_PARTS WHERE PART_ID=?',(self._part_id,))
-        )
-    async def decrypt(self, key: Union[BaseKey, MainKey]):
-        """Decrypt self and return ``DecryptedLocalBoxDirectory``"""
+        async with self._tgbox_db.transaction():
+            await self._tgbox_db.SEARCH_INDEX.execute((
+                'DELETE FROM SEARCH_INDEX WHERE ID IN '
+                '(SELECT ID FROM FILES WHERE PPATH_HEAD=?)',
+                (self._part_id,)
+            ))
+            if hasattr(self._tgbox_db, 'SEARCH_FTS'):
+                await self._tgbox_db.SEARCH_FTS.execute((
+                    'DELETE FROM SEARCH_FTS WHERE rowid IN '
+                    '(SELECT ID FROM FILES WHERE PPATH_HEAD=?)',
+                    (self._part_id,)
+                ))
+            if self._tgbox_db.file_columns is not None:
+                cursor = await self._tgbox_db.FILES.execute((
+                    'SELECT ID FROM FILES WHERE PPATH_HEAD=?',
+                    (self._part_id,)
+                ))
+                self._tgbox_db.file_columns.remove(
+                    row[0] for row in await cursor.fetchall())
+
+            await self._tgbox_db.FILES.execute(
+                ('DELETE FROM FILES WHERE PPATH_HEAD=?',(self._part_id,))
+            )
+            await self._tgbox_db.PATH_PARTS.execute(
+                ('DELETE FROM PATH_PARTS WHERE PART_ID=?',(self._part_id,))
+            )
+            await self._tgbox_db.PATH_CLOSURE.execute(
+                ('DELETE FROM PATH_CLOSURE WHERE DESCENDANT=?',(self._part_id,))
+            )
+    async def decrypt(
+            self, key: Union[BaseKey, MainKey],
+            crypto: Optional[CryptoContext] = None,
+            dlb: Optional[DecryptedLocalBox] = None):
+        """
+        Decrypt self and return ``DecryptedLocalBoxDirectory``
+
+        Arguments:
+            key (``BaseKey``, ``MainKey``):
+                Decryption ``Key``.
+
+            crypto (``CryptoContext``, optional):
+                ``CryptoContext`` of Box to reuse.
+
+            dlb (``DecryptedLocalBox``, optional):
+                Decrypted Box of this directory to reuse.
+        """
         if not self._initialized: await self.init()
-        return DecryptedLocalBoxDirectory(self, key)
+        return DecryptedLocalBoxDirectory(self, key, crypto=crypto, dlb=dlb)
 
 class DecryptedLocalBoxDirectory(EncryptedLocalBoxDirectory):
     def __init__(
             self, elbd: EncryptedLocalBoxDirectory,
-            key: Union[BaseKey, MainKey]):
+            key: Union[BaseKey, MainKey],
+            crypto: Optional[CryptoContext] = None,
+            dlb: Optional[DecryptedLocalBox] = None):
         """
         Arguments:
             elbd (``EncryptedLocalBoxDirectory``):
@@ -1506,14 +2632,26 @@ class DecryptedLocalBoxDirectory(EncryptedLocalBoxDirectory):
 
             key (``BaseKey``, ``MainKey``):
                 Decryption ``Key``.
+
+            crypto (``CryptoContext``, optional):
+                ``CryptoContext`` of Box to reuse.
+
+            dlb (``DecryptedLocalBox``, optional):
+                Decrypted Box of this directory to reuse,
+                ``key`` and ``crypto`` are ignored then.
+                Will be made from the ``elbd`` if not
+                specified.
         """
         super().__init__(elbd._tgbox_db, elbd._part_id)
 
         self._initialized = True
         self._elbd = elbd
 
-        self._lb = DecryptedLocalBox(elbd._lb, key)
-        self._part = AES(self._lb._mainkey).decrypt(elbd._part)
+        if dlb is None:
+            dlb = DecryptedLocalBox(elbd._lb, key, crypto=crypto)
+
+        self._lb = dlb
+        self._part = self._lb._crypto.aes().decrypt(elbd._part)
 
     @staticmethod
     async def init() -> NoReturn:
@@ -1711,9 +2849,37 @@ class EncryptedLocalBoxFile:
     async def init(self) -> 'EncryptedLocalBoxFile':
         """Will fetch and parse data from the Database."""
 
-        file_row = list(await self._tgbox_db.FILES.select_once(
+        file_row = await self._tgbox_db.FILES.select_once(
             sql_tuple = ('SELECT * FROM FILES WHERE ID=?', (self._id,))
-        ))
+        )
+        directory = EncryptedLocalBoxDirectory(
+            self._tgbox_db, file_row[2]
+        )
+        await directory.init()
+
+        if isinstance(self._defaults, DefaultsTableWrapper):
+            if not self._defaults.initialized:
+                await self._defaults.init()
+
+        return self._init_from_row(file_row, directory)
+
+    def _init_from_row(
+            self, file_row: tuple,
+            directory: EncryptedLocalBoxDirectory) -> 'EncryptedLocalBoxFile':
+        """
+        Will initialize file from the already fetched
+        ``FILES`` row, without queries. ``defaults``
+        must be initialized.
+
+        Arguments:
+            file_row (``tuple``):
+                ``FILES`` row of this file.
+
+            directory (``EncryptedLocalBoxDirectory``):
+                Initialized directory of this file.
+        """
+        file_row = list(file_row)
+
         self._updated_metadata = file_row.pop()
         self._metadata = file_row.pop()
         self._fingerprint = file_row.pop()
@@ -1722,11 +2888,7 @@ class EncryptedLocalBoxFile:
         self._upload_time = file_row.pop()
         self._id = file_row.pop()
 
-        self._directory = EncryptedLocalBoxDirectory(
-            self._tgbox_db, self._ppath_head
-        )
-        await self._directory.init()
-
+        self._directory = directory
         self._imported = bool(self._efilekey)
 
         self._prefix = self._metadata[:len(PREFIX)]
@@ -1736,16 +2898,12 @@ class EncryptedLocalBoxFile:
         pattr_offset = len(PREFIX) + len(VERBYTE) + 3
 
         unpacked_metadata = PackedAttributes.unpack(
-            self._metadata[pattr_offset:-16]
+            memoryview(self._metadata)[pattr_offset:-16]
         )
         self._file_iv = self._metadata[-16:]
         self._file_salt = unpacked_metadata['file_salt']
         self._box_salt = unpacked_metadata['box_salt']
 
-        if isinstance(self._defaults, DefaultsTableWrapper):
-            if not self._defaults.initialized:
-                await self._defaults.init()
-
         self._initialized = True
         return self
 
@@ -1765,17 +2923,27 @@ class EncryptedLocalBoxFile:
         """
         self._cache_preview = True
 
-    async def decrypt(self, key: Union[FileKey, MainKey]) -> 'DecryptedLocalBoxFile':
+    async def decrypt(
+            self, key: Union[FileKey, MainKey],
+            crypto: Optional[CryptoContext] = None,
+            lazy: bool=False) -> 'DecryptedLocalBoxFile':
         """
         Returns decrypted by ``key`` ``EncryptedLocalBoxFile``
 
         Arguments:
             key (``FileKey``, ``MainKey``):
                 Decryption key.
+
+            crypto (``CryptoContext``, optional):
+                ``CryptoContext`` of Box to reuse.
+
+            lazy (``bool``, optional):
+                Decrypt metadata only on first access
+                to it. See ``DecryptedLocalBoxFile``.
         """
         if not self.initialized:
             await self.init()
-        return DecryptedLocalBoxFile(self, key)
+        return DecryptedLocalBoxFile(self, key, crypto=crypto, lazy=lazy)
 
     async def delete(self) -> None:
         """
@@ -1791,19 +2959,32 @@ class EncryptedLocalBoxFile:
         file_row = await self._tgbox_db.FILES.select_once(
             sql_tuple=('SELECT PPATH_HEAD FROM FILES WHERE ID=?',(self._id,))
         )
-        # Removing requested file
-        await self._tgbox_db.FILES.execute(
-            ('DELETE FROM FILES WHERE ID=?',(self._id,))
-        )
-        try:
-            await self._tgbox_db.FILES.select_once(sql_tuple=(
-                'SELECT ID FROM FILES WHERE PPATH_HEAD=?',(file_row[0],)
-            ))
-        # Only one file point to this path part (folder)
-        except StopAsyncIteration:
-            await self._tgbox_db.PATH_PARTS.execute((
-                'DELETE FROM PATH_PARTS WHERE PART_ID=?',(file_row[0],)
-            ))
+        async with self._tgbox_db.transaction():
+            # Removing requested file
+            await self._tgbox_db.FILES.execute(
+                ('DELETE FROM FILES WHERE ID=?',(self._id,))
+            )
+            await self._tgbox_db.SEARCH_INDEX.execute(
+                ('DELETE FROM SEARCH_INDEX WHERE ID=?',(self._id,))
+            )
+            if hasattr(self._tgbox_db, 'SEARCH_FTS'):
+                await self._tgbox_db.SEARCH_FTS.execute(
+                    ('DELETE FROM SEARCH_FTS WHERE rowid=?',(self._id,))
+                )
+            if self._tgbox_db.file_columns is not None:
+                self._tgbox_db.file_columns.remove([self._id])
+            try:
+                await self._tgbox_db.FILES.select_once(sql_tuple=(
+                    'SELECT ID FROM FILES WHERE PPATH_HEAD=?',(file_row[0],)
+                ))
+            # Only one file point to this path part (folder)
+            except StopAsyncIteration:
+                await self._tgbox_db.PATH_PARTS.execute((
+                    'DELETE FROM PATH_PARTS WHERE PART_ID=?',(file_row[0],)
+                ))
+                await self._tgbox_db.PATH_CLOSURE.execute((
+                    'DELETE FROM PATH_CLOSURE WHERE DESCENDANT=?',(file_row[0],)
+                ))
 
     def get_requestkey(self, mainkey: MainKey) -> RequestKey:
         """
@@ -1849,7 +3030,9 @@ class DecryptedLocalBoxFile(EncryptedLocalBoxFile):
     def __init__(
             self, elbf: EncryptedLocalBoxFile,
             key: Union[FileKey, ImportKey, MainKey],
-            cache_preview: bool=True):
+            cache_preview: bool=True,
+            crypto: Optional[CryptoContext] = None,
+            lazy: bool=False):
         """
         Arguments:
             elbf (``EncryptedLocalBoxFile``):
@@ -1861,6 +3044,18 @@ class DecryptedLocalBoxFile(EncryptedLocalBoxFile):
 
             cache_preview (``bool``, optional):
                 Cache preview in class or not.
+
+            crypto (``CryptoContext``, optional):
+                ``CryptoContext`` of Box to reuse. Must
+                be made with ``key`` if it's ``MainKey``.
+
+            lazy (``bool``, optional):
+                If ``True``, secret metadata will be decrypted
+                only on the first access to any of its attributes
+                (e.g ``size``), and preview, file path and directory
+                only when you will access them. ``AESError``
+                (on incorrect key) will be raised on first
+                access, not here.
         """
         if not elbf._initialized:
             raise NotInitializedError('You should init elbf firstly')
@@ -1892,29 +3087,62 @@ class DecryptedLocalBoxFile(EncryptedLocalBoxFile):
         else:
             self._cache_preview = cache_preview
 
+        if isinstance(key, MainKey):
+            self._mainkey = key
+        else:
+            self._mainkey = None
+
+        if crypto and crypto.suits(self._mainkey):
+            self._crypto = crypto
+        else:
+            self._crypto = CryptoContext(self._mainkey)
+
         if isinstance(key, (FileKey, ImportKey)):
             self._filekey = FileKey(key.key)
         elif isinstance(key, MainKey) and self._efilekey:
             self._filekey = FileKey(
-                AES(self._key).decrypt(self._efilekey)
+                self._crypto.aes().decrypt(self._efilekey)
             )
+        elif self._mainkey:
+            self._filekey = self._crypto.filekey(self._file_salt)
         else:
             self._filekey = make_filekey(self._key, self._file_salt)
 
-        if isinstance(key, MainKey):
-            self._mainkey = key
-        else:
-            self._mainkey = None
+        self.__required_metadata = [
+            'duration', 'file_size', 'file_name',
+            'cattrs', 'mime', 'efile_path', 'preview'
+        ]
+        # Encrypted data that we will decrypt on first access
+        self._eupload_time = elbf._upload_time
+        self._emetadata = elbf._metadata
+        self._edirectory = elbf._directory
 
-        self._upload_time = AES(self._filekey).decrypt(elbf._upload_time)
-        self._upload_time = bytes_to_int(self._upload_time)
+        self._upload_time, self._secret_metadata = None, None
+        self._file_path, self._directory, self._preview = None, None, None
+
+        self._download_path = self._defaults.DOWNLOAD_PATH
+
+        self._elbf._initialized = False
+        self._elbf._metadata = None # To save RAM
+        self._elbf._updated_metadata = None
+
+        if not lazy:
+            self.__load_metadata()
+            self.__load_file_path()
+            self.__load_directory()
+            self.__load_preview()
+
+    def __load_metadata(self) -> None:
+        """Will decrypt and parse secret metadata (once)"""
+        if self._secret_metadata is not None:
+            return
 
         pattr_offset = len(PREFIX) + len(VERBYTE) + 3
 
         unpacked_metadata = PackedAttributes.unpack(
-            self._elbf._metadata[pattr_offset:-16]
+            memoryview(self._emetadata)[pattr_offset:-16]
         )
-        secret_metadata = AES(self._filekey).decrypt(
+        secret_metadata = self._crypto.aes(self._filekey).decrypt(
             unpacked_metadata['secret_metadata']
         )
         if len(secret_metadata) == len(unpacked_metadata['secret_metadata'])-16:
@@ -1922,75 +3150,61 @@ class DecryptedLocalBoxFile(EncryptedLocalBoxFile):
 
         secret_metadata = PackedAttributes.unpack(secret_metadata)
 
-        self.__required_metadata = [
-            'duration', 'file_size', 'file_name',
-            'cattrs', 'mime', 'efile_path', 'preview'
-        ]
-        for attr in self.__required_metadata:
-            setattr(self, f'_{attr}', secret_metadata[attr])
+        if self._updated_metadata:
+            updates = self._crypto.aes(self._filekey).decrypt(
+                self._updated_metadata
+            )
+            secret_metadata.update(PackedAttributes.unpack(updates))
 
-        self._size = bytes_to_int(self._file_size) # pylint: disable=no-member
-        del self._file_size # pylint: disable=no-member
+        self._size = bytes_to_int(secret_metadata['file_size'])
+        self._duration = bytes_to_int(secret_metadata['duration'])
+        self._cattrs = PackedAttributes.unpack(secret_metadata['cattrs'])
+        self._mime = secret_metadata['mime'].decode()
+        self._file_name = secret_metadata['file_name'].decode()
 
-        self._duration = bytes_to_int(self._duration)
-        self._cattrs = PackedAttributes.unpack(self._cattrs)
-        self._mime = self._mime.decode()
+        self._residual_metadata = {
+            k: v for k,v in secret_metadata.items()
+            if k not in self.__required_metadata
+        }
+        self._secret_metadata = secret_metadata
+        self._emetadata = None # To save RAM
 
-        self._file_name = self._file_name.decode()
+    def __load_file_path(self) -> None:
+        self.__load_metadata()
 
-        if not cache_preview:
-            self._preview = b''
+        if self._file_path is not None:
+            return
 
         if self._mainkey and not self._efilekey:
-            self._file_path = AES(self._mainkey).decrypt(
-                secret_metadata['efile_path']
+            file_path = self._crypto.aes().decrypt(
+                self._secret_metadata['efile_path']
             )
-            self._file_path = Path(self._file_path.decode())
-        else:
-            self._file_path = None
-
-        for attr in self.__required_metadata:
-            secret_metadata.pop(attr)
+            self._file_path = Path(file_path.decode())
 
-        self._residual_metadata = secret_metadata
+    def __load_directory(self) -> None:
+        if self._directory is not None:
+            return
 
         if self._mainkey:
             self._directory = DecryptedLocalBoxDirectory(
-                self._elbf._directory, self._mainkey
+                self._edirectory, self._mainkey, crypto=self._crypto
             )
         else:
-            self._directory = self._elbf._directory
+            self._directory = self._edirectory
 
-        self._download_path = self._defaults.DOWNLOAD_PATH
+    def __load_preview(self) -> None:
+        self.__load_metadata()
 
-        if self._elbf._updated_metadata:
-            updates = AES(self._filekey).decrypt(
-                self._elbf._updated_metadata
-            )
-            updates = PackedAttributes.unpack(updates)
-
-            for k,v in tuple(updates.items()):
-                if k in self.__required_metadata:
-                    if k == 'cattrs':
-                        setattr(self, f'_{k}', PackedAttributes.unpack(v))
-
-                    elif k == 'file_name':
-                        setattr(self, f'_{k}', v.decode())
-
-                    elif k == 'efile_path':
-                        if self._mainkey and not self._efilekey:
-                            self._file_path = AES(self._mainkey).decrypt(v)
-                            self._file_path = Path(self._file_path.decode())
-                        else:
-                            self._file_path = None
-                    else:
-                        setattr(self, f'_{k}', v)
-                else:
-                    self._residual_metadata[k] = v
+        if self._preview is not None:
+            return
 
-        self._elbf._initialized = False
-        self._elbf._metadata = None # To save RAM
-        self._elbf._updated_metadata = None
+        if self._cache_preview:
+            self._preview = self._secret_metadata['preview']
+        else:
+            self._preview = b''
+
+        # We don't need to store preview twice
+        self._secret_metadata['preview'] = b''
 
     @staticmethod
     async def init() -> NoReturn:
@@ -2005,6 +3219,28 @@ class DecryptedLocalBoxFile(EncryptedLocalBoxFile):
             """and cannot be used on ``DecryptedLocalBoxFile``."""
         )
     @property
+    def upload_time(self) -> int:
+        """Returns upload time of the file."""
+        if self._upload_time is None:
+            self._upload_time = bytes_to_int(
+                self._crypto.aes(self._filekey).decrypt(self._eupload_time)
+            )
+        return self._upload_time
+
+    @property
+    def directory(self) -> Union[
+            EncryptedLocalBoxDirectory,
+            DecryptedLocalBoxDirectory
+        ]:
+        """
+        Returns ``DecryptedLocalBoxDirectory`` if file was
+        decrypted with ``MainKey``, ``EncryptedLocalBoxDirectory``
+        otherwise.
+        """
+        self.__load_directory()
+        return self._directory
+
+    @property
     def residual_metadata(self) -> dict:
         """
         Will return metadata that left after
@@ -2012,16 +3248,19 @@ class DecryptedLocalBoxFile(EncryptedLocalBoxFile):
         useful in future, when lower version
         will read file of a higher version.
         """
+        self.__load_metadata()
         return self._residual_metadata
 
     @property
     def file_path(self) -> Path:
         """Returns file path."""
+        self.__load_file_path()
         return self._file_path
 
     @property
     def file_name(self) -> str:
         """Returns file name."""
+        self.__load_metadata()
         return self._file_name
 
     @property
@@ -2030,26 +3269,31 @@ class DecryptedLocalBoxFile(EncryptedLocalBoxFile):
         Returns preview bytes or ``None``
         if ``cache_preview`` is ``False``.
         """
+        self.__load_preview()
         return self._preview
 
     @property
     def size(self) -> int:
         """Returns file size (no metadata included)."""
+        self.__load_metadata()
         return self._size
 
     @property
     def duration(self) -> int:
         """Returns media file duration."""
+        self.__load_metadata()
         return self._duration
 
     @property
     def cattrs(self) -> Union[bytes, None]:
         """Returns file Custom Attributes"""
+        self.__load_metadata()
         return self._cattrs
 
     @property
     def mime(self) -> Union[bytes, None]:
         """Returns mime type of the file"""
+        self.__load_metadata()
         return self._mime
 
     @property
@@ -2089,10 +3333,32 @@ class DecryptedLocalBoxFile(EncryptedLocalBoxFile):
             drbf = await drb.get_file(self._id)
             _updated_metadata = drbf._message.message
 
-        await self._tgbox_db.FILES.execute((
-            'UPDATE FILES SET UPDATED_METADATA=? WHERE ID=?',
-            (_updated_metadata, self._id)
-        ))
+        async with self._tgbox_db.transaction():
+            await self._tgbox_db.FILES.execute((
+                'UPDATE FILES SET UPDATED_METADATA=? WHERE ID=?',
+                (_updated_metadata, self._id)
+            ))
+            search_index = await _search_index_enabled(self._defaults)
+            search_fts = hasattr(self._tgbox_db, 'SEARCH_FTS')
+
+            if search_fts and not self._mainkey:
+                # We can't decrypt path without MainKey,
+                # so FTS will be rebuilt on next search
+                await self._tgbox_db.drop_temp_table('SEARCH_FTS')
+                search_fts = False
+
+            if search_index or search_fts or self._tgbox_db.file_columns is not None:
+                elbf = await EncryptedLocalBoxFile(self._id,
+                    self._tgbox_db, defaults=self._defaults).init()
+
+                dlbf = DecryptedLocalBoxFile(elbf, self._key,
+                    crypto=self._crypto, lazy=True)
+
+                await _update_indexes(
+                    self._tgbox_db, self._crypto,
+                    BlindIndex(self._mainkey) if self._mainkey else None,
+                    [self._id], [dlbf], search_index, search_fts
+                )
     def get_sharekey(self, reqkey: Optional[RequestKey] = None) -> ShareKey:
         """
         Returns ``ShareKey`` for this file. You should
@@ -13,6 +13,7 @@ from base64 import (
     urlsafe_b64decode
 )
 from asyncio import iscoroutinefunction
+from concurrent.futures import ThreadPoolExecutor
 
 from telethon.tl.custom.file import File
 from telethon.tl.functions.messages import EditChatAboutRequest
@@ -38,7 +39,8 @@ from ..crypto import AESwState as AES
 from ..keys import (
     make_mainkey, make_sharekey, MainKey,
     ShareKey, ImportKey, FileKey, BaseKey,
-    make_filekey, make_requestkey, RequestKey
+    make_requestkey, RequestKey,
+    CryptoContext
 )
 from ..defaults import (
     Limits, PREFIX, DEF_UNK_FOLDER,
@@ -55,7 +57,8 @@ from ..errors import (
 )
 from ..tools import (
     int_to_bytes, bytes_to_int, SearchFilter, OpenPretender,
-    pad_request_size, PackedAttributes, prbg, anext
+    pad_request_size, PackedAttributes, prbg, anext,
+    decrypt_cbc_parallel
 )
 from .utils import (
     TelegramClient, RemoteBoxDefaults,
@@ -68,6 +71,7 @@ __all__ = [
     'DecryptedRemoteBox',
     'EncryptedRemoteBoxFile',
     'DecryptedRemoteBoxFile',
+    'DecryptedRemoteBoxFileReader',
 ]
 async def make_remotebox(
         tc: TelegramClient,
@@ -577,6 +581,13 @@ class EncryptedRemoteBox:
             )
         key = key if (key or not dlb) else dlb._mainkey
 
+        if hasattr(self, '_crypto') and key is self._mainkey: # pylint: disable=no-member
+            crypto = self._crypto # pylint: disable=no-member
+        elif dlb and key is dlb._mainkey:
+            crypto = dlb._crypto
+        else:
+            crypto = None
+
         it_messages = self._tc.iter_messages(
             self._box_channel, limit=limit, offset_id=offset_id,
             max_id=max_id, min_id=min_id, add_offset=add_offset,
@@ -600,7 +611,7 @@ class EncryptedRemoteBox:
                         rbf = await EncryptedRemoteBoxFile(
                             m, self._tc, cache_preview=cache_preview,
                             defaults=self._defaults).decrypt(
-                                key, erase_encrypted_metadata)
+                                key, erase_encrypted_metadata, crypto=crypto)
 
                     except Exception as e: # In case of imported file
                         if return_imported_as_erbf and not dlb:
@@ -701,6 +712,8 @@ class EncryptedRemoteBox:
     async def push_file(
             self, pf: 'PreparedFile',
             progress_callback: Optional[Callable[[int, int], None]] = None,
+            read_ahead: int=4,
+            max_read_ahead_memory: int=16777216
             ) -> 'DecryptedRemoteBoxFile':
         """
         Uploads ``PreparedFile`` to the ``RemoteBox``.
@@ -713,6 +726,15 @@ class EncryptedRemoteBox:
             progress_callback (``Callable[[int, int], None]``, optional):
                 A callback function accepting two parameters:
                 (downloaded_bytes, total).
+
+            read_ahead (``int``, optional):
+                File is read and encrypted in the worker thread
+                while previous parts are uploading. This is
+                the max amount of parts that can wait for upload.
+
+            max_read_ahead_memory (``int``, optional):
+                Max amount of bytes that all read
+                ahead parts can take in memory.
         """
         # Last 16 bytes of metadata is IV
         aes_state = AES(pf.filekey, pf.metadata[-16:])
@@ -724,7 +746,9 @@ class EncryptedRemoteBox:
                 self._tc, oe,
                 file_name=urlsafe_b64encode(pf.filesalt).decode(),
                 part_size_kb=512, file_size=pf.filesize,
-                progress_callback=progress_callback
+                progress_callback=progress_callback,
+                read_ahead=read_ahead,
+                max_read_ahead_memory=max_read_ahead_memory
             )
         except FilePartsInvalidError:
             raise LimitExceeded('Your file is too big to upload')
@@ -750,7 +774,7 @@ class EncryptedRemoteBox:
             file_message, self._tc,
             defaults=self._defaults).init()
 
-        return await erbf.decrypt(pf.dlb._mainkey)
+        return await erbf.decrypt(pf.dlb._mainkey, crypto=pf.dlb._crypto)
 
     async def get_requestkey(self, basekey: BaseKey) -> RequestKey:
         """
@@ -897,6 +921,11 @@ class DecryptedRemoteBox(EncryptedRemoteBox):
 
             self._defaults = erb._defaults
 
+        if self._dlb:
+            self._crypto = self._dlb._crypto
+        else:
+            self._crypto = CryptoContext(self._mainkey)
+
     async def get_sharekey(self, reqkey: Optional[RequestKey] = None) -> ShareKey:
         """
         Returns ``ShareKey`` for this Box.
@@ -1187,7 +1216,7 @@ class EncryptedRemoteBoxFile:
             self._metadata = m + bytes(metadata[:metadata_size])
             break
 
-        parsedm = PackedAttributes.unpack(self._metadata[len(m):-16])
+        parsedm = PackedAttributes.unpack(memoryview(self._metadata)[len(m):-16])
 
         if 'file_fingerprint' in parsedm:
             self._fingerprint = parsedm['file_fingerprint']
@@ -1238,7 +1267,8 @@ class EncryptedRemoteBoxFile:
 
     async def decrypt(
             self, key: Union[MainKey, FileKey, ImportKey, BaseKey],
-            erase_encrypted_metadata: Optional[bool] = True
+            erase_encrypted_metadata: Optional[bool] = True,
+            crypto: Optional[CryptoContext] = None
             ) -> 'DecryptedRemoteBoxFile':
         """
         Returns ``DecryptedRemoteBoxFile``.
@@ -1253,10 +1283,13 @@ class EncryptedRemoteBoxFile:
                 ``EncryptedRemoteBoxFile`` after decryption
                 to save more RAM if ``True``. You can call
                 ``.init()`` method on it to load it again.
+
+            crypto (``CryptoContext``, optional):
+                ``CryptoContext`` of Box to reuse.
         """
         if not self.initialized:
             await self.init()
-        return await DecryptedRemoteBoxFile(self, key).init(
+        return await DecryptedRemoteBoxFile(self, key, crypto=crypto).init(
             erase_encrypted_metadata=erase_encrypted_metadata)
 
 class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
@@ -1295,7 +1328,8 @@ class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
     """
     def __init__(
             self, erbf: EncryptedRemoteBoxFile,
-            key: Union[MainKey, FileKey, ImportKey]):
+            key: Union[MainKey, FileKey, ImportKey],
+            crypto: Optional[CryptoContext] = None):
         """
         Arguments:
             erbf (``EncryptedRemoteBoxFile``):
@@ -1303,6 +1337,9 @@ class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
 
             key (``MainKey``, ``FileKey``, ``ImportKey``):
                 Decryption key.
+
+            crypto (``CryptoContext``, optional):
+                ``CryptoContext`` of Box to reuse.
         """
         if not erbf.initialized:
             raise NotInitializedError('RemoteBoxFile must be initialized.')
@@ -1343,14 +1380,21 @@ class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
         self._residual_metadata = None
 
         if isinstance(key, (FileKey, ImportKey)):
-            self._filekey = FileKey(key.key)
             self._mainkey = None
         elif isinstance(key, BaseKey):
             self._mainkey = make_mainkey(key, self._box_salt)
-            self._filekey = make_filekey(self._mainkey, self._file_salt)
         else:
             self._mainkey = self._key
-            self._filekey = make_filekey(self._key, self._file_salt)
+
+        if crypto and crypto.suits(self._mainkey):
+            self._crypto = crypto
+        else:
+            self._crypto = CryptoContext(self._mainkey)
+
+        if isinstance(key, (FileKey, ImportKey)):
+            self._filekey = FileKey(key.key)
+        else:
+            self._filekey = self._crypto.filekey(self._file_salt)
 
     @property
     def size(self) -> Union[int, None]:
@@ -1448,11 +1492,11 @@ class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
         pattr_offset = len(PREFIX) + len(VERBYTE) + 3
 
         unpacked_metadata = PackedAttributes.unpack(
-            bytes(self._erbf._metadata[pattr_offset:-16])
+            memoryview(self._erbf._metadata)[pattr_offset:-16]
         )
         self._file_pos = len(self._erbf._metadata)
 
-        secret_metadata = AES(self._filekey).decrypt(
+        secret_metadata = self._crypto.aes(self._filekey).decrypt(
             unpacked_metadata['secret_metadata']
         )
         secret_metadata = PackedAttributes.unpack(secret_metadata)
@@ -1473,7 +1517,7 @@ class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
         self._mime = secret_metadata['mime'].decode()
 
         if self._mainkey:
-            self._file_path = AES(self._mainkey).decrypt(
+            self._file_path = self._crypto.aes().decrypt(
                 secret_metadata['efile_path']
             )
             self._file_path = Path(self._file_path.decode())
@@ -1487,7 +1531,7 @@ class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
 
         if self._message.message:
             try:
-                edited_metadata = AES(self._filekey).decrypt(
+                edited_metadata = self._crypto.aes(self._filekey).decrypt(
                     urlsafe_b64decode(self._message.message)
                 )
                 edited_metadata = PackedAttributes.unpack(edited_metadata)
@@ -1517,7 +1561,8 @@ class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
             self, *, outfile: Optional[Union[str, BinaryIO, Path]] = None,
             hide_folder: bool=False, hide_name: bool=False,
             decrypt: bool=True, request_size: int=524288,
-            progress_callback: Optional[Callable[[int, int], None]] = None) -> BinaryIO:
+            progress_callback: Optional[Callable[[int, int], None]] = None,
+            decrypt_workers: int=1) -> BinaryIO:
         """
         Downloads and saves remote box file to the ``outfile``.
 
@@ -1557,11 +1602,18 @@ class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
             progress_callback (``Callable[[int, int], None]``, optional):
                 A callback function accepting two parameters:
                 (downloaded_bytes, total).
+
+            decrypt_workers (``int``, optional):
+                If bigger than ``1``, every downloaded part will be
+                splitted to this amount of segments and decrypted
+                in the thread pool with the same amount of threads.
+                Can speed up big downloads on multi-core machines
+                but only with ``cryptography`` AES backend.
         """
         self.__raise_initialized()
 
         if decrypt:
-            aws = AES(self._filekey, self._file_iv)
+            aws = self._crypto.aes(self._filekey, self._file_iv)
 
         if outfile is None:
             outfile = self._defaults.DOWNLOAD_PATH
@@ -1600,28 +1652,74 @@ class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
             location = self._message.document,
             request_size = request_size,
         )
-        buffered, offset, total = b'', self._file_pos, 0
-        async for chunk in iter_down:
-            if buffered:
-                buffered += chunk
-                chunk = buffered[:request_size]
-                buffered = buffered[request_size:]
-            else:
-                buffered += chunk[offset:]
-                offset = None; continue
+        # We keep at least one last block in ``buffered`` before
+        # the download is finished, so we can strip padding from
+        # it. Both buffers are allocated once per download.
+        buffered, offset, total = bytearray(), self._file_pos, 0
+        decrypted = bytearray(request_size + 32) if decrypt else None
+
+        if decrypt and decrypt_workers > 1:
+            executor = ThreadPoolExecutor(decrypt_workers)
+            # IV for the next part is its previous ciphertext block
+            iv = self._file_iv
+        else:
+            executor = None
 
-            chunk = aws.decrypt(chunk, unpad=False) if decrypt else chunk
-            outfile.write(chunk)
+        try:
+            async for chunk in iter_down:
+                if offset:
+                    chunk = memoryview(chunk)[offset:]
+                    offset = None
 
-            if progress_callback:
-                total += len(chunk)
-                if iscoroutinefunction(progress_callback):
-                    await progress_callback(total, self._file_size)
+                if not decrypt:
+                    outfile.write(chunk)
+                    total += len(chunk)
                 else:
-                    progress_callback(total, self._file_size)
+                    buffered += chunk
+                    # Amount of bytes that we can decrypt now
+                    ready = len(buffered) - 16
+                    ready -= ready % 16
+
+                    if ready <= 0:
+                        continue
+
+                    if len(decrypted) < ready + 15:
+                        decrypted = bytearray(ready + 15)
+
+                    with memoryview(buffered) as buffered_view:
+                        if executor:
+                            written = await decrypt_cbc_parallel(
+                                self._filekey, iv, buffered_view[:ready],
+                                decrypted, executor, decrypt_workers
+                            )
+                            iv = bytes(buffered_view[ready-16:ready])
+                        else:
+                            written = aws.decrypt_into(
+                                buffered_view[:ready], decrypted, unpad=False)
+
+                    with memoryview(decrypted) as decrypted_view:
+                        outfile.write(decrypted_view[:written])
+
+                    del buffered[:ready]
+                    total += written
+
+                if progress_callback:
+                    if iscoroutinefunction(progress_callback):
+                        await progress_callback(total, self._file_size)
+                    else:
+                        progress_callback(total, self._file_size)
+        finally:
+            if executor:
+                executor.shutdown(wait=False)
 
         if buffered:
-            outfile.write(aws.decrypt(buffered, unpad=True) if decrypt else chunk)
+            if executor: # Last block should be decrypted with actual IV
+                aws = self._crypto.aes(self._filekey, iv)
+
+            written = aws.decrypt_into(buffered, decrypted, unpad=True)
+
+            with memoryview(decrypted) as decrypted_view:
+                outfile.write(decrypted_view[:written])
 
             if progress_callback:
                 if iscoroutinefunction(progress_callback):
@@ -1632,6 +1730,31 @@ class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
                         self._file_size, self._file_size)
         return outfile
 
+    def open(self, max_request_size: int=524288) -> 'DecryptedRemoteBoxFileReader':
+        """
+        Returns async file-like object with ``read()``,
+        ``seek()`` and ``tell()`` that decrypts only
+        requested by you parts of the remote file.
+
+        Arguments:
+            max_request_size (``int``, optional):
+                Max amount of bytes that will be requested
+                from Telegram per one ``GetFileRequest``.
+
+        Example:
+
+        .. code-block:: python
+
+                ... # Most code is omited, see help(tgbox.api)
+                drbf = await drb.get_file(dlb.get_last_file_id())
+
+                async with drbf.open() as f:
+                    f.seek(-1024, 2) # Move to 1KiB before end
+                    tail = await f.read()
+        """
+        self.__raise_initialized()
+        return DecryptedRemoteBoxFileReader(self, max_request_size)
+
     async def update_metadata(
             self, changes: Dict[str, Union[bytes, None]],
             dlb: Optional['DecryptedLocalBox'] = None
@@ -1691,7 +1814,7 @@ class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
             raise ValueError('You can\'t change file_path without specifying dlb!')
         try:
             message_caption = urlsafe_b64decode(self._message.message)
-            updates = AES(self._filekey).decrypt(message_caption)
+            updates = self._crypto.aes(self._filekey).decrypt(message_caption)
             updates = PackedAttributes.unpack(updates)
         except (ValueError, TypeError):
             updates = {}
@@ -1705,7 +1828,7 @@ class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
                 'UPDATE FILES SET PPATH_HEAD=? WHERE ID=?',
                 (directory.part_id, self._id)
             ))
-            efile_path = AES(self._mainkey).encrypt(str(new_file_path).encode())
+            efile_path = self._crypto.aes().encrypt(str(new_file_path).encode())
             changes['efile_path'] = efile_path
 
         updates.update(changes)
@@ -1718,7 +1841,7 @@ class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
                     del self._residual_metadata[k]
 
         updates_packed = PackedAttributes.pack(**updates)
-        updates_encrypted = AES(self._filekey).encrypt(updates_packed)
+        updates_encrypted = self._crypto.aes(self._filekey).encrypt(updates_packed)
         try:
             await self._message.edit(
                 urlsafe_b64encode(updates_encrypted).decode()
@@ -1741,7 +1864,7 @@ class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
 
         if dlb:
             dlbfi = await dlb.get_file(self._id)
-            await dlbfi.refresh_metadata(_updated_metada=updates_encrypted)
+            await dlbfi.refresh_metadata(_updated_metadata=updates_encrypted)
 
     def get_sharekey(self, reqkey: Optional[RequestKey] = None) -> ShareKey:
         """
@@ -1765,3 +1888,181 @@ class DecryptedRemoteBoxFile(EncryptedRemoteBoxFile):
             )
         else:
             return make_sharekey(filekey=self._filekey)
+
+class DecryptedRemoteBoxFileReader:
+    """
+    Async file-like object that gives random access to the
+    decrypted remote file. Files are encrypted with AES CBC,
+    so to decrypt any block we only need a previous block
+    of ciphertext as IV. We download only 4096-aligned
+    spans of file that cover requested by you range.
+
+    Usually you should get it from the
+    ``DecryptedRemoteBoxFile.open()`` method.
+    """
+    def __init__(
+            self, drbf: DecryptedRemoteBoxFile,
+            max_request_size: int=524288):
+        """
+        Arguments:
+            drbf (``DecryptedRemoteBoxFile``):
+                Initialized ``DecryptedRemoteBoxFile``.
+
+            max_request_size (``int``, optional):
+                Max amount of bytes that will be requested
+                from Telegram per one ``GetFileRequest``.
+        """
+        self._drbf = drbf
+        self._max_request_size = max_request_size
+
+        self._position = 0
+        self._closed = False
+
+        # Plaintext with padding is always divisible by 16
+        self._padded_size = drbf._size + (16 - drbf._size % 16)
+
+        # Last decrypted span of the file is cached here
+        self._cache, self._cache_start = b'', 0
+
+    async def __aenter__(self) -> 'DecryptedRemoteBoxFileReader':
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        """Returns ``True`` if reader was closed."""
+        return self._closed
+
+    def tell(self) -> int:
+        """Returns current position in the decrypted file."""
+        return self._position
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int=0) -> int:
+        """
+        Changes current position in the decrypted file. The
+        ``whence`` is ``0`` for the start of file, ``1``
+        for current position and ``2`` for the end.
+        """
+        if whence == 0:
+            position = offset
+        elif whence == 1:
+            position = self._position + offset
+        elif whence == 2:
+            position = self._drbf._size + offset
+        else:
+            raise ValueError(f'Invalid whence ({whence}, should be 0, 1 or 2)')
+
+        if position < 0:
+            raise ValueError(f'Negative seek position {position}')
+
+        self._position = position
+        return self._position
+
+    async def _download(self, start: int, end: int) -> bytes:
+        """Returns ciphertext from ``start`` (4096-aligned) up to ``end``"""
+        # Telegram doesn't allow GetFileRequest to cross 1MiB border,
+        # so request size should be a divisor of 1MiB that ``start``
+        # is divisible by. Every next request will be aligned, too.
+        request_size = 4096
+        while all((
+                request_size < end - start,
+                request_size * 2 <= self._max_request_size,
+                not start % (request_size * 2))):
+            request_size *= 2
+
+        downloaded = bytearray()
+        iter_down = self._drbf._tc.iter_download(
+            self._drbf._message.document,
+            offset=start, request_size=request_size
+        )
+        async for chunk in iter_down:
+            downloaded += chunk
+            if len(downloaded) >= end - start:
+                break
+
+        return bytes(downloaded)
+
+    async def _fetch(self, start: int, end: int) -> None:
+        """
+        Will download, decrypt and cache span of file
+        that include plaintext from ``start`` to ``end``.
+        """
+        file_pos = self._drbf._file_pos
+
+        block_start = start - start % 16
+        block_end = min(-(-end // 16) * 16, self._padded_size)
+
+        # Ciphertext of the previous block is IV for the block_start
+        cipher_start = file_pos + block_start - (16 if block_start else 0)
+        cipher_start -= cipher_start % 4096
+
+        ciphertext = await self._download(cipher_start, file_pos + block_end)
+        cipher_end = cipher_start + len(ciphertext)
+
+        # We will decrypt all full blocks that were downloaded,
+        # even if they are not requested, and cache them.
+        if cipher_start <= file_pos:
+            block_start, iv = 0, self._drbf._file_iv
+        else:
+            block_start = -(-(cipher_start - file_pos) // 16) * 16 + 16
+            iv_offset = file_pos + block_start - 16 - cipher_start
+            iv = ciphertext[iv_offset:iv_offset+16]
+
+        block_end = (cipher_end - file_pos) // 16 * 16
+        block_end = min(block_end, self._padded_size)
+
+        if block_end <= block_start:
+            raise RemoteFileNotFound('Can\'t download requested range of file')
+
+        with memoryview(ciphertext) as ciphertext_view:
+            offset = file_pos + block_start - cipher_start
+            plaintext = bytearray(block_end - block_start + 15)
+
+            written = self._drbf._crypto.aes(self._drbf._filekey, iv).decrypt_into(
+                ciphertext_view[offset:offset+block_end-block_start],
+                plaintext, unpad=False
+            )
+        # We don't need padding, so strip it by file size
+        written = min(written, self._drbf._size - block_start)
+
+        self._cache = bytes(plaintext[:written])
+        self._cache_start = block_start
+
+    async def read(self, size: int=-1) -> bytes:
+        """
+        Returns up to ``size`` decrypted bytes from current
+        position. Will read up to the end if ``size`` is negative.
+        """
+        if self._closed:
+            raise ValueError('Reader was closed')
+
+        if size < 0 or self._position + size > self._drbf._size:
+            size = self._drbf._size - self._position
+
+        if size <= 0:
+            return b''
+
+        start, end = self._position, self._position + size
+        cache_end = self._cache_start + len(self._cache)
+
+        if not (self._cache_start <= start and end <= cache_end):
+            await self._fetch(start, end)
+            cache_end = self._cache_start + len(self._cache)
+
+        data = self._cache[start-self._cache_start : end-self._cache_start]
+
+        while len(data) < size: # Requested more than one download span
+            await self._fetch(start + len(data), end)
+            data += self._cache[start+len(data)-self._cache_start : end-self._cache_start]
+
+        self._position += len(data)
+        return data
+
+    def close(self) -> None:
+        self._closed = True
+        self._cache = b''
@@ -6,7 +6,6 @@ from typing import (
 )
 from os import PathLike
 from dataclasses import dataclass
-from base64 import urlsafe_b64encode
 
 from telethon.tl.custom.file import File
 from telethon.sessions import StringSession
@@ -18,11 +17,6 @@ from telethon import TelegramClient as TTelegramClient
 from telethon.errors import SessionPasswordNeededError
 from telethon.tl.functions.auth import ResendCodeRequest
 
-try:
-    from regex import search as re_search
-except ImportError:
-    from re import search as re_search
-
 from ..defaults import VERSION
 from ..tools import anext, SearchFilter
 from ..fastelethon import download_file
@@ -207,7 +201,6 @@ class DirectoryRoot:
     please use it only for ``lbd.iterdir``
     """
 
-# TODO: Improve SearchFilter
 async def search_generator(
         sf: SearchFilter, it_messages: Optional[AsyncGenerator] = None,
         lb: Optional['tgbox.api.local.DecryptedLocalBox'] = None,
@@ -222,7 +215,11 @@ async def search_generator(
     will try to get ``FileKey`` and decrypt ``EncryptedRemoteBoxFile``.
     Otherwise imported file will be ignored.
     """
-    in_func = re_search if sf.in_filters['re'] else lambda p,s: p in s
+    predicate = sf.compile()
+    path_filter = any(
+        filter['file_path'] or filter['directory']
+        for filter in (sf.in_filters, sf.ex_filters)
+    )
 
     if it_messages:
         iter_from = it_messages
@@ -235,190 +232,30 @@ async def search_generator(
         raise ValueError('At least it_messages or lb must be specified.')
 
     async for file in iter_from:
+        file_path = ''
+
         if hasattr(file, '_message'): # *RemoteBoxFile
             file_size = file.file_size
-            file_path = file.file_path if file.file_path else ''
+            if path_filter and file.file_path:
+                file_path = str(file.file_path)
+
         elif hasattr(file, '_tgbox_db'): # *LocalBoxFile
             file_size = file.size
-            await file.directory.lload(full=True)
-            file_path = str(file.directory)
+            if path_filter:
+                await file.directory.lload(full=True)
+                file_path = str(file.directory)
         else:
             continue
 
-        # We will use it as flags, the first
-        # is for 'include', the second is for
-        # 'exclude'. Both should be True to
-        # match SearchFilter filters.
-        yield_result = [True, True]
-
-        for indx, filter in enumerate((sf.in_filters, sf.ex_filters)):
-            if filter['imported']:
-                if bool(file.imported) != bool(filter['imported']):
-                    if indx == 0: # O is Include
-                        yield_result[indx] = False
-                        break
-
-                elif bool(file.imported) == bool(filter['imported']):
-                    if indx == 1: # 1 is Exclude
-                        yield_result[indx] = False
-                        break
-
-            for mime in filter['mime']:
-                if in_func(mime, file.mime):
-                    if indx == 1:
-                        yield_result[indx] = False
-                    break
-            else:
-                if filter['mime']:
-                    if indx == 0:
-                        yield_result[indx] = False
-                        break
-
-            if filter['min_time']:
-                if file.upload_time < filter['min_time'][-1]:
-                    if indx == 0:
-                        yield_result[indx] = False
-                        break
-
-                elif file.upload_time >= filter['min_time'][-1]:
-                    if indx == 1:
-                        yield_result[indx] = False
-                        break
-
-            if filter['max_time']:
-                if file.upload_time > filter['max_time'][-1]:
-                    if indx == 0:
-                        yield_result[indx] = False
-                        break
-
-                elif file.upload_time <= filter['max_time'][-1]:
-                    if indx == 1:
-                        yield_result[indx] = False
-                        break
-
-            if filter['min_size']:
-                if file_size < filter['min_size'][-1]:
-                    if indx == 0:
-                        yield_result[indx] = False
-                        break
-
-                elif file_size >= filter['min_size'][-1]:
-                    if indx == 1:
-                        yield_result[indx] = False
-                        break
-
-            if filter['max_size']:
-                if file_size > filter['max_size'][-1]:
-                    if indx == 0:
-                        yield_result[indx] = False
-                        break
-
-                elif file_size <= filter['max_size'][-1]:
-                    if indx == 1:
-                        yield_result[indx] = False
-                        break
-
-            if filter['min_id']:
-                if file.id < filter['min_id'][-1]:
-                    if indx == 0:
-                        yield_result[indx] = False
-                        break
-
-                elif file.id >= filter['min_id'][-1]:
-                    if indx == 1:
-                        yield_result[indx] = False
-                        break
-
-            if filter['max_id']:
-                if file.id > filter['max_id'][-1]:
-                    if indx == 0:
-                        yield_result[indx] = False
-                        break
-
-                elif file.id <= filter['max_id'][-1]:
-                    if indx == 1:
-                        yield_result[indx] = False
-                        break
-
-            for id in filter['id']:
-                if file.id == id:
-                    if indx == 1:
-                        yield_result[indx] = False
-                    break
-            else:
-                if filter['id']:
-                    if indx == 0:
-                        yield_result[indx] = False
-                        break
-
-            if hasattr(file, '_cattrs'):
-                for cattr in filter['cattrs']:
-                    for k,v in cattr.items():
-                        if k in file.cattrs:
-                            if in_func(v, file.cattrs[k]):
-                                if indx == 1:
-                                    yield_result[indx] = False
-                                break
-                    else:
-                        if filter['cattrs']:
-                            if indx == 0:
-                                yield_result[indx] = False
-                                break
-
-            for filter_file_path in filter['file_path']:
-                if in_func(str(filter_file_path), file_path):
-                    if indx == 1:
-                        yield_result[indx] = False
-                    break
-            else:
-                if filter['file_path']:
-                    if indx == 0:
-                        yield_result[indx] = False
-                        break
-
-            for file_name in filter['file_name']:
-                if in_func(file_name, file.file_name):
-                    if indx == 1:
-                        yield_result[indx] = False
-                    break
-            else:
-                if filter['file_name']:
-                    if indx == 0:
-                        yield_result[indx] = False
-                        break
-
-            for file_salt in filter['file_salt']:
-                if isinstance(file_salt, str):
-                    fsalt = urlsafe_b64encode(file.file_salt).decode()
-                else:
-                    fsalt = file.file_salt
-
-                if in_func(file_salt, fsalt):
-                    if indx == 1:
-                        yield_result[indx] = False
-                    break
-            else:
-                if filter['file_salt']:
-                    if indx == 0:
-                        yield_result[indx] = False
-                        break
-
-            for verbyte in filter['verbyte']:
-                if verbyte == file.verbyte:
-                    if indx == 1:
-                        yield_result[indx] = False
-                    break
-            else:
-                if filter['verbyte']:
-                    if indx == 0:
-                        yield_result[indx] = False
-                        break
-
-        if all(yield_result):
-            yield file
-        else:
+        if not predicate(file, file_size, file_path):
             continue
 
+        if hasattr(file, '_tgbox_db') and not path_filter:
+            # Yielded file always has fully loaded directory
+            await file.directory.lload(full=True)
+
+        yield file
+
 class _TelegramVirtualFile:
     """
     We use this class for re-upload to RemoteBox
@@ -560,6 +397,7 @@ class DefaultsTableWrapper:
         await self._tgbox_db.DEFAULTS.execute((
             f'UPDATE DEFAULTS SET {key}=?', (value,)
         ))
+        setattr(self, key, value)
 
 @dataclass
 class RemoteBoxDefaults:
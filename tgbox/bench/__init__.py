@@ -0,0 +1,6 @@
+"""
+This package stores benchmarks for the TGBOX API. They
+aren't imported by default, run any with python -m, e.g
+``python -m tgbox.bench.crypto``, or import to use
+their functions in your own code.
+"""
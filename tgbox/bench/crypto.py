@@ -0,0 +1,78 @@
+"""
+Throughput benchmark for every available AES backend.
+
+Usage: ``python -m tgbox.bench.crypto [size_kib] [rounds]``
+"""
+
+from sys import argv
+from time import perf_counter
+from typing import Dict, Optional
+
+from ..crypto import (
+    AESwState as AES, AES_BACKENDS,
+    get_aes_backend, set_aes_backend,
+    get_rnd_bytes
+)
+__all__ = ['bench_aes_backends']
+
+def bench_aes_backends(
+        size: int=524288, rounds: int=3,
+        backends: Optional[tuple] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Will encrypt and decrypt ``size`` bytes with every AES
+    backend ``rounds`` times and return the best result as
+    ``{backend: {'encrypt': MiB/s, 'decrypt': MiB/s}}``.
+
+    Arguments:
+        size (``int``, optional):
+            Size of data to process per round. Must be
+            divisible by 16. Default is 512KiB, the
+            size of one upload part.
+
+        rounds (``int``, optional):
+            How many times to repeat benchmark.
+
+        backends (``tuple``, optional):
+            Backend names to benchmark. All
+            available if not specified.
+    """
+    assert not size % 16, 'size must be divisible by 16'
+
+    key, iv = get_rnd_bytes(32), get_rnd_bytes(16)
+    data = get_rnd_bytes(size)
+
+    backends = backends if backends else tuple(AES_BACKENDS)
+    current_backend, results = get_aes_backend(), {}
+    try:
+        for backend in backends:
+            set_aes_backend(backend)
+            enc_time, dec_time = float('inf'), float('inf')
+
+            for _ in range(rounds):
+                start = perf_counter()
+                edata = AES(key, iv).encrypt(data, pad=False, concat_iv=False)
+                enc_time = min(enc_time, perf_counter() - start)
+
+                start = perf_counter()
+                AES(key, iv).decrypt(edata, unpad=False)
+                dec_time = min(dec_time, perf_counter() - start)
+
+            results[backend] = {
+                'encrypt': size / 1048576 / enc_time,
+                'decrypt': size / 1048576 / dec_time
+            }
+    finally:
+        set_aes_backend(current_backend)
+
+    return results
+
+if __name__ == '__main__':
+    size = int(argv[1]) * 1024 if len(argv) > 1 else 524288
+    rounds = int(argv[2]) if len(argv) > 2 else 3
+
+    print(f'Data: {size} bytes, rounds: {rounds}')
+    for backend, result in bench_aes_backends(size, rounds).items():
+        print(
+            f'{backend:>12}: encrypt {result["encrypt"]:.2f} MiB/s, '
+            f'decrypt {result["decrypt"]:.2f} MiB/s'
+        )
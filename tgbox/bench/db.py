@@ -0,0 +1,320 @@
+"""
+Benchmarks of the TgboxDB on the synthetic LocalBox.
+Rows are random and never decrypted, so only the
+SQLite part of the work is measured.
+
+Usage: ``python -m tgbox.bench.db [files] [lookups]``
+"""
+
+from sys import argv
+from time import perf_counter
+from asyncio import run
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict, List, Tuple
+
+from ..api.db import TgboxDB, INDEXES, DB_PROFILES
+from ..api.local import EncryptedLocalBox
+from ..crypto import get_rnd_bytes
+from ..defaults import PREFIX, VERBYTE
+from ..tools import PackedAttributes, int_to_bytes
+
+__all__ = [
+    'make_synthetic_db', 'bench_db_indexes',
+    'bench_db_profiles', 'bench_files_queries'
+]
+
+# (Name, SQL) of the hot path lookups, see api/local.py
+_LOOKUPS = (
+    ('FILES.FINGERPRINT', 'SELECT ID FROM FILES WHERE FINGERPRINT=?'),
+    ('FILES.PPATH_HEAD', 'SELECT count(*) FROM FILES WHERE PPATH_HEAD IS ?'),
+    ('PATH_PARTS.PART_ID', 'SELECT * FROM PATH_PARTS WHERE PART_ID=?'),
+    ('PATH_PARTS.PARENT_PART_ID', 'SELECT * FROM PATH_PARTS WHERE PARENT_PART_ID IS ?'),
+)
+async def make_synthetic_db(
+        db_path: Path, files: int=1000000,
+        directories: int=10000, batch: int=50000) -> Tuple[TgboxDB, Dict[str, list]]:
+    """
+    Will create ``TgboxDB`` at the ``db_path`` and fill it
+    with ``files`` random ``FILES`` rows spread over the
+    ``directories`` random ``PATH_PARTS`` rows. Returns
+    ``TgboxDB`` and ``{column: [values]}`` of the
+    inserted keys that can be used for lookups.
+
+    DB can be opened as ``EncryptedLocalBox``,
+    but can't be decrypted with any key.
+
+    Arguments:
+        db_path (``Path``):
+            Path to the new DB.
+
+        files (``int``, optional):
+            Amount of files.
+
+        directories (``int``, optional):
+            Amount of directories. Each directory is
+            a child of the random previous one.
+
+        batch (``int``, optional):
+            Amount of rows inserted per one commit.
+    """
+    tgbox_db = await TgboxDB.create(db_path)
+    conn = tgbox_db._aiosql_db
+
+    box_salt = get_rnd_bytes(32)
+    await conn.execute(
+        'INSERT INTO BOX_DATA VALUES (?,?,?,?,?,?,?)',
+        (*(get_rnd_bytes(32) for _ in range(2)), box_salt,
+         None, *(get_rnd_bytes(32) for _ in range(3)))
+    )
+
+    part_ids = [get_rnd_bytes(32) for _ in range(directories)]
+    parent_ids = [None] + [
+        part_ids[int.from_bytes(get_rnd_bytes(4), 'big') % i]
+        for i in range(1, directories)
+    ]
+    await conn.executemany(
+        'INSERT INTO PATH_PARTS VALUES (?,?,?)',
+        ((get_rnd_bytes(64), part_id, parent_id)
+            for part_id, parent_id in zip(part_ids, parent_ids))
+    )
+    fingerprints = []
+    for start in range(0, files, batch):
+        rows = []
+        for id_ in range(start + 1, min(start + batch, files) + 1):
+            fingerprints.append(get_rnd_bytes(32))
+            metadata = PackedAttributes.pack(
+                box_salt = box_salt,
+                file_salt = get_rnd_bytes(32),
+                file_fingerprint = fingerprints[-1],
+                secret_metadata = get_rnd_bytes(64)
+            )
+            metadata = PREFIX + VERBYTE + int_to_bytes(len(metadata), 3)\
+                + metadata + get_rnd_bytes(16)
+
+            rows.append((
+                id_, get_rnd_bytes(16), part_ids[id_ % directories],
+                None, fingerprints[-1], metadata, None
+            ))
+        await conn.executemany(
+            'INSERT INTO FILES VALUES (?,?,?,?,?,?,?)', rows
+        )
+        await conn.commit()
+
+    keys = {
+        'FILES.FINGERPRINT': fingerprints,
+        'FILES.PPATH_HEAD': part_ids,
+        'PATH_PARTS.PART_ID': part_ids,
+        'PATH_PARTS.PARENT_PART_ID': part_ids
+    }
+    return tgbox_db, keys
+
+async def _measure(
+        tgbox_db: TgboxDB, keys: Dict[str, list],
+        lookups: int) -> Dict[str, Dict[str, object]]:
+
+    conn, results = tgbox_db._aiosql_db, {}
+    for name, sql in _LOOKUPS:
+        cursor = await conn.execute(f'EXPLAIN QUERY PLAN {sql}', (keys[name][0],))
+        plan = '; '.join(row[-1] for row in await cursor.fetchall())
+
+        step = max(1, len(keys[name]) // lookups)
+        values = keys[name][::step][:lookups]
+
+        start = perf_counter()
+        for value in values:
+            cursor = await conn.execute(sql, (value,))
+            await cursor.fetchall()
+
+        results[name] = {
+            'plan': plan,
+            'time': (perf_counter() - start) / len(values) * 10**6
+        }
+    return results
+
+async def _bench_db_indexes(files: int, lookups: int) -> Dict[str, Dict[str, object]]:
+    with TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / 'bench.tgbox_db'
+        tgbox_db, keys = await make_synthetic_db(db_path, files)
+
+        for index in INDEXES:
+            await tgbox_db._aiosql_db.execute(f'DROP INDEX {index}')
+        await tgbox_db._aiosql_db.commit()
+
+        no_indexes = await _measure(tgbox_db, keys, lookups)
+
+        for index, (table, columns) in INDEXES.items():
+            await tgbox_db._aiosql_db.execute(
+                f'CREATE INDEX {index} ON {table} ({", ".join(columns)})')
+        await tgbox_db._aiosql_db.commit()
+
+        indexes = await _measure(tgbox_db, keys, lookups)
+        await tgbox_db.close()
+
+    return {'no_indexes': no_indexes, 'indexes': indexes}
+
+def bench_db_indexes(files: int=1000000, lookups: int=100) -> Dict[str, Dict[str, object]]:
+    """
+    Will run the hot path lookups of the ``DecryptedLocalBox``
+    on the synthetic DB of ``files`` files with and without
+    ``INDEXES`` and return results as ``{'no_indexes'|'indexes':
+    {lookup: {'plan': str, 'time': µs}}}``, where ``plan`` is
+    the ``EXPLAIN QUERY PLAN`` of lookup (``SCAN`` is a full
+    table scan, ``SEARCH ... USING INDEX`` is an index seek).
+
+    Arguments:
+        files (``int``, optional):
+            Amount of files in the synthetic DB.
+
+        lookups (``int``, optional):
+            Amount of lookups to average per query.
+    """
+    return run(_bench_db_indexes(files, lookups))
+
+def _file_row(id_: int) -> tuple:
+    return (
+        id_, get_rnd_bytes(8), get_rnd_bytes(32),
+        None, get_rnd_bytes(32), get_rnd_bytes(512), None
+    )
+
+async def _bench_db_profile(profile: str, files: int, commits: int) -> Dict[str, float]:
+    with TemporaryDirectory() as tmpdir:
+        tgbox_db = await TgboxDB.create(Path(tmpdir) / 'bench', profile=profile)
+
+        # Every file is commited, like the LocalBox
+        # does on every single import without batching
+        start = perf_counter()
+        for id_ in range(1, commits + 1):
+            await tgbox_db.FILES.insert(*_file_row(id_))
+        commit_time = perf_counter() - start
+
+        start = perf_counter()
+        async with tgbox_db.transaction():
+            for id_ in range(commits + 1, commits + files + 1):
+                await tgbox_db.FILES.insert(*_file_row(id_))
+        batch_time = perf_counter() - start
+
+        ids = range(1, files + 1, max(1, files // 10000))
+
+        start = perf_counter()
+        for id_ in ids:
+            await tgbox_db.FILES.select_once(
+                ('SELECT * FROM FILES WHERE ID=?', (id_,)))
+        read_time = perf_counter() - start
+
+        start = perf_counter()
+        cursor = await tgbox_db.FILES.execute(('SELECT * FROM FILES', ()))
+        scanned = len(await cursor.fetchall())
+        scan_time = perf_counter() - start
+
+        await tgbox_db.close()
+
+    return {
+        'commit': commits / commit_time,
+        'batch': files / batch_time,
+        'read': len(ids) / read_time,
+        'scan': scanned / scan_time
+    }
+
+def bench_db_profiles(files: int=50000, commits: int=500) -> Dict[str, Dict[str, float]]:
+    """
+    Will measure ``FILES`` throughput (rows per second) with
+    every ``DB_PROFILES`` and return results as ``{profile:
+    {'commit'|'batch'|'read'|'scan': rows/s}}``, where ``commit``
+    is insert with commit per row, ``batch`` is insert inside
+    one ``TgboxDB.transaction``, ``read`` is a lookup by ID
+    and ``scan`` is a ``SELECT *`` of the whole table.
+
+    Arguments:
+        files (``int``, optional):
+            Amount of files to insert in batch.
+
+        commits (``int``, optional):
+            Amount of files to insert with commit per file.
+    """
+    return {
+        profile: run(_bench_db_profile(profile, files, commits))
+        for profile in DB_PROFILES
+    }
+
+async def _count_queries(tgbox_db: TgboxDB, coroutine) -> Tuple[int, float]:
+    queries = []
+    connections = [tgbox_db._aiosql_db, *tgbox_db._read_pool]
+
+    for connection in connections:
+        await connection.set_trace_callback(queries.append)
+
+    start = perf_counter()
+    await coroutine
+    time_spent = perf_counter() - start
+
+    for connection in connections:
+        await connection.set_trace_callback(None)
+
+    return len(queries), time_spent
+
+async def _bench_files_queries(files: int, directories: int) -> Dict[str, Dict[str, float]]:
+    async def per_file(elb):
+        for id_ in range(1, files + 1):
+            await elb.get_file(id_)
+
+    async def bulk(elb):
+        async for _ in elb.files():
+            pass
+
+    async def iterdir(elb):
+        directory = (await elb.get_file(1)).directory
+        async for _ in directory.iterdir():
+            pass
+
+    with TemporaryDirectory() as tmpdir:
+        tgbox_db, _ = await make_synthetic_db(
+            Path(tmpdir) / 'bench', files, directories)
+
+        elb = await EncryptedLocalBox(tgbox_db).init()
+        results = {}
+        for name, function in (('per_file', per_file), ('bulk', bulk), ('iterdir', iterdir)):
+            queries, time_spent = await _count_queries(tgbox_db, function(elb))
+            results[name] = {'queries': queries, 'time': time_spent}
+
+        await tgbox_db.close()
+
+    return results
+
+def bench_files_queries(files: int=10000, directories: int=100) -> Dict[str, Dict[str, float]]:
+    """
+    Will list all files of the synthetic ``EncryptedLocalBox``
+    with ``get_file`` per ID (``per_file``), with the bulk
+    loader of ``files()`` (``bulk``) and will iterate over one
+    directory (``iterdir``). Returns amount of SQL statements
+    and time as ``{name: {'queries': int, 'time': sec}}``.
+
+    Arguments:
+        files (``int``, optional):
+            Amount of files in the synthetic DB.
+
+        directories (``int``, optional):
+            Amount of directories in the synthetic DB.
+    """
+    return run(_bench_files_queries(files, directories))
+
+if __name__ == '__main__':
+    files = int(argv[1]) if len(argv) > 1 else 1000000
+    lookups = int(argv[2]) if len(argv) > 2 else 100
+
+    print(f'Files: {files}, lookups per query: {lookups}')
+    for mode, results in bench_db_indexes(files, lookups).items():
+        print(f'\n{mode}:')
+        for name, result in results.items():
+            print(f'{name:>26}: {result["time"]:>10.1f}µs  {result["plan"]}')
+
+    print('\nListing of 10000 files:')
+    for name, result in bench_files_queries().items():
+        print(f'{name:>10}: {result["queries"]} queries, {result["time"]:.2f}s')
+
+    print('\nProfiles, rows per second:')
+    for profile, result in bench_db_profiles().items():
+        print(
+            f'{profile:>10}: commit {result["commit"]:.0f}, batch {result["batch"]:.0f}, '
+            f'read {result["read"]:.0f}, scan {result["scan"]:.0f}'
+        )
@@ -0,0 +1,168 @@
+"""
+Calibration of the Scrypt KDF parameters. Measures
+``make_basekey`` time and peak RSS over N/R/P grid
+and recommends parameters for your target.
+
+Usage: ``python -m tgbox.bench.kdf [-h]``
+"""
+
+from sys import platform
+from time import perf_counter
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Iterable, Union
+
+try:
+    from resource import getrusage, RUSAGE_SELF
+except ImportError:
+    getrusage = None # Windows, peak RSS will be None
+
+from ..keys import make_basekey
+from ..defaults import Scrypt
+
+__all__ = ['calibrate_scrypt', 'recommend_scrypt']
+
+def _get_peak_rss() -> Optional[int]:
+    if not getrusage:
+        return None
+
+    peak_rss = getrusage(RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB on others
+    return peak_rss if platform == 'darwin' else peak_rss * 1024
+
+def _measure(n: int, r: int, p: int) -> tuple:
+    rss_before = _get_peak_rss()
+
+    start = perf_counter()
+    make_basekey(b'tgbox.bench.kdf', n=n, r=r, p=p)
+    time_spent = perf_counter() - start
+
+    rss_after = _get_peak_rss()
+    if rss_before is not None:
+        return time_spent, rss_after - rss_before
+
+    return time_spent, None
+
+def calibrate_scrypt(
+        n_values: Iterable[int] = tuple(2**i for i in range(14, 21)),
+        r_values: Iterable[int] = (Scrypt.R,),
+        p_values: Iterable[int] = (Scrypt.P,),
+        rounds: int=1) -> List[Dict[str, Union[int, float, None]]]:
+    """
+    Will run ``make_basekey`` with every combination of
+    ``n_values``, ``r_values`` and ``p_values`` and return
+    table of results as list of dicts with keys ``n``,
+    ``r``, ``p``, ``time`` (best of ``rounds``, in seconds),
+    ``memory`` (theoretical, ``128 * r * (n + p + 2)``) and
+    ``peak_rss`` (measured increase of RSS in bytes or
+    ``None`` if this system doesn't support it).
+
+    Every measurement is made in the fresh process,
+    so peak RSS of one doesn't affect others.
+
+    Arguments:
+        n_values (``Iterable[int]``, optional):
+            Scrypt N values to test. Must be powers
+            of 2. Default is from 2^14 to 2^20.
+
+        r_values (``Iterable[int]``, optional):
+            Scrypt R values to test.
+
+        p_values (``Iterable[int]``, optional):
+            Scrypt P values to test.
+
+        rounds (``int``, optional):
+            How many times to repeat every measurement.
+    """
+    table = []
+    for n in n_values:
+        for r in r_values:
+            for p in p_values:
+                best_time, peak_rss = float('inf'), None
+
+                for _ in range(rounds):
+                    with ProcessPoolExecutor(max_workers=1) as executor:
+                        time_spent, rss = executor.submit(_measure, n, r, p).result()
+
+                    best_time = min(best_time, time_spent)
+                    if rss is not None:
+                        peak_rss = max(peak_rss or 0, rss)
+
+                table.append({
+                    'n': n, 'r': r, 'p': p,
+                    'time': best_time,
+                    'memory': 128 * r * (n + p + 2),
+                    'peak_rss': peak_rss
+                })
+    return table
+
+def recommend_scrypt(
+        table: List[Dict[str, Union[int, float, None]]],
+        max_time: Optional[float] = None,
+        max_memory: Optional[int] = None) -> Optional[Dict[str, Union[int, float, None]]]:
+    """
+    Returns the strongest (with the biggest ``n * r * p``)
+    parameters from the ``calibrate_scrypt`` table that
+    fit into target, or ``None`` if nothing fits.
+
+    Arguments:
+        table (``List[dict]``):
+            Result of the ``calibrate_scrypt``.
+
+        max_time (``float``, optional):
+            Max unlock time in seconds.
+
+        max_memory (``int``, optional):
+            Max memory in bytes for one unlock. Will
+            be compared with the ``peak_rss`` if it
+            was measured, with ``memory`` otherwise.
+    """
+    def fits(row: dict) -> bool:
+        if max_time is not None and row['time'] > max_time:
+            return False
+
+        memory = row['peak_rss'] if row['peak_rss'] is not None else row['memory']
+        if max_memory is not None and max(memory, row['memory']) > max_memory:
+            return False
+
+        return True
+
+    fitting = [row for row in table if fits(row)]
+    if not fitting:
+        return None
+
+    return max(fitting, key=lambda row: (row['n'] * row['r'] * row['p'], -row['time']))
+
+if __name__ == '__main__':
+    parser = ArgumentParser(prog='python -m tgbox.bench.kdf',
+        description='Measure make_basekey over Scrypt N/R/P grid')
+
+    parser.add_argument('--n', type=int, nargs='+', metavar='LOG2_N',
+        default=list(range(14, 21)), help='log2 of N values (default 14..20)')
+    parser.add_argument('--r', type=int, nargs='+', default=[Scrypt.R])
+    parser.add_argument('--p', type=int, nargs='+', default=[Scrypt.P])
+    parser.add_argument('--rounds', type=int, default=1)
+    parser.add_argument('--max-time', type=float, help='target unlock time, seconds')
+    parser.add_argument('--max-memory', type=int, help='target memory, MiB')
+    args = parser.parse_args()
+
+    table = calibrate_scrypt(
+        n_values=[2**i for i in args.n],
+        r_values=args.r, p_values=args.p,
+        rounds=args.rounds
+    )
+    print(f'{"N":>9} {"R":>3} {"P":>3} {"time, s":>9} {"memory, MiB":>12} {"peak RSS, MiB":>14}')
+    for row in table:
+        peak_rss = f'{row["peak_rss"]/1048576:.1f}' if row['peak_rss'] is not None else '-'
+        print(
+            f'{row["n"]:>9} {row["r"]:>3} {row["p"]:>3} {row["time"]:>9.3f} '
+            f'{row["memory"]/1048576:>12.1f} {peak_rss:>14}'
+        )
+    if args.max_time is not None or args.max_memory is not None:
+        max_memory = args.max_memory * 1048576 if args.max_memory else None
+        best = recommend_scrypt(table, args.max_time, max_memory)
+
+        if best:
+            print(f'\nRecommended: N={best["n"]} R={best["r"]} P={best["p"]}')
+        else:
+            print('\nNothing fits your target, try smaller values')
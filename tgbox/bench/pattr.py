@@ -0,0 +1,76 @@
+"""
+Microbenchmark of ``PackedAttributes`` over metadata sizes.
+
+Usage: ``python -m tgbox.bench.pattr [rounds]``
+"""
+
+from sys import argv
+from time import perf_counter
+from typing import Dict, Iterable
+
+from ..tools import PackedAttributes
+from ..crypto import get_rnd_bytes
+
+__all__ = ['bench_packed_attributes']
+
+def bench_packed_attributes(
+        sizes: Iterable[int] = (1024, 65536, 262144, 1048576),
+        attributes: int=16, rounds: int=100) -> Dict[int, Dict[str, float]]:
+    """
+    Will ``pack`` and ``unpack`` metadata of every size
+    from the ``sizes`` ``rounds`` times and return the
+    best result as ``{size: {'pack': µs, 'unpack': µs,
+    'unpack_one': µs}}``, where ``unpack_one`` is unpack
+    plus access to a one small value (usual listing case).
+
+    Arguments:
+        sizes (``Iterable[int]``, optional):
+            Sizes of metadata. Half of every size
+            is taken by one big value (like preview),
+            other half is split between ``attributes``.
+
+        attributes (``int``, optional):
+            Amount of small attributes.
+
+        rounds (``int``, optional):
+            How many times to repeat benchmark.
+    """
+    results = {}
+    for size in sizes:
+        kwargs = {'preview': get_rnd_bytes(size // 2)}
+        for i in range(attributes):
+            kwargs[f'attribute_{i}'] = get_rnd_bytes(size // 2 // attributes)
+
+        packed = PackedAttributes.pack(**kwargs)
+        pack_time = unpack_time = unpack_one_time = float('inf')
+
+        for _ in range(rounds):
+            start = perf_counter()
+            PackedAttributes.pack(**kwargs)
+            pack_time = min(pack_time, perf_counter() - start)
+
+            start = perf_counter()
+            dict(PackedAttributes.unpack(packed).items())
+            unpack_time = min(unpack_time, perf_counter() - start)
+
+            start = perf_counter()
+            PackedAttributes.unpack(packed)['attribute_0']
+            unpack_one_time = min(unpack_one_time, perf_counter() - start)
+
+        results[size] = {
+            'pack': pack_time * 10**6,
+            'unpack': unpack_time * 10**6,
+            'unpack_one': unpack_one_time * 10**6
+        }
+    return results
+
+if __name__ == '__main__':
+    rounds = int(argv[1]) if len(argv) > 1 else 100
+
+    print(f'Rounds: {rounds}')
+    for size, result in bench_packed_attributes(rounds=rounds).items():
+        print(
+            f'{size:>8} bytes: pack {result["pack"]:.1f}µs, '
+            f'unpack {result["unpack"]:.1f}µs, '
+            f'unpack one value {result["unpack_one"]:.1f}µs'
+        )
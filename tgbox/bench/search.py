@@ -0,0 +1,296 @@
+"""
+Benchmark of the ``SearchFilter`` matching on the synthetic
+files. Files are plain objects with decrypted attributes,
+so only the filter evaluation is measured.
+
+Usage: ``python -m tgbox.bench.search [files]``
+"""
+
+try:
+    from regex import search as re_search
+except ImportError:
+    from re import search as re_search
+
+from sys import argv
+from time import perf_counter
+from random import Random
+from base64 import urlsafe_b64encode
+from typing import Dict, List
+
+from ..tools import SearchFilter
+
+__all__ = ['make_synthetic_files', 'bench_search_filter']
+
+# (Name, SearchFilter factory) of the benchmarked filters
+_FILTERS = (
+    ('numbers', lambda: SearchFilter(min_size=1000, max_time=1600000000)),
+    ('file_name', lambda: SearchFilter(file_name='report', mime='pdf')),
+    ('regex', lambda: SearchFilter(
+        file_name=r'^photo_\d+', cattrs={b'tag': b'^x'}, re=True)),
+    ('path_salt', lambda: SearchFilter(
+        file_path='/home/d1', file_salt='AA').exclude(min_id=9000)),
+    ('exclude', lambda: SearchFilter(id=list(range(0, 10000, 3)))\
+        .exclude(file_name=['.mp3', '.jpg'], imported=True)),
+)
+class _SyntheticFile:
+    """Decrypted file attributes used by the ``SearchFilter``."""
+    def __init__(self, random: Random, id: int):
+        name = random.choice(('report', 'photo', 'song', 'notes'))
+        extension = random.choice(('pdf', 'jpg', 'mp3', 'txt'))
+
+        self.id = id
+        self.size = random.randrange(10**6)
+        self.upload_time = random.randrange(1500000000, 1700000000)
+        self.imported = random.random() < 0.1
+        self.mime = f'application/{extension}'
+        self.file_name = f'{name}_{id}.{extension}'
+        self.file_path = f'/home/d{random.randrange(10)}/s{random.randrange(10)}'
+        self.file_salt = random.randbytes(32)
+        self.version_byte = self.verbyte = b'\x01'
+        self._cattrs = self.cattrs = {b'tag': random.choice((b'x', b'y'))}
+
+def make_synthetic_files(files: int=10000, seed: int=0) -> List[_SyntheticFile]:
+    """
+    Returns ``files`` of synthetic objects with
+    random attributes of the decrypted file.
+
+    Arguments:
+        files (``int``, optional):
+            Amount of files.
+
+        seed (``int``, optional):
+            Seed of the random attributes.
+    """
+    random = Random(seed)
+    return [_SyntheticFile(random, id) for id in range(1, files + 1)]
+
+def _legacy_match(
+        sf: SearchFilter, in_func, file,
+        file_size: int, file_path: str) -> bool:
+    """
+    Matching of the ``search_generator`` before ``SearchFilter.compile``,
+    where all filters are interpreted for every file.
+    """
+    yield_result = [True, True]
+
+    for indx, filter in enumerate((sf.in_filters, sf.ex_filters)):
+        if filter['imported']:
+            if bool(file.imported) != bool(filter['imported']):
+                if indx == 0: # O is Include
+                    yield_result[indx] = False
+                    break
+
+            elif bool(file.imported) == bool(filter['imported']):
+                if indx == 1: # 1 is Exclude
+                    yield_result[indx] = False
+                    break
+
+        for mime in filter['mime']:
+            if in_func(mime, file.mime):
+                if indx == 1:
+                    yield_result[indx] = False
+                break
+        else:
+            if filter['mime']:
+                if indx == 0:
+                    yield_result[indx] = False
+                    break
+
+        if filter['min_time']:
+            if file.upload_time < filter['min_time'][-1]:
+                if indx == 0:
+                    yield_result[indx] = False
+                    break
+
+            elif file.upload_time >= filter['min_time'][-1]:
+                if indx == 1:
+                    yield_result[indx] = False
+                    break
+
+        if filter['max_time']:
+            if file.upload_time > filter['max_time'][-1]:
+                if indx == 0:
+                    yield_result[indx] = False
+                    break
+
+            elif file.upload_time <= filter['max_time'][-1]:
+                if indx == 1:
+                    yield_result[indx] = False
+                    break
+
+        if filter['min_size']:
+            if file_size < filter['min_size'][-1]:
+                if indx == 0:
+                    yield_result[indx] = False
+                    break
+
+            elif file_size >= filter['min_size'][-1]:
+                if indx == 1:
+                    yield_result[indx] = False
+                    break
+
+        if filter['max_size']:
+            if file_size > filter['max_size'][-1]:
+                if indx == 0:
+                    yield_result[indx] = False
+                    break
+
+            elif file_size <= filter['max_size'][-1]:
+                if indx == 1:
+                    yield_result[indx] = False
+                    break
+
+        if filter['min_id']:
+            if file.id < filter['min_id'][-1]:
+                if indx == 0:
+                    yield_result[indx] = False
+                    break
+
+            elif file.id >= filter['min_id'][-1]:
+                if indx == 1:
+                    yield_result[indx] = False
+                    break
+
+        if filter['max_id']:
+            if file.id > filter['max_id'][-1]:
+                if indx == 0:
+                    yield_result[indx] = False
+                    break
+
+            elif file.id <= filter['max_id'][-1]:
+                if indx == 1:
+                    yield_result[indx] = False
+                    break
+
+        for id in filter['id']:
+            if file.id == id:
+                if indx == 1:
+                    yield_result[indx] = False
+                break
+        else:
+            if filter['id']:
+                if indx == 0:
+                    yield_result[indx] = False
+                    break
+
+        if hasattr(file, '_cattrs'):
+            for cattr in filter['cattrs']:
+                for k,v in cattr.items():
+                    if k in file.cattrs:
+                        if in_func(v, file.cattrs[k]):
+                            if indx == 1:
+                                yield_result[indx] = False
+                            break
+                else:
+                    if filter['cattrs']:
+                        if indx == 0:
+                            yield_result[indx] = False
+                            break
+
+        for filter_file_path in filter['file_path']:
+            if in_func(str(filter_file_path), file_path):
+                if indx == 1:
+                    yield_result[indx] = False
+                break
+        else:
+            if filter['file_path']:
+                if indx == 0:
+                    yield_result[indx] = False
+                    break
+
+        for file_name in filter['file_name']:
+            if in_func(file_name, file.file_name):
+                if indx == 1:
+                    yield_result[indx] = False
+                break
+        else:
+            if filter['file_name']:
+                if indx == 0:
+                    yield_result[indx] = False
+                    break
+
+        for file_salt in filter['file_salt']:
+            if isinstance(file_salt, str):
+                fsalt = urlsafe_b64encode(file.file_salt).decode()
+            else:
+                fsalt = file.file_salt
+
+            if in_func(file_salt, fsalt):
+                if indx == 1:
+                    yield_result[indx] = False
+                break
+        else:
+            if filter['file_salt']:
+                if indx == 0:
+                    yield_result[indx] = False
+                    break
+
+        for verbyte in filter['verbyte']:
+            if verbyte == file.verbyte:
+                if indx == 1:
+                    yield_result[indx] = False
+                break
+        else:
+            if filter['verbyte']:
+                if indx == 0:
+                    yield_result[indx] = False
+                    break
+
+    return all(yield_result)
+
+def bench_search_filter(files: int=10000, rounds: int=5) -> Dict[str, Dict[str, float]]:
+    """
+    Will match synthetic files against every benchmarked
+    filter with the old interpreted ``search_generator``
+    matching and with ``SearchFilter.compile`` predicate.
+    Returns best of ``rounds`` as ``{filter: {'old'|'new':
+    files/s, 'matched': int}}``. Both give the same files.
+
+    Arguments:
+        files (``int``, optional):
+            Amount of synthetic files.
+
+        rounds (``int``, optional):
+            How many times to repeat benchmark.
+    """
+    synthetic_files, results = make_synthetic_files(files), {}
+
+    for name, make_filter in _FILTERS:
+        sf = make_filter()
+        old_time = new_time = float('inf')
+
+        for _ in range(rounds):
+            start = perf_counter()
+            in_func = re_search if sf.in_filters['re'] else lambda p,s: p in s
+            old = [
+                file.id for file in synthetic_files
+                if _legacy_match(sf, in_func, file, file.size, file.file_path)
+            ]
+            old_time = min(old_time, perf_counter() - start)
+
+            start = perf_counter()
+            predicate = sf.compile()
+            new = [
+                file.id for file in synthetic_files
+                if predicate(file, file.size, file.file_path)
+            ]
+            new_time = min(new_time, perf_counter() - start)
+
+        assert old == new, f'{name}: compiled filter gives other files'
+
+        results[name] = {
+            'old': files / old_time,
+            'new': files / new_time,
+            'matched': len(new)
+        }
+    return results
+
+if __name__ == '__main__':
+    files = int(argv[1]) if len(argv) > 1 else 10000
+
+    print(f'Files: {files}, files per second:')
+    for name, result in bench_search_filter(files).items():
+        print(
+            f'{name:>10}: old {result["old"]:.0f}, new {result["new"]:.0f} '
+            f'(x{result["new"] / result["old"]:.1f}), matched {result["matched"]}'
+        )
@@ -0,0 +1,116 @@
+"""
+Benchmark of the upload pipeline. Network is simulated with
+fake senders that sleep for ``latency`` seconds per part,
+while file is really read and encrypted by ``OpenPretender``.
+
+Usage: ``python -m tgbox.bench.upload [size_mib] [latency]``
+"""
+
+from sys import argv
+from io import BytesIO
+from time import perf_counter
+from asyncio import sleep, run, get_event_loop
+from typing import Dict, List
+
+from ..fastelethon import (
+    UploadSender, ParallelTransferrer,
+    UploadPipeline, stream_file
+)
+from ..crypto import AESwState as AES, get_rnd_bytes
+from ..tools import OpenPretender
+
+__all__ = ['bench_upload_pipeline']
+
+class _FakeUploadSender(UploadSender):
+    """``UploadSender`` that sleeps instead of sending part."""
+    def __init__(self, latency: float, busy_time: List[float]):
+        self.previous = None
+        self.part_count = 0
+        self.loop = get_event_loop()
+
+        self._latency = latency
+        self._busy_time = busy_time
+
+    async def _next(self, data: bytes, part: int) -> None:
+        start = perf_counter()
+        await sleep(self._latency)
+        self._busy_time.append(perf_counter() - start)
+
+async def _upload(
+        size: int, part_size: int, senders: int,
+        latency: float, pipelined: bool, read_ahead: int) -> Dict[str, float]:
+
+    oe = OpenPretender(BytesIO(get_rnd_bytes(size)),
+        AES(get_rnd_bytes(32), get_rnd_bytes(16)), size)
+
+    busy_time = []
+
+    uploader = ParallelTransferrer.__new__(ParallelTransferrer)
+    uploader.upload_ticker = 0
+    uploader.senders = [
+        _FakeUploadSender(latency, busy_time)
+        for _ in range(senders)
+    ]
+    if pipelined:
+        parts = UploadPipeline(oe, part_size, read_ahead=read_ahead)
+    else:
+        parts = stream_file(oe, part_size)
+
+    start = perf_counter()
+
+    async for part in parts:
+        await uploader.upload(part)
+
+    for sender in uploader.senders:
+        if sender.previous:
+            await sender.previous
+
+    total_time = perf_counter() - start
+
+    return {
+        'time': total_time,
+        'idle': 1 - sum(busy_time) / (total_time * senders)
+    }
+
+def bench_upload_pipeline(
+        size: int=8388608, part_size: int=524288,
+        senders: int=4, latency: float=0.05,
+        read_ahead: int=4) -> Dict[str, Dict[str, float]]:
+    """
+    Will "upload" ``size`` random bytes with and without
+    ``UploadPipeline`` and return results as
+    ``{'sequential'|'pipelined': {'time': sec, 'idle': ratio}}``,
+    where ``idle`` is the share of time senders were idle.
+
+    Arguments:
+        size (``int``, optional):
+            Size of the file to upload.
+
+        part_size (``int``, optional):
+            Size of one upload part.
+
+        senders (``int``, optional):
+            Amount of fake ``UploadSender``.
+
+        latency (``float``, optional):
+            Seconds that one part takes to upload.
+
+        read_ahead (``int``, optional):
+            ``read_ahead`` of the ``UploadPipeline``.
+    """
+    return {
+        mode: run(_upload(size, part_size, senders,
+            latency, mode == 'pipelined', read_ahead))
+        for mode in ('sequential', 'pipelined')
+    }
+
+if __name__ == '__main__':
+    size = int(float(argv[1]) * 1048576) if len(argv) > 1 else 8388608
+    latency = float(argv[2]) if len(argv) > 2 else 0.05
+
+    print(f'File: {size} bytes, latency per part: {latency}s')
+    for mode, result in bench_upload_pipeline(size, latency=latency).items():
+        print(
+            f'{mode:>12}: {result["time"]:.2f}s, '
+            f'senders idle {result["idle"]*100:.1f}% of time'
+        )
@@ -7,7 +7,7 @@ from pyaes.util import (
     append_PKCS7_padding,
     strip_PKCS7_padding
 )
-from .errors import ModeInvalid
+from .errors import ModeInvalid, AESError
 try:
     from cryptography.hazmat.primitives.ciphers\
         import Cipher, algorithms, modes
@@ -15,8 +15,10 @@ try:
 except ModuleNotFoundError:
     # We can use PyAES if there is no cryptography library.
     # PyAES is much slower. You can use it for quick tests.
-    from pyaes import AESModeOfOperationCBC
     FAST_ENCRYPTION = False
+
+# PyAES is always installed as Telethon depends on it.
+from pyaes import AESModeOfOperationCBC, AES as PyaesAES
 try:
     # Check if cryptg is installed.
     from cryptg import __name__ as _
@@ -27,12 +29,26 @@ except ModuleNotFoundError:
 
 __all__ = [
     'AESwState',
+    'AESContext',
+    'AES_BACKENDS',
+    'get_aes_backend',
+    'set_aes_backend',
     'get_rnd_bytes',
     'FAST_TELETHON',
     'FAST_ENCRYPTION'
 ]
+class _PyaesPreparedCBC(AESModeOfOperationCBC):
+    """``AESModeOfOperationCBC`` with already expanded key."""
+    def __init__(self, aes: PyaesAES, iv: bytes): # pylint: disable=super-init-not-called
+        if len(iv) != 16:
+            raise ValueError('initialization vector must be 16 bytes')
+
+        self._aes, self._last_cipherblock = aes, iv
+
 class _PyaesState:
-    def __init__(self, key: Union[bytes, 'Key'], iv: Union[bytes, memoryview]):
+    def __init__(
+            self, key: Union[bytes, 'Key'], iv: Union[bytes, memoryview],
+            prepared: Optional[PyaesAES] = None):
         """
         Class to wrap ``pyaes.AESModeOfOperationCBC``
         if there is no ``FAST_ENCRYPTION``.
@@ -47,54 +63,234 @@ class _PyaesState:
 
             iv (``bytes``):
                 AES Initialization Vector.
+
+            prepared (``pyaes.AES``, optional):
+                Result of ``prepare_key(key)``. Key
+                expansion will be skipped if specified.
         """
         key = key.key if hasattr(key, 'key') else key
 
-        self._aes_state = AESModeOfOperationCBC(
-            key = bytes(key), iv = bytes(iv)
-        )
+        if prepared is None:
+            prepared = self.prepare_key(key)
+
+        self._aes_state = _PyaesPreparedCBC(prepared, bytes(iv))
         self.__mode = None # encrypt mode is 1 and decrypt is 2
 
     @staticmethod
-    def __convert_memoryview(data: Union[bytes, memoryview]) -> bytes:
-        # PyAES doesn't support memoryview, convert to bytes
-        if isinstance(data, memoryview) and not FAST_ENCRYPTION:
-            data = data.tobytes()
-        return data
+    def prepare_key(key: Union[bytes, 'Key']) -> PyaesAES:
+        """Returns ``pyaes.AES`` with expanded ``key``."""
+        key = key.key if hasattr(key, 'key') else key
+        return PyaesAES(bytes(key))
 
+    @staticmethod
+    def __process_into(
+            data: Union[bytes, memoryview],
+            out: Union[bytearray, memoryview], func) -> int:
+        # We move over ``data`` by offsets and write every
+        # block directly into ``out``, so work is linear to
+        # the data size. PyAES doesn't support memoryview, so
+        # we convert to bytes only one 16-byte block at a time.
+        data, out = memoryview(data), memoryview(out)
+        assert not len(data) % 16
+
+        for offset in range(0, len(data), 16):
+            out[offset:offset+16] = func(bytes(data[offset:offset+16]))
+
+        return len(data)
+
+    def __check_mode(self, mode: int) -> None:
+        if not self.__mode:
+            self.__mode = mode
+        elif self.__mode != mode:
+            raise ModeInvalid(
+                'You should use only {0} function.'.format(
+                    'decrypt' if self.__mode == 2 else 'encrypt')
+            )
     def encrypt(self, data: Union[bytes, memoryview]) -> bytes:
         """``data`` length must be divisible by 16."""
-        if not self.__mode:
-            self.__mode = 1
-        else:
-            if self.__mode != 1:
-                raise ModeInvalid('You should use only decrypt function.')
+        total = bytearray(len(data))
+        self.encrypt_into(data, total)
+        return bytes(total)
 
-        data = self.__convert_memoryview(data)
-        assert not len(data) % 16; total = b''
+    def decrypt(self, data: Union[bytes, memoryview]) -> bytes:
+        """``data`` length must be divisible by 16."""
+        total = bytearray(len(data))
+        self.decrypt_into(data, total)
+        return bytes(total)
 
-        for _ in range(len(data) // 16):
-            total += self._aes_state.encrypt(data[:16])
-            data = data[16:]
+    def encrypt_into(
+            self, data: Union[bytes, memoryview],
+            out: Union[bytearray, memoryview]) -> int:
+        """
+        Encrypts ``data`` into ``out`` and returns amount of
+        written bytes. ``data`` length must be divisible by 16.
+        """
+        self.__check_mode(1)
+        return self.__process_into(data, out, self._aes_state.encrypt)
 
-        return total
+    def decrypt_into(
+            self, data: Union[bytes, memoryview],
+            out: Union[bytearray, memoryview]) -> int:
+        """
+        Decrypts ``data`` into ``out`` and returns amount of
+        written bytes. ``data`` length must be divisible by 16.
+        """
+        self.__check_mode(2)
+        return self.__process_into(data, out, self._aes_state.decrypt)
+
+class _CryptographyState:
+    def __init__(
+            self, key: Union[bytes, 'Key'], iv: Union[bytes, memoryview],
+            prepared: Optional['algorithms.AES'] = None):
+        """
+        Class to wrap ``cryptography`` AES CBC
+        if there is ``FAST_ENCRYPTION``.
+
+        .. note::
+            You should use only ``encrypt()`` or
+            ``decrypt()`` method per one object.
+
+        Arguments:
+            key (``bytes``, ``Key``):
+                AES encryption/decryption Key.
+
+            iv (``bytes``):
+                AES Initialization Vector.
+
+            prepared (``algorithms.AES``, optional):
+                Result of ``prepare_key(key)``.
+        """
+        if prepared is None:
+            prepared = self.prepare_key(key)
+
+        self._aes_cbc = Cipher(prepared, modes.CBC(bytes(iv)))
+        self._aes_state = None
+        self.__mode = None # encrypt mode is 1 and decrypt is 2
+
+    @staticmethod
+    def prepare_key(key: Union[bytes, 'Key']) -> 'algorithms.AES':
+        """Returns ``algorithms.AES`` with validated ``key``."""
+        key = key.key if hasattr(key, 'key') else key
+        return algorithms.AES(bytes(key))
+
+    def __check_mode(self, mode: int) -> None:
+        if not self.__mode:
+            self.__mode = mode
+
+            if mode == 1:
+                self._aes_state = self._aes_cbc.encryptor()
+            else:
+                self._aes_state = self._aes_cbc.decryptor()
+
+        elif self.__mode != mode:
+            raise ModeInvalid(
+                'You should use only {0} function.'.format(
+                    'decrypt' if self.__mode == 2 else 'encrypt')
+            )
+    def __update_into(
+            self, data: Union[bytes, memoryview],
+            out: Union[bytearray, memoryview]) -> int:
+        # The ``update_into`` require ``out`` to be at least
+        # ``len(data) + 15`` bytes. If caller buffer doesn't
+        # have such space, we will fallback to the ``update``.
+        out = memoryview(out)
+        if len(out) >= len(data) + 15:
+            return self._aes_state.update_into(data, out)
+
+        data = self._aes_state.update(data)
+        out[:len(data)] = data
+        return len(data)
+
+    def encrypt(self, data: Union[bytes, memoryview]) -> bytes:
+        """``data`` length must be divisible by 16."""
+        self.__check_mode(1)
+        return self._aes_state.update(data)
 
     def decrypt(self, data: Union[bytes, memoryview]) -> bytes:
         """``data`` length must be divisible by 16."""
-        if not self.__mode:
-            self.__mode = 2
-        else:
-            if self.__mode != 2:
-                raise ModeInvalid('You should use only encrypt function.')
+        self.__check_mode(2)
+        return self._aes_state.update(data)
 
-        data = self.__convert_memoryview(data)
-        assert not len(data) % 16; total = b''
+    def encrypt_into(
+            self, data: Union[bytes, memoryview],
+            out: Union[bytearray, memoryview]) -> int:
+        """
+        Encrypts ``data`` into ``out`` and returns amount of
+        written bytes. ``data`` length must be divisible by 16.
+        """
+        self.__check_mode(1)
+        return self.__update_into(data, out)
+
+    def decrypt_into(
+            self, data: Union[bytes, memoryview],
+            out: Union[bytearray, memoryview]) -> int:
+        """
+        Decrypts ``data`` into ``out`` and returns amount of
+        written bytes. ``data`` length must be divisible by 16.
+        """
+        self.__check_mode(2)
+        return self.__update_into(data, out)
+
+# All AES CBC backends that can be used by the ``AESwState``,
+# where key is a backend name and value is a state class.
+AES_BACKENDS = {'pyaes': _PyaesState}
+
+if FAST_ENCRYPTION:
+    AES_BACKENDS['cryptography'] = _CryptographyState
+
+_AES_BACKEND = 'cryptography' if FAST_ENCRYPTION else 'pyaes'
+
+def get_aes_backend() -> str:
+    """
+    Returns name of the AES backend that
+    ``AESwState`` currently use. This is
+    ``'cryptography'`` if it's installed
+    and ``'pyaes'`` otherwise.
+    """
+    return _AES_BACKEND
+
+def set_aes_backend(backend: str) -> None:
+    """
+    Forces ``AESwState`` to use specified AES backend.
+    This will affect only ``AESwState`` objects that
+    will be created after this function call.
+
+    Arguments:
+        backend (``str``):
+            Name of backend. See ``AES_BACKENDS``
+            for all available on this system.
+    """
+    global _AES_BACKEND
+
+    if backend not in AES_BACKENDS:
+        raise AESError(
+            f'Backend {backend} is unavailable. '
+            f'Available: {tuple(AES_BACKENDS)}'
+        )
+    _AES_BACKEND = backend
+
+class AESContext:
+    """
+    Prepared AES key. Key setup (i.e key expansion
+    with PyAES) is made only once per AES backend and
+    then reused by every ``AESwState`` with this key.
 
-        for _ in range(len(data) // 16):
-            total += self._aes_state.decrypt(data[:16])
-            data = data[16:]
+    You can specify it instead of key to the ``AESwState``.
+    """
+    def __init__(self, key: Union[bytes, 'Key']):
+        """
+        Arguments:
+            key (``bytes``, ``Key``):
+                AES encryption/decryption Key.
+        """
+        self.key = key.key if hasattr(key, 'key') else key
+        self._prepared = {}
 
-        return total
+    def prepare(self, backend: str):
+        """Returns prepared key for the specified backend."""
+        if backend not in self._prepared:
+            self._prepared[backend] = AES_BACKENDS[backend].prepare_key(self.key)
+        return self._prepared[backend]
 
 class AESwState:
     def __init__(
@@ -109,7 +305,7 @@ class AESwState:
             ``decrypt()`` method per one object.
 
         Arguments:
-            key (``bytes``, ``Key``):
+            key (``bytes``, ``Key``, ``AESContext``):
                 AES encryption/decryption Key.
 
             iv (``bytes``, optional):
@@ -123,22 +319,15 @@ class AESwState:
                 isn't specified, will be used
                 first 16 bytes of ciphertext.
         """
+        self._context = key if isinstance(key, AESContext) else None
+
         self.key = key.key if hasattr(key, 'key') else key
         self.iv, self.__mode, self._aes_cbc = iv, None, None
         self.__iv_concated = False
 
-    def __init_aes_state(self, mode: int) -> None:
-        if FAST_ENCRYPTION:
-            self._aes_cbc = Cipher(algorithms.AES(self.key), modes.CBC(self.iv))
-
-            if mode == 1: # Encryption
-                self._aes_cbc = self._aes_cbc.encryptor()
-                setattr(self._aes_cbc, 'encrypt', self._aes_cbc.update)
-            else: # Decryption
-                self._aes_cbc = self._aes_cbc.decryptor()
-                setattr(self._aes_cbc, 'decrypt', self._aes_cbc.update)
-        else:
-            self._aes_cbc = _PyaesState(self.key, self.iv)
+    def __init_aes_state(self) -> None:
+        prepared = self._context.prepare(_AES_BACKEND) if self._context else None
+        self._aes_cbc = AES_BACKENDS[_AES_BACKEND](self.key, self.iv, prepared)
 
     @property
     def mode(self) -> int:
@@ -159,7 +348,7 @@ class AESwState:
             self.__mode = 1
 
             if not self.iv: self.iv = urandom(16)
-            self.__init_aes_state(self.__mode)
+            self.__init_aes_state()
         else:
             if self.__mode != 1:
                 raise ModeInvalid('You should use only decrypt method.')
@@ -185,7 +374,7 @@ class AESwState:
 
             if not self.iv:
                 self.iv, data = data[:16], data[16:]
-            self.__init_aes_state(self.__mode)
+            self.__init_aes_state()
         else:
             if self.__mode != 2:
                 raise ModeInvalid('You should use only encrypt method.')
@@ -194,6 +383,88 @@ class AESwState:
         if unpad: data = strip_PKCS7_padding(data)
         return data
 
+    def encrypt_into(
+            self, data: Union[bytes, bytearray, memoryview],
+            out: Union[bytearray, memoryview],
+            pad: bool=True, concat_iv: bool=True) -> int:
+        """
+        Encrypts ``data`` with AES CBC into caller's
+        ``out`` buffer and returns amount of written bytes.
+        Accepts any object with the buffer protocol.
+
+        If ``concat_iv`` is ``True``, then first 16
+        bytes written to the ``out`` will be IV.
+
+        ``out`` should be big enough to hold ciphertext with
+        IV and padding. With ``cryptography`` backend it's
+        better to have an extra 15 bytes, otherwise it
+        will make an intermediate copy of data.
+        """
+        if not self.__mode:
+            self.__mode = 1
+
+            if not self.iv: self.iv = urandom(16)
+            self.__init_aes_state()
+        else:
+            if self.__mode != 1:
+                raise ModeInvalid('You should use only decrypt method.')
+
+        data, out = memoryview(data), memoryview(out)
+        written = 0
+
+        if concat_iv and not self.__iv_concated:
+            self.__iv_concated = True
+            out[:16] = self.iv; written = 16
+
+        if pad:
+            aligned = len(data) - len(data) % 16
+            written += self._aes_cbc.encrypt_into(data[:aligned], out[written:])
+
+            # Only the last, padded block is copied here
+            last_block = append_PKCS7_padding(bytes(data[aligned:]))
+            written += self._aes_cbc.encrypt_into(last_block, out[written:])
+        else:
+            written += self._aes_cbc.encrypt_into(data, out[written:])
+
+        return written
+
+    def decrypt_into(
+            self, data: Union[bytes, bytearray, memoryview],
+            out: Union[bytearray, memoryview],
+            unpad: bool=True) -> int:
+        """
+        Decrypts ``data`` with AES CBC into caller's
+        ``out`` buffer and returns amount of written
+        plaintext bytes (without padding if ``unpad``).
+        Accepts any object with the buffer protocol.
+
+        ``data`` length must must be evenly divisible by 16.
+        With ``cryptography`` backend it's better for ``out``
+        to have an extra 15 bytes, otherwise it will make
+        an intermediate copy of data.
+        """
+        data, out = memoryview(data), memoryview(out)
+
+        if not self.__mode:
+            self.__mode = 2
+
+            if not self.iv:
+                self.iv, data = bytes(data[:16]), data[16:]
+            self.__init_aes_state()
+        else:
+            if self.__mode != 2:
+                raise ModeInvalid('You should use only encrypt method.')
+
+        written = self._aes_cbc.decrypt_into(data, out)
+
+        if unpad and written:
+            padding = out[written-1]
+            if padding > 16:
+                raise ValueError('invalid padding byte')
+            written -= padding
+
+        return written
+
 def get_rnd_bytes(length: int=32) -> bytes:
     """Returns ``os.urandom(length)``."""
     return urandom(length)
@@ -24,6 +24,7 @@ __all__ = [
     'FFMPEG',
     'ABSPATH',
     'DOWNLOAD_PATH',
+    'DB_PROFILE',
     'PYINSTALLER_DATA'
 ]
 class Limits(IntEnum):
@@ -52,7 +53,8 @@ class Scrypt(IntEnum):
     SALT: int=0x37CE65C834C6EFE05DFAD02413C0950072A1FE3ED48A33368333848D9C782167
     # You can change any Scrypt params. Please note that by default resulted
     # key will be hashed with sha256, so BaseKey is always 32-byte.
-    # Default is balanced to use 1GB of RAM.
+    # Default is balanced to use 1GB of RAM. Run ``python -m tgbox.bench.kdf``
+    # to measure time and memory of other values on your machine.
     DKLEN: int=32
     N:     int=2**20
     R:     int=8
@@ -61,6 +63,11 @@ class Scrypt(IntEnum):
 # Path that will be used to save downloaded files.
 DOWNLOAD_PATH: Path=Path('DownloadsTGBOX')
 
+# SQLite profile of the LocalBox, see api.db.DB_PROFILES. It's
+# also stored to the existing DBs on upgrade, so we keep SQLite
+# defaults here; WAL profiles are opt-in (db_profile=...).
+DB_PROFILE: str='durable'
+
 VERSION: str=__version__
 VERBYTE: bytes=b'\x01'
 
@@ -24,6 +24,7 @@ from typing import (
     DefaultDict, Tuple
 )
 from collections import defaultdict
+from concurrent.futures import Executor
 
 from telethon.tl.functions.auth import (
     ExportAuthorizationRequest,
@@ -109,35 +110,36 @@ class UploadSender:
     sender: MTProtoSender
     request: Union[SaveFilePartRequest, SaveBigFilePartRequest]
     part_count: int
-    stride: int
     previous: Optional[asyncio.Task]
     loop: asyncio.AbstractEventLoop
 
     def __init__(self, client: TelegramClient, sender: MTProtoSender, file_id: int, part_count: int, big: bool,
-                 index: int,
-                 stride: int, loop: asyncio.AbstractEventLoop) -> None:
+                 loop: asyncio.AbstractEventLoop) -> None:
         self.client = client
         self.sender = sender
         self.part_count = part_count
         if big:
-            self.request = SaveBigFilePartRequest(file_id, index, part_count, b"")
+            self.request = SaveBigFilePartRequest(file_id, 0, part_count, b"")
         else:
-            self.request = SaveFilePartRequest(file_id, index, b"")
-        self.stride = stride
+            self.request = SaveFilePartRequest(file_id, 0, b"")
         self.previous = None
         self.loop = loop
 
-    async def next(self, data: bytes) -> None:
+    @property
+    def busy(self) -> bool:
+        return bool(self.previous and not self.previous.done())
+
+    async def next(self, data: bytes, part: int) -> None:
         if self.previous:
             await self.previous
-        self.previous = self.loop.create_task(self._next(data))
+        self.previous = self.loop.create_task(self._next(data, part))
 
-    async def _next(self, data: bytes) -> None:
+    async def _next(self, data: bytes, part: int) -> None:
+        self.request.file_part = part
         self.request.bytes = data
-        log.debug(f"Sending file part {self.request.file_part}/{self.part_count}"
+        log.debug(f"Sending file part {part}/{self.part_count}"
                   f" with {len(data)} bytes")
         await self.client._call(self.sender, self.request)
-        self.request.file_part += self.stride
 
     async def disconnect(self) -> None:
         if self.previous:
@@ -230,15 +232,15 @@ class ParallelTransferrer:
     async def _init_upload(self, connections: int, file_id: int, part_count: int, big: bool
                            ) -> None:
         self.senders = [
-            await self._create_upload_sender(file_id, part_count, big, 0, connections),
+            await self._create_upload_sender(file_id, part_count, big),
             *await asyncio.gather(
-                *[self._create_upload_sender(file_id, part_count, big, i, connections)
-                  for i in range(1, connections)])
+                *[self._create_upload_sender(file_id, part_count, big)
+                  for _ in range(1, connections)])
         ]
 
-    async def _create_upload_sender(self, file_id: int, part_count: int, big: bool, index: int,
-                                    stride: int) -> UploadSender:
-        return UploadSender(self.client, await self._create_sender(), file_id, part_count, big, index, stride,
+    async def _create_upload_sender(self, file_id: int, part_count: int, big: bool
+                                    ) -> UploadSender:
+        return UploadSender(self.client, await self._create_sender(), file_id, part_count, big,
                             loop=self.loop)
 
     async def _create_sender(self) -> MTProtoSender:
@@ -267,8 +269,17 @@ class ParallelTransferrer:
         return part_size, part_count, is_large
 
     async def upload(self, part: bytes) -> None:
-        await self.senders[self.upload_ticker].next(part)
-        self.upload_ticker = (self.upload_ticker + 1) % len(self.senders)
+        # Part goes to the first sender that is free, so one
+        # slow connection doesn't hold all the other ones.
+        while all(sender.busy for sender in self.senders):
+            await asyncio.wait(
+                [sender.previous for sender in self.senders],
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        sender = next(sender for sender in self.senders if not sender.busy)
+
+        await sender.next(part, self.upload_ticker)
+        self.upload_ticker += 1
 
     async def finish_upload(self) -> None:
         await self._cleanup()
@@ -328,6 +339,96 @@ async def stream_file(
         else:
             break
 
+class UploadPipeline:
+    """
+    Reads (and encrypts, if it's ``OpenPretender``) parts
+    of file in the worker thread ahead of the uploading, so
+    network doesn't wait for disk and crypto and vice versa.
+
+    Parts are stored in the bounded queue, so there is no
+    more than ``read_ahead`` parts or ``max_memory`` bytes
+    that are read but not uploaded yet.
+    """
+    def __init__(
+            self, file: BinaryIO,
+            chunk_size: int = 524288,
+            read_ahead: int = 4,
+            max_memory: int = 16777216,
+            executor: Optional[Executor] = None
+        ) -> None:
+        """
+        Arguments:
+            file (``BinaryIO``):
+                File-like object to read. ``read`` can be
+                coroutine, then it will be awaited on loop.
+
+            chunk_size (``int``, optional):
+                Size of one read from ``file``.
+
+            read_ahead (``int``, optional):
+                Max amount of chunks that will be
+                read before they will be uploaded.
+
+            max_memory (``int``, optional):
+                Max amount of bytes that all read
+                ahead chunks can take in memory.
+
+            executor (``Executor``, optional):
+                Executor to read file in. Will be used
+                the default loop executor if not specified.
+        """
+        self._file = file
+        self._chunk_size = chunk_size
+        self._executor = executor
+
+        self._read_ahead = max(1, min(read_ahead, max_memory // chunk_size))
+        self._queue = asyncio.Queue(maxsize=self._read_ahead)
+
+    def _read_function(self) -> Tuple[callable, bool]:
+        if hasattr(self._file, 'read_blocking') and self._file.blocking:
+            return self._file.read_blocking, True
+
+        if inspect.iscoroutinefunction(self._file.read):
+            return self._file.read, False
+
+        return self._file.read, True
+
+    async def _produce(self) -> None:
+        read, blocking = self._read_function()
+        loop = asyncio.get_event_loop()
+        try:
+            while True:
+                if blocking:
+                    chunk = await loop.run_in_executor(
+                        self._executor, read, self._chunk_size)
+                else:
+                    chunk = await read(self._chunk_size)
+
+                if not chunk:
+                    break
+
+                await self._queue.put(chunk)
+
+            await self._queue.put(None)
+        except Exception as e:
+            await self._queue.put(e)
+
+    async def __aiter__(self) -> AsyncGenerator[bytes, None]:
+        producer = asyncio.get_event_loop().create_task(self._produce())
+        try:
+            while True:
+                chunk = await self._queue.get()
+
+                if chunk is None:
+                    break
+
+                if isinstance(chunk, Exception):
+                    raise chunk
+
+                yield chunk
+        finally:
+            producer.cancel()
+
 async def _internal_transfer_to_telegram(
         client: TelegramClient,
         response: BinaryIO,
@@ -335,6 +436,8 @@ async def _internal_transfer_to_telegram(
         file_size: int = None,
         file_name: str = 'document',
         part_size_kb: int = 512,
+        read_ahead: int = 4,
+        max_read_ahead_memory: int = 16777216,
     ) -> Tuple[TypeInputFile, int]:
 
     file_id = helpers.generate_random_long()
@@ -355,10 +458,18 @@ async def _internal_transfer_to_telegram(
     else:
         part_size = part_size_kb*1024
 
-    buffer = bytearray()
-    async for data in stream_file(response, part_size):
+    pipeline = UploadPipeline(
+        response, part_size,
+        read_ahead=read_ahead,
+        max_memory=max_read_ahead_memory
+    )
+    buffer, position = bytearray(), 0
+
+    async for data in pipeline:
+        position += len(data)
+
         if progress_callback:
-            r = progress_callback(response.tell(), file_size)
+            r = progress_callback(position, file_size)
             if inspect.isawaitable(r):
                 await r
 
@@ -433,12 +544,20 @@ async def upload_file(
         progress_callback: callable = None,
         file_name: str = 'document',
         file_size: int = None,
-        part_size_kb: int = 512
+        part_size_kb: int = 512,
+        read_ahead: int = 4,
+        max_read_ahead_memory: int = 16777216
         ) -> TypeInputFile:
-
+    """
+    ``file`` is read in the worker thread (if its ``read``
+    isn't coroutine) up to ``read_ahead`` parts ahead, but
+    not more than ``max_read_ahead_memory`` bytes.
+    """
     return (await _internal_transfer_to_telegram(
         client, file, progress_callback,
         file_size = file_size,
         file_name = file_name,
-        part_size_kb = part_size_kb
+        part_size_kb = part_size_kb,
+        read_ahead = read_ahead,
+        max_read_ahead_memory = max_read_ahead_memory
         ))[0]
@@ -1,8 +1,13 @@
 """This module stores all keys and keys making functions."""
 
-from os import urandom
+from os import urandom, cpu_count
 from random import SystemRandom
 
+from asyncio import get_event_loop, CancelledError
+from threading import Lock
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 from hashlib import sha256
 try:
     from hashlib import scrypt
@@ -17,9 +22,11 @@ from base64 import (
     urlsafe_b64encode,
     urlsafe_b64decode
 )
+from collections import OrderedDict
+
 from .errors import IncorrectKey
 from .defaults import Scrypt, WORDS_PATH
-from .crypto import AESwState as AES, FAST_ENCRYPTION
+from .crypto import AESwState as AES, AESContext, FAST_ENCRYPTION
 
 if FAST_ENCRYPTION: # Is faster and more secure
     from cryptography.hazmat.primitives.asymmetric import ec
@@ -40,7 +47,10 @@ __all__ = [
     'ImportKey',
     'FileKey',
     'EncryptedMainkey',
+    'CryptoContext',
     'make_basekey',
+    'make_basekey_async',
+    'set_kdf_pool',
     'make_mainkey',
     'make_filekey',
     'make_requestkey',
@@ -270,6 +280,95 @@ class EncryptedMainkey(Key):
     def __init__(self, key: bytes):
         super().__init__(key, 7)
 
+class CryptoContext:
+    """
+    Bounded LRU cache of crypto setup for one Box. It
+    memoizes ``FileKey`` derived from ``MainKey`` by
+    the FileSalt and prepared ``AESContext`` by key, so
+    iterating over many files will not repeat this work.
+
+    Every ``DecryptedLocalBox`` and ``DecryptedRemoteBox``
+    have own ``CryptoContext`` and share it with all of
+    their decrypted files and directories.
+    """
+    def __init__(self, mainkey: Optional[MainKey] = None, maxsize: int=4096):
+        """
+        Arguments:
+            mainkey (``MainKey``, optional):
+                ``MainKey`` of Box. Must be specified
+                if you want to use ``filekey()``.
+
+            maxsize (``int``, optional):
+                Max amount of ``FileKey`` and ``AESContext``
+                (each) that will be cached. Least recently
+                used will be removed first.
+        """
+        self._mainkey = mainkey
+        self._maxsize = maxsize
+
+        self._filekeys = OrderedDict()
+        self._contexts = OrderedDict()
+
+    def __cache_get(self, cache: OrderedDict, key: bytes, make: callable):
+        try:
+            cache.move_to_end(key)
+            return cache[key]
+        except KeyError:
+            value = cache[key] = make()
+
+            if len(cache) > self._maxsize:
+                cache.popitem(last=False)
+
+            return value
+
+    @property
+    def mainkey(self) -> Union[MainKey, None]:
+        """Returns ``MainKey`` of this context"""
+        return self._mainkey
+
+    def suits(self, mainkey: Optional[MainKey]) -> bool:
+        """
+        Returns ``True`` if this context can be
+        used by file or box with the ``mainkey``.
+        """
+        if mainkey is None:
+            return True
+
+        if self._mainkey is None:
+            return False
+
+        return self._mainkey.key == mainkey.key
+
+    def filekey(self, file_salt: bytes) -> FileKey:
+        """
+        Returns ``make_filekey(mainkey, file_salt)``
+        from cache or makes and caches it.
+        """
+        if not self._mainkey:
+            raise ValueError('CryptoContext was created without MainKey')
+
+        return self.__cache_get(self._filekeys, bytes(file_salt),
+            lambda: make_filekey(self._mainkey, file_salt))
+
+    def aes(
+            self, key: Optional[Union[bytes, Key]] = None,
+            iv: Optional[bytes] = None) -> AES:
+        """
+        Returns new ``AESwState`` with prepared ``AESContext``
+        of ``key``. The ``MainKey`` will be used if ``key``
+        is not specified.
+        """
+        key = key if key is not None else self._mainkey
+        key = key.key if hasattr(key, 'key') else bytes(key)
+
+        return AES(self.__cache_get(
+            self._contexts, key, lambda: AESContext(key)), iv)
+
+    def clear(self) -> None:
+        """Removes everything from cache."""
+        self._filekeys.clear()
+        self._contexts.clear()
+
 def make_basekey(
         phrase: Union[bytes, Phrase],
         *,
@@ -319,6 +418,158 @@ def make_basekey(
     )
     return BaseKey(sha256(scrypt_key).digest())
 
+def _get_physical_memory() -> Optional[int]:
+    try:
+        from os import sysconf
+        return sysconf('SC_PHYS_PAGES') * sysconf('SC_PAGE_SIZE')
+    except (ImportError, ValueError, OSError):
+        return None # Not supported on this system (e.g Windows)
+
+class _KDFMemoryLimiter:
+    """
+    Counts memory of running scrypt tasks. It's thread-safe
+    and doesn't bind to event loop, so the same limiter can
+    be used from many loops. Task that requires more
+    than ``max_memory`` runs only if nothing else is running.
+    """
+    def __init__(self, max_memory: Optional[int] = None):
+        self.max_memory = max_memory
+
+        self._used, self._lock = 0, Lock()
+        self._waiters = [] # [(memory, loop, future), ...]
+
+    def __can_run(self, memory: int) -> bool:
+        if not self.max_memory or not self._used:
+            return True
+        return self._used + memory <= self.max_memory
+
+    async def acquire(self, memory: int) -> None:
+        loop = get_event_loop()
+
+        with self._lock:
+            if not self._waiters and self.__can_run(memory):
+                self._used += memory
+                return
+
+            future = loop.create_future()
+            waiter = (memory, loop, future)
+            self._waiters.append(waiter)
+        try:
+            await future
+        except CancelledError:
+            with self._lock:
+                granted = waiter not in self._waiters
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                self.release(memory)
+            raise
+
+    @staticmethod
+    def __wake_up(future) -> None:
+        if not future.done():
+            future.set_result(None)
+
+    def release(self, memory: int) -> None:
+        with self._lock:
+            self._used -= memory
+
+            # We wake up waiters in order, so big
+            # task will not wait forever for small ones
+            while self._waiters and self.__can_run(self._waiters[0][0]):
+                memory, loop, future = self._waiters.pop(0)
+                self._used += memory
+                loop.call_soon_threadsafe(self.__wake_up, future)
+
+_KDF_POOL: Optional[ProcessPoolExecutor] = None
+_KDF_POOL_WORKERS: int = min(cpu_count() or 1, 4)
+
+# By default, all concurrent scrypt tasks can't take
+# more than half of physical memory of this machine.
+_KDF_LIMITER = _KDFMemoryLimiter(
+    (_get_physical_memory() or 0) // 2 or None
+)
+
+def set_kdf_pool(
+        max_workers: Optional[int] = None,
+        max_memory: Optional[int] = None) -> None:
+    """
+    Configures the ``ProcessPoolExecutor`` that is used
+    by the ``make_basekey_async``. Current pool will be shut
+    down (after running tasks) and a new one will be created
+    on the next ``make_basekey_async`` call.
+
+    Arguments:
+        max_workers (``int``, optional):
+            Max amount of processes. By default is
+            amount of CPU cores, but no more than 4.
+
+        max_memory (``int``, optional):
+            Max amount of bytes that all concurrent scrypt
+            tasks can take. Every task takes approximately
+            ``128 * r * (n + p + 2)`` bytes, others will wait
+            in the queue. By default is a half of physical memory.
+    """
+    global _KDF_POOL, _KDF_POOL_WORKERS
+
+    if _KDF_POOL:
+        _KDF_POOL.shutdown(wait=False)
+        _KDF_POOL = None
+
+    if max_workers:
+        _KDF_POOL_WORKERS = max_workers
+    if max_memory:
+        _KDF_LIMITER.max_memory = max_memory
+
+async def make_basekey_async(
+        phrase: Union[bytes, Phrase],
+        *,
+        salt: Union[bytes, int] = Scrypt.SALT,
+        n: Optional[int] = Scrypt.N,
+        r: Optional[int] = Scrypt.R,
+        p: Optional[int] = Scrypt.P,
+        dklen: Optional[int] = Scrypt.DKLEN) -> BaseKey:
+    """
+    Same as ``make_basekey`` but will run scrypt in the
+    process pool, so it doesn't block event loop. You
+    can configure pool with the ``set_kdf_pool``.
+
+    Arguments:
+        phrase (``bytes``, ``Phrase``):
+            Passphrase from which
+            ``BaseKey`` will be created.
+
+        salt (``bytes``, ``int``, optional):
+            Scrypt Salt.
+
+        n (``int``, optional):
+            Scrypt N.
+
+        r (``int``, optional):
+            Scrypt R.
+
+        p (``int``, optional):
+            Scrypt P.
+
+        dklen (``int``, optional):
+            Scrypt dklen.
+    """
+    global _KDF_POOL
+
+    if not _KDF_POOL:
+        _KDF_POOL = ProcessPoolExecutor(max_workers=_KDF_POOL_WORKERS)
+
+    maxmem = 128 * r * (n + p + 2)
+
+    await _KDF_LIMITER.acquire(maxmem)
+    try:
+        return await get_event_loop().run_in_executor(
+            _KDF_POOL, partial(make_basekey, phrase,
+                salt=salt, n=n, r=r, p=p, dklen=dklen)
+        )
+    finally:
+        _KDF_LIMITER.release(maxmem)
+
 def make_mainkey(basekey: BaseKey, box_salt: bytes) -> MainKey:
     """
     Function for retrieving mainkey.
@@ -1,20 +1,36 @@
 """This module stores utils required by API."""
 
 try:
-    from regex import search as re_search
+    from regex import search as re_search, compile as re_compile
 except ImportError:
-    from re import search as re_search
+    from re import search as re_search, compile as re_compile
+try:
+    import numpy
+except ModuleNotFoundError:
+    # FileColumns will use the pure Python loops
+    numpy = None
 
+from array import array
 from asyncio import (
-    iscoroutine, get_event_loop
+    iscoroutinefunction,
+    get_event_loop, gather
 )
+from concurrent.futures import Executor
 from copy import deepcopy
+from base64 import urlsafe_b64encode
+from itertools import compress, repeat
+from operator import and_, ge, gt, le, lt, ne
 from pprint import pformat
 from hashlib import sha256
+from hmac import digest as hmac_digest
 from random import randrange
 
 from subprocess import PIPE, run as subprocess_run
-from typing import BinaryIO, Optional, Dict, Generator
+from typing import (
+    BinaryIO, Optional, Dict, Iterable,
+    Generator, Union, List, Tuple, Callable
+)
+from collections.abc import MutableMapping
 
 from io import BytesIO
 from os import PathLike
@@ -28,14 +44,17 @@ from .errors import (
     DurationImpossible
 )
 from .defaults import FFMPEG
-from .keys import FileKey, MainKey
+from .keys import Key, FileKey, MainKey
 from .crypto import AESwState as AES
 
 __all__ = [
     'prbg', 'anext',
     'SearchFilter',
+    'BlindIndex',
+    'FileColumns',
     'OpenPretender',
     'PackedAttributes',
+    'decrypt_cbc_parallel',
     'int_to_bytes',
     'bytes_to_int',
     'get_media_duration',
@@ -138,6 +157,8 @@ class SearchFilter:
             so *filter* ``cattrs={b'comment': b'hi(.)'}`` will match.
 
         * **file_path** *pathlib.Path*, *str*
+        * **directory** *pathlib.Path*, *str*: File should be in
+          this directory or in any of its subdirectories
         * **file_name** *bytes*: File name
         * **file_salt** *bytes*: File salt
         * **verbyte**   *bytes*: File version byte
@@ -159,6 +180,7 @@ class SearchFilter:
         self.in_filters = {
             'cattrs':    _TypeList(dict),
             'file_path': _TypeList(str),
+            'directory': _TypeList(str),
             'file_name': _TypeList(str),
             'file_salt': _TypeList((bytes,str)),
             'verbyte':   _TypeList(bytes),
@@ -199,6 +221,586 @@ class SearchFilter:
                 self.ex_filters[k].append(v)
         return self
 
+    def _checks(self, filter: dict, include: bool) -> List[Tuple[int, Callable]]:
+        """
+        Returns ``(cost, check)`` of every not empty filter
+        in the ``filter``, where ``check(file, file_size,
+        file_path)`` is ``True`` if file matches it.
+        """
+        if self.in_filters['re']:
+            def tester(pattern):
+                search = re_compile(pattern).search
+                return lambda value: search(value) is not None
+        else:
+            def tester(pattern):
+                return lambda value: pattern in value
+
+        def any_of(patterns):
+            testers = tuple(tester(pattern) for pattern in patterns)
+            return lambda value: any(test(value) for test in testers)
+
+        def minimum(get, value):
+            return lambda file, size, path: get(file, size) >= value
+
+        def maximum(get, value):
+            return lambda file, size, path: get(file, size) <= value
+
+        checks = []
+
+        if filter['id']:
+            ids = set(filter['id'])
+            checks.append((0, lambda file, size, path: file.id in ids))
+
+        for name, get in (
+                ('id', lambda file, size: file.id),
+                ('size', lambda file, size: size),
+                ('time', lambda file, size: file.upload_time)):
+
+            if filter[f'min_{name}']:
+                checks.append((0, minimum(get, filter[f'min_{name}'][-1])))
+            if filter[f'max_{name}']:
+                checks.append((0, maximum(get, filter[f'max_{name}'][-1])))
+
+        if filter['imported']:
+            checks.append((0, lambda file, size, path: bool(file.imported)))
+
+        if filter['verbyte']:
+            verbytes = set(filter['verbyte'])
+            checks.append((0, lambda file, size, path: file.version_byte in verbytes))
+
+        if filter['mime']:
+            mime = any_of(filter['mime'])
+            checks.append((1, lambda file, size, path: mime(file.mime)))
+
+        if filter['file_salt']:
+            # String salts are matched with urlsafe base64 of
+            # the file salt, it's encoded once per file.
+            salt = any_of(i for i in filter['file_salt'] if isinstance(i, bytes))
+            b64_salt = any_of(i for i in filter['file_salt'] if isinstance(i, str))
+
+            checks.append((1, lambda file, size, path: salt(file.file_salt)
+                or b64_salt(urlsafe_b64encode(file.file_salt).decode())))
+
+        if filter['file_name']:
+            file_name = any_of(filter['file_name'])
+            checks.append((2, lambda file, size, path: file_name(file.file_name)))
+
+        if filter['cattrs']:
+            cattrs = tuple(
+                tuple((k, tester(v)) for k, v in cattr.items())
+                for cattr in filter['cattrs']
+            )
+            def cattr_match(file_cattrs, cattr):
+                return any(k in file_cattrs and test(file_cattrs[k]) for k, test in cattr)
+
+            # Included file should match every cattr, excluded any
+            if include:
+                checks.append((3, lambda file, size, path: not hasattr(file, '_cattrs')
+                    or all(cattr_match(file.cattrs, cattr) for cattr in cattrs)))
+            else:
+                checks.append((3, lambda file, size, path: hasattr(file, '_cattrs')
+                    and any(cattr_match(file.cattrs, cattr) for cattr in cattrs)))
+
+        if filter['file_path']:
+            file_path = any_of(str(i) for i in filter['file_path'])
+            checks.append((4, lambda file, size, path: file_path(path)))
+
+        if filter['directory']:
+            directories = tuple(Path(i) for i in filter['directory'])
+
+            def in_directories(path):
+                path = Path(path)
+                return any(i == path or i in path.parents for i in directories)
+
+            checks.append((4, lambda file, size, path: in_directories(path)))
+
+        return checks
+
+    def compile(self) -> Callable[[object, int, str], bool]:
+        """
+        Returns predicate ``(file, file_size, file_path) -> bool``
+        that is ``True`` if file matches this filter. Regular
+        expressions are compiled once and checks are ordered by
+        cost: numbers first, file name, cattrs and path last.
+        Predicate stops on the first failed check.
+
+        ``file_path`` is used only if there are ``file_path``
+        or ``directory`` filters. Predicate doesn't see further changes of the
+        ``SearchFilter``, so it should be compiled again.
+        """
+        checks = [
+            (cost, include, check)
+            for include, filter in ((True, self.in_filters), (False, self.ex_filters))
+            for cost, check in self._checks(filter, include)
+        ]
+        checks.sort(key=lambda check: check[0])
+        checks = tuple((check, include) for _, include, check in checks)
+
+        def predicate(file, file_size: int, file_path: str) -> bool:
+            for check, include in checks:
+                if check(file, file_size, file_path) is not include:
+                    return False
+            return True
+
+        return predicate
+
+class BlindIndex:
+    """
+    Makes keyed tokens (truncated HMAC-SHA256 with the key
+    derived from the ``MainKey``) of the file attributes, so
+    the LocalBox can select candidates of ``SearchFilter`` in
+    SQL without decryption. Tokens are useless without the
+    ``MainKey``, but show which files have equal attributes.
+
+    * File name and mime are split on the character trigrams, \
+      so any substring of 3+ characters can be matched;
+
+    * Size is bucketed by its bit length;
+
+    * Upload time is bucketed by intervals of the \
+      2^16, 2^20, 2^24 and 2^28 seconds.
+
+    Candidates is a superset of files that match the
+    ``SearchFilter``, so it should still be checked.
+    """
+    # Token of file with unknown attributes. Such
+    # files are always in the search candidates
+    NOT_INDEXED = b''
+
+    _TIME_LEVELS = (16, 20, 24, 28)
+    _TIME_MAX = 2**32 - 1
+
+    def __init__(self, mainkey: MainKey):
+        self._key = sha256(mainkey + b'blind_index').digest()
+
+    def _token(self, kind: bytes, value: bytes) -> bytes:
+        return hmac_digest(self._key, kind + value, 'sha256')[:16]
+
+    def _trigram_tokens(self, kind: bytes, value: str) -> set:
+        return {
+            self._token(kind, value[i:i+3].encode())
+            for i in range(len(value) - 2)
+        }
+    def _size_token(self, bit_length: int) -> bytes:
+        return self._token(b's', bytes([bit_length]))
+
+    def _time_token(self, level: int, bucket: int) -> bytes:
+        return self._token(b't', bytes([level]) + int_to_bytes(bucket))
+
+    def _time_range(self, low: int, high: int) -> Generator[bytes, None, None]:
+        """Yields tokens of buckets that cover [low, high]"""
+        while low <= high:
+            for level in reversed(self._TIME_LEVELS):
+                if not low % (1 << level) and low + (1 << level) - 1 <= high:
+                    break
+            else:
+                # Partial bucket, gives extra candidates
+                level = self._TIME_LEVELS[0]
+
+            yield self._time_token(level, low >> level)
+            low = ((low >> level) + 1) << level
+
+    def file_tokens(
+            self, file_name: str, mime: str,
+            size: int, upload_time: int) -> set:
+        """
+        Returns ``set`` of tokens of the file.
+
+        Arguments:
+            file_name (``str``):
+                Name of the file.
+
+            mime (``str``):
+                Mime type of the file.
+
+            size (``int``):
+                Size of the file.
+
+            upload_time (``int``):
+                Upload time of the file.
+        """
+        tokens = self._trigram_tokens(b'n', file_name)
+        tokens |= self._trigram_tokens(b'm', mime)
+        tokens.add(self._size_token(size.bit_length()))
+
+        upload_time = min(max(int(upload_time), 0), self._TIME_MAX)
+        for level in self._TIME_LEVELS:
+            tokens.add(self._time_token(level, upload_time >> level))
+
+        return tokens
+
+    def filter_tokens(self, sf: SearchFilter) -> List[List[Tuple[tuple, int]]]:
+        """
+        Returns conditions of the **include** filters of the
+        ``sf`` as list of conditions. File is a candidate if
+        it matches all of them. Condition is a list of the
+        ``(tokens, required)``, condition is matched if file
+        has at least ``required`` of ``tokens`` in any of them.
+
+        Filters that can't be expressed with tokens (and
+        string filters if ``re`` is enabled) are ignored.
+
+        Arguments:
+            sf (``SearchFilter``):
+                ``SearchFilter`` to convert.
+        """
+        conditions, filters = [], sf.in_filters
+
+        if not filters['re']:
+            for kind, filter in ((b'n', 'file_name'), (b'm', 'mime')):
+                if not filters[filter]:
+                    continue
+
+                # Any of values should be in file attribute
+                condition = []
+                for value in filters[filter]:
+                    if len(value) < 3:
+                        break # Matches files without trigrams
+
+                    tokens = tuple(self._trigram_tokens(kind, value))
+                    condition.append((tokens, len(tokens)))
+                else:
+                    conditions.append(condition)
+
+        if filters['min_size'] or filters['max_size']:
+            low = max(filters['min_size'][-1], 0).bit_length() if filters['min_size'] else 0
+            high = max(filters['max_size'][-1], 0).bit_length() if filters['max_size'] else 64
+
+            tokens = tuple(self._size_token(i) for i in range(low, high + 1))
+            conditions.append([(tokens, 1)] if tokens else [])
+
+        if filters['min_time'] or filters['max_time']:
+            low = -int(-filters['min_time'][-1] // 1) if filters['min_time'] else 0
+            high = int(filters['max_time'][-1] // 1) if filters['max_time'] else self._TIME_MAX
+
+            tokens = tuple(self._time_range(max(low, 0), min(high, self._TIME_MAX)))
+            conditions.append([(tokens, 1)] if tokens else [])
+
+        return conditions
+
+def _column(column: array):
+    """Returns NumPy view of the ``column`` if NumPy is installed"""
+    return numpy.frombuffer(column, column.typecode) if numpy else column
+
+def _compare(op, column, value) -> list:
+    """Returns mask of ``op(x, value)`` for every ``x`` in ``column``"""
+    if numpy is not None:
+        return op(column, value)
+    return list(map(op, column, repeat(value)))
+
+def _isin(column, values: set) -> list:
+    """Returns mask of ``x in values`` for every ``x`` in ``column``"""
+    if numpy is not None:
+        return numpy.isin(column, list(values))
+    return list(map(values.__contains__, column))
+
+def _and(mask, other, negate: bool=False) -> list:
+    """Returns ``mask AND other`` (``AND NOT other`` if ``negate``)"""
+    if numpy is not None:
+        return mask & ~other if negate else mask & other
+    if negate:
+        return [x and not y for x, y in zip(mask, other)]
+    return list(map(and_, mask, other))
+
+class FileColumns:
+    """
+    In-memory columns of the decrypted file attributes
+    (ID, size, upload time, mime, imported flag and the
+    PPATH_HEAD) in the compact ``array`` s. The numeric
+    and equality filters of the ``SearchFilter`` are
+    evaluated over the whole columns at once (with the
+    NumPy, if it's installed), so files that can't match
+    don't need to be loaded and decrypted at all.
+
+    Mime and PPATH_HEAD are stored as codes of the
+    list of the unique values.
+    """
+    # Filters of the SearchFilter that are evaluated
+    FILTERS = (
+        'id', 'min_id', 'max_id', 'min_size', 'max_size',
+        'min_time', 'max_time', 'mime', 'imported'
+    )
+    def __init__(self):
+        self._clear()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, id: int) -> bool:
+        return id in self._rows
+
+    def _clear(self) -> None:
+        self._id = array('q')
+        self._size = array('q')
+        self._upload_time = array('q')
+        self._mime = array('L')
+        self._imported = array('b')
+        self._ppath_head = array('L')
+        self._alive = array('b')
+
+        self._rows = {} # {ID: row}
+        self._mimes, self._mime_codes = [], {}
+        self._part_ids, self._part_id_codes = [], {}
+
+    @staticmethod
+    def _code(value, values: list, codes: dict) -> int:
+        if value not in codes:
+            codes[value] = len(values)
+            values.append(value)
+        return codes[value]
+
+    def update(
+            self, id: int, size: int, upload_time: int,
+            mime: str, imported: bool, ppath_head: bytes) -> None:
+        """
+        Will add file to the columns or
+        replace it if file is already here.
+
+        Arguments:
+            id (``int``):
+                ID of the file.
+
+            size (``int``):
+                Size of the file.
+
+            upload_time (``int``):
+                Upload time of the file.
+
+            mime (``str``):
+                Mime type of the file.
+
+            imported (``bool``):
+                ``True`` if file is imported.
+
+            ppath_head (``bytes``):
+                PartID of the file directory.
+        """
+        mime = self._code(mime, self._mimes, self._mime_codes)
+        ppath_head = self._code(ppath_head, self._part_ids, self._part_id_codes)
+
+        values = (id, size, upload_time, mime, imported, ppath_head, 1)
+        columns = (
+            self._id, self._size, self._upload_time, self._mime,
+            self._imported, self._ppath_head, self._alive
+        )
+        if id in self._rows:
+            for column, value in zip(columns, values):
+                column[self._rows[id]] = value
+        else:
+            self._rows[id] = len(self._id)
+            for column, value in zip(columns, values):
+                column.append(value)
+
+    def remove(self, ids: Iterable[int]) -> None:
+        """
+        Will remove files with ``ids`` from the columns.
+
+        Arguments:
+            ids (``Iterable[int]``):
+                IDs of files to remove.
+        """
+        for id in ids:
+            row = self._rows.pop(id, None)
+            if row is not None:
+                self._alive[row] = 0
+
+        # Removed rows are only marked, so we
+        # rebuild columns when most are removed
+        if len(self._id) > 2 * len(self._rows) + 1024:
+            rows = [
+                (id, self._size[row], self._upload_time[row],
+                 self._mimes[self._mime[row]], self._imported[row],
+                 self._part_ids[self._ppath_head[row]])
+                for id, row in self._rows.items()
+            ]
+            self._clear()
+            for row in rows:
+                self.update(*row)
+
+    def retain(self, ids: Iterable[int]) -> None:
+        """
+        Will remove files that are not in ``ids``.
+
+        Arguments:
+            ids (``Iterable[int]``):
+                IDs of files to keep.
+        """
+        ids = set(ids)
+        self.remove([id for id in self._rows if id not in ids])
+
+    def _mask(self, sf: Optional[SearchFilter] = None):
+        """Returns mask of rows that match the ``FILTERS`` of ``sf``"""
+        mask = _compare(ne, _column(self._alive), 0)
+        if sf is None:
+            return mask
+
+        in_func = re_search if sf.in_filters['re'] else lambda p,s: p in s
+
+        for negate, filter in ((False, sf.in_filters), (True, sf.ex_filters)):
+            predicates = []
+
+            if filter['id']:
+                predicates.append(_isin(_column(self._id), set(filter['id'])))
+
+            # Included min_id & max_id are exclusive, as in
+            # the LocalBox.files, others are inclusive
+            id_ops = (ge, le) if negate else (gt, lt)
+
+            for name, column, (min_op, max_op) in (
+                    ('id', self._id, id_ops),
+                    ('size', self._size, (ge, le)),
+                    ('time', self._upload_time, (ge, le))):
+
+                if filter[f'min_{name}']:
+                    predicates.append(_compare(
+                        min_op, _column(column), filter[f'min_{name}'][-1]))
+
+                if filter[f'max_{name}']:
+                    predicates.append(_compare(
+                        max_op, _column(column), filter[f'max_{name}'][-1]))
+
+            if filter['mime']:
+                codes = {
+                    code for code, mime in enumerate(self._mimes)
+                    if any(in_func(p, mime) for p in filter['mime'])
+                }
+                predicates.append(_isin(_column(self._mime), codes))
+
+            if filter['imported']:
+                predicates.append(_compare(ne, _column(self._imported), 0))
+
+            for predicate in predicates:
+                mask = _and(mask, predicate, negate)
+
+        return mask
+
+    def select(self, sf: SearchFilter) -> List[int]:
+        """
+        Returns sorted IDs of files that match the ``FILTERS``
+        of the ``sf``. Other filters are ignored, so the
+        files should still be checked with them.
+
+        Arguments:
+            sf (``SearchFilter``):
+                ``SearchFilter`` to evaluate.
+        """
+        mask = self._mask(sf)
+
+        if numpy is not None:
+            return numpy.sort(_column(self._id)[mask]).tolist()
+        return sorted(compress(self._id, mask))
+
+    def sorted_ids(
+            self, by: str='id', reverse: bool=False,
+            sf: Optional[SearchFilter] = None) -> List[int]:
+        """
+        Returns IDs of files sorted by ``by``. Files
+        with the same value are sorted by ID.
+
+        Arguments:
+            by (``str``, optional):
+                ``'id'``, ``'size'`` or ``'upload_time'``.
+
+            reverse (``bool``, optional):
+                Sort in descending order.
+
+            sf (``SearchFilter``, optional):
+                Will return only files that match
+                the ``FILTERS`` of the ``sf``.
+        """
+        if by not in ('id', 'size', 'upload_time'):
+            raise ValueError('by should be id, size or upload_time')
+
+        mask, key = self._mask(sf), getattr(self, f'_{by}')
+
+        if numpy is not None:
+            ids = _column(self._id)
+            order = numpy.lexsort((ids, _column(key)))
+            order = order[mask[order]]
+            return ids[order[::-1] if reverse else order].tolist()
+
+        rows = sorted(
+            compress(range(len(self._id)), mask),
+            key=lambda row: (key[row], self._id[row]),
+            reverse=reverse
+        )
+        return [self._id[row] for row in rows]
+
+    def total_size(
+            self, by: str='mime',
+            sf: Optional[SearchFilter] = None) -> Dict[Union[str, bytes], int]:
+        """
+        Returns total size of files per mime as ``{mime: size}``
+        or per directory (files only of this directory, not of
+        subdirectories) as ``{PartID: size}``.
+
+        Arguments:
+            by (``str``, optional):
+                ``'mime'`` or ``'directory'``.
+
+            sf (``SearchFilter``, optional):
+                Will count only files that match
+                the ``FILTERS`` of the ``sf``.
+        """
+        if by == 'mime':
+            codes, values = self._mime, self._mimes
+        elif by == 'directory':
+            codes, values = self._ppath_head, self._part_ids
+        else:
+            raise ValueError('by should be mime or directory')
+
+        mask = self._mask(sf)
+
+        if numpy is not None:
+            codes, sizes = _column(codes)[mask], _column(self._size)[mask]
+
+            totals = numpy.zeros(len(values), dtype='q')
+            numpy.add.at(totals, codes, sizes)
+
+            return {values[code]: int(totals[code]) for code in numpy.unique(codes)}
+
+        totals = {}
+        for code, size in compress(zip(codes, self._size), mask):
+            totals[code] = totals.get(code, 0) + size
+
+        return {values[code]: total for code, total in totals.items()}
+
+class _PackedAttributesView(MutableMapping):
+    """
+    Dict-like result of ``PackedAttributes.unpack``. It
+    stores only offsets of values in the source buffer
+    and makes ``bytes`` from them on the first access.
+    """
+    def __init__(self, source: memoryview, offsets: Dict[str, slice]):
+        self._source = source
+        self._items = offsets
+
+    def __getitem__(self, key: str) -> bytes:
+        value = self._items[key]
+
+        if isinstance(value, slice):
+            value = self._items[key] = bytes(self._source[value])
+
+        return value
+
+    def __setitem__(self, key: str, value: bytes) -> None:
+        self._items[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._items[key]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    def __reduce__(self):
+        return (dict, (dict(self.items()),))
+
 class PackedAttributes:
     """
     This class is used to pack items to
@@ -222,17 +824,20 @@ class PackedAttributes:
         ``make(x=b'\x05')`` is correct.
 
         """
-        pattr = bytes([0xFF])
+        pattr = [bytes([0xFF])]
         for k,v in kwargs.items():
             if not isinstance(v, bytes):
                 raise TypeError('Values must be bytes')
 
-            pattr += int_to_bytes(len(k),3) + k.encode()
-            pattr += int_to_bytes(len(v),3) + v
-        return pattr
+            k = k.encode()
+            pattr.extend((
+                len(k).to_bytes(3, 'big'), k,
+                len(v).to_bytes(3, 'big'), v
+            ))
+        return b''.join(pattr)
 
     @staticmethod
-    def unpack(pattr: bytes) -> Dict[str, bytes]:
+    def unpack(pattr: Union[bytes, memoryview]) -> Dict[str, bytes]:
         """
         Will parse PackedAttributes.pack
         bytestring and convert it to the
@@ -241,29 +846,33 @@ class PackedAttributes:
         Every PackedAttributes bytestring
         must contain ``0xFF`` as first byte.
         If not, or if error, will return ``{}``.
+
+        Values aren't copied from the ``pattr`` until
+        you access them, so it's better to give here
+        a ``memoryview`` if you have a slice of bigger
+        bytestring. Returned object is a dict-like.
         """
         if not pattr:
             return {}
         try:
+            pattr = memoryview(pattr)
             assert pattr[0] == 0xFF
-            pattr_d, pattr = {}, pattr[1:]
 
-            while pattr:
-                key_len = bytes_to_int(pattr[:3])
-                key = pattr[3:key_len+3]
+            offsets, position, end = {}, 1, len(pattr)
+            while position < end:
+                key_len = int.from_bytes(pattr[position:position+3], 'big')
+                position += 3
 
-                value_len = bytes_to_int(pattr[key_len+3:key_len+6])
-                pattr = pattr[key_len+6:]
+                key = str(pattr[position:position+key_len], 'utf-8')
+                position += key_len
 
-                if value_len:
-                    value = pattr[:value_len]
-                    pattr = pattr[value_len:]
-                else:
-                    value = b''
+                value_len = int.from_bytes(pattr[position:position+3], 'big')
+                position += 3
 
-                pattr_d[key.decode()] = value
+                offsets[key] = slice(position, position+value_len)
+                position += value_len
 
-            return pattr_d
+            return _PackedAttributesView(pattr, offsets)
         except:
             return {}
 
@@ -284,22 +893,156 @@ class OpenPretender:
 
             aes_state (``AESwState``):
                 ``AESwState`` with Key and IV.
+
+            file_size (``int``, optional):
+                Size of the ``flo`` plus size of the
+                metadata, if you will concat it.
         """
         self._aes_state = aes_state
         self._flo = flo
 
-        self._buffered_bytes = b''
         self._total_size = file_size
         self._stop_iteration = False
 
         self._position = 0
+        self._metadata_size = 0
+
+        # Bytes that are ready to be returned (metadata and
+        # encrypted file) are stored in the self._buffer
+        # [self._buffer_start:self._buffer_end]. Buffers
+        # are allocated once and reused on every read.
+        self._buffer = bytearray()
+        self._buffer_start, self._buffer_end = 0, 0
+
+        self._read_buffer = bytearray()
+        self._unaligned = b'' # Not encrypted (len < 16) tail of read data
+
+        self._file_left = None
+        self._file_ended = False
+
+    def __reserve(self, size: int) -> memoryview:
+        """
+        Will return writable memoryview of ``size``
+        bytes after the last byte in buffer.
+        """
+        if len(self._buffer) - self._buffer_end < size:
+            pending = self._buffer_end - self._buffer_start
+
+            with memoryview(self._buffer) as buffer_view:
+                buffer_view[:pending] = buffer_view[
+                    self._buffer_start:self._buffer_end]
+
+            self._buffer_start, self._buffer_end = 0, pending
+
+            if len(self._buffer) - pending < size:
+                self._buffer.extend(bytes(size - len(self._buffer) + pending))
+
+        return memoryview(self._buffer)[self._buffer_end:self._buffer_end+size]
+
+    @property
+    def blocking(self) -> bool:
+        """
+        Returns ``True`` if wrapped file can be read without
+        the event loop, so ``read_blocking()`` is available.
+        """
+        return not iscoroutinefunction(self._flo.read)
+
+    def __read_file_blocking(self, size: int) -> memoryview:
+        readinto = getattr(self._flo, 'readinto', None)
+
+        if readinto and not iscoroutinefunction(readinto):
+            if len(self._read_buffer) < size:
+                self._read_buffer = bytearray(size)
+
+            with memoryview(self._read_buffer) as read_view:
+                size = readinto(read_view[:size])
+
+            return memoryview(self._read_buffer)[:size]
+
+        return memoryview(self._flo.read(size))
+
+    async def __read_file(self, size: int) -> memoryview:
+        if self.blocking:
+            return self.__read_file_blocking(size)
+
+        return memoryview(await self._flo.read(size))
+
+    def __encrypt_next(self, chunk: memoryview) -> None:
+        """Will encrypt next ``chunk`` of file."""
+        self._file_left -= len(chunk)
+        self._file_ended = not chunk or self._file_left <= 0
+
+        # The 16 is for padding and 15 is for ``update_into``
+        out = self.__reserve(len(self._unaligned) + len(chunk) + 31)
+        written = 0
+
+        if self._unaligned:
+            offset = min(16 - len(self._unaligned), len(chunk))
+            self._unaligned += bytes(chunk[:offset])
+            chunk = chunk[offset:]
+
+            if len(self._unaligned) == 16:
+                written += self._aes_state.encrypt_into(
+                    self._unaligned, out, pad=False, concat_iv=False)
+                self._unaligned = b''
+
+        if self._file_ended:
+            # If the self._unaligned isn't empty then chunk is empty
+            written += self._aes_state.encrypt_into(
+                self._unaligned or chunk, out[written:],
+                pad=True, concat_iv=False
+            )
+            self._unaligned = b''
+        else:
+            aligned = len(chunk) - len(chunk) % 16
+            written += self._aes_state.encrypt_into(
+                chunk[:aligned], out[written:],
+                pad=False, concat_iv=False
+            )
+            self._unaligned = bytes(chunk[aligned:])
+
+        self._buffer_end += written
 
     def concat_metadata(self, metadata: bytes) -> None:
         """Concates metadata to the file as (metadata + file)."""
         if self._position:
             raise ConcatError('Concat must be before any usage of object.')
         else:
-            self._buffered_bytes += metadata
+            self.__reserve(len(metadata))[:] = metadata
+            self._buffer_end += len(metadata)
+            self._metadata_size += len(metadata)
+
+    def __prepare_read(self, size: int) -> None:
+        if self._stop_iteration:
+            raise Exception('Stream was closed')
+
+        if size % 16 and not size == -1:
+            raise ValueError('size must be divisible by 16 or -1 (return all)')
+
+        if self._file_left is None:
+            if self._total_size is None:
+                self._file_left = self._flo.seek(0,2) # Move to file end
+                self._flo.seek(0,0) # Move to file start
+            else:
+                self._file_left = self._total_size - self._metadata_size
+
+    def __need_more(self, size: int) -> bool:
+        if self._file_ended:
+            return False
+        return size == -1 or self._buffer_end - self._buffer_start < size
+
+    def __take(self, size: int) -> bytes:
+        if size == -1:
+            size = self._buffer_end - self._buffer_start
+        else:
+            size = min(size, self._buffer_end - self._buffer_start)
+
+        with memoryview(self._buffer) as buffer_view:
+            block = bytes(buffer_view[self._buffer_start:self._buffer_start+size])
+
+        self._buffer_start += size
+        self._position += size
+        return block
 
     async def read(self, size: int=-1) -> bytes:
         """
@@ -314,55 +1057,35 @@ class OpenPretender:
                 Amount of bytes to return. By
                 default is negative (return all).
         """
-        if self._stop_iteration:
-            raise Exception('Stream was closed')
+        self.__prepare_read(size)
 
-        if size % 16 and not size == -1:
-            raise ValueError('size must be divisible by 16 or -1 (return all)')
+        while self.__need_more(size):
+            self.__encrypt_next(await self.__read_file(
+                size if size != -1 else self._file_left))
 
-        if self._total_size is None:
-            self._total_size = self._flo.seek(0,2) # Move to file end
-            self._flo.seek(0,0) # Move to file start
+        return self.__take(size)
 
-        if self._total_size <= 0 or size <= len(self._buffered_bytes) and size != -1:
-            block = self._buffered_bytes[:size]
-            self._buffered_bytes = self._buffered_bytes[size:]
-        else:
-            buffered = self._buffered_bytes
-            self._buffered_bytes = b''
-
-            if size == -1:
-                chunk = self._flo.read()
-                chunk = await chunk if iscoroutine(chunk) else chunk
-
-                block = buffered + self._aes_state.encrypt(
-                    chunk, pad=True, concat_iv=False)
-            else:
-                chunk = self._flo.read(size)
-                chunk = await chunk if iscoroutine(chunk) else chunk
-
-                if len(chunk) % 16:
-                    shift = int(-(len(chunk) % 16))
-                else:
-                    shift = None
+    def read_blocking(self, size: int=-1) -> bytes:
+        """
+        Same as ``read()`` but without event loop, so it can
+        be called from the worker thread. Available only if
+        the ``blocking`` property is ``True``.
 
-                if self._total_size <= 0 or size > self._total_size or shift != None:
-                    chunk = buffered + self._aes_state.encrypt(
-                        chunk, pad=True, concat_iv=False)
-                else:
-                    chunk = buffered + self._aes_state.encrypt(
-                        chunk, pad=False, concat_iv=False)
+        Arguments:
+            size (``int``):
+                Amount of bytes to return. By
+                default is negative (return all).
+        """
+        if not self.blocking:
+            raise TypeError('Wrapped file can be read only asynchronously')
 
-                shift = size if len(chunk) > size else None
+        self.__prepare_read(size)
 
-                if shift is not None:
-                    self._buffered_bytes = chunk[shift:]
+        while self.__need_more(size):
+            self.__encrypt_next(self.__read_file_blocking(
+                size if size != -1 else self._file_left))
 
-                self._total_size -= size
-                block = chunk[:shift]
-
-        self._position += len(block)
-        return block
+        return self.__take(size)
 
     def tell(self) -> int:
         return self._position
@@ -373,6 +1096,77 @@ class OpenPretender:
     def close(self) -> None:
         self._stop_iteration = True
 
+def _decrypt_cbc_segment(
+        key: Union[bytes, Key], iv: bytes,
+        data: memoryview, out: memoryview) -> int:
+    return AES(key, iv).decrypt_into(data, out, unpad=False)
+
+async def decrypt_cbc_parallel(
+        key: Union[bytes, Key], iv: bytes,
+        data: Union[bytes, bytearray, memoryview],
+        out: Union[bytearray, memoryview],
+        executor: Optional[Executor] = None,
+        segments: int=4,
+        min_segment_size: int=65536) -> int:
+    """
+    Decrypts AES CBC ``data`` into ``out`` on a thread
+    pool and returns amount of written bytes. Padding
+    is **not** removed, ``data`` must be divisible by 16.
+
+    CBC decryption of every block requires only previous
+    ciphertext block as IV, so we split ``data`` to the
+    ``segments`` and decrypt them concurrently. This will
+    use many CPU cores only with ``cryptography`` backend,
+    as it releases the GIL. PyAES will not be faster.
+
+    Arguments:
+        key (``bytes``, ``Key``):
+            AES decryption Key.
+
+        iv (``bytes``):
+            AES IV. This is a ciphertext block
+            that goes right before the ``data``.
+
+        data (``bytes``, ``bytearray``, ``memoryview``):
+            Ciphertext to decrypt.
+
+        out (``bytearray``, ``memoryview``):
+            Buffer to which we will write plaintext. Should
+            be at least ``len(data) + 15`` bytes to avoid
+            intermediate copy with the ``cryptography``.
+
+        executor (``Executor``, optional):
+            Executor to run on. Default loop
+            executor will be used if ``None``.
+
+        segments (``int``, optional):
+            Max amount of parts to split ``data`` to.
+
+        min_segment_size (``int``, optional):
+            Min size of one segment. Small data will be
+            splitted to the fewer amount of segments.
+    """
+    data, out = memoryview(data), memoryview(out)
+    assert not len(data) % 16, 'data must be divisible by 16'
+
+    segments = min(segments, -(-len(data) // min_segment_size))
+    segments = max(1, segments)
+
+    segment_size = -(-len(data) // 16 // segments) * 16
+    loop, pending = get_event_loop(), []
+
+    for start in range(0, len(data), segment_size):
+        end = start + segment_size
+        segment_iv = iv if not start else bytes(data[start-16:start])
+
+        # Extra 15 bytes of ``out`` will be untouched as
+        # CBC decryptor writes only ``len(data)`` bytes.
+        pending.append(loop.run_in_executor(executor, partial(
+            _decrypt_cbc_segment, key, segment_iv,
+            data[start:end], out[start:end+15]
+        )))
+    return sum(await gather(*pending))
+
 def pad_request_size(request_size: int, bsize: int=4096) -> int:
     """
     This function pads ``request_size`` to divisible